@@ -0,0 +1,182 @@
+import pygame
+
+
+# Frames of a transition, rendered once and played back by time.
+class FrameStrip:
+        def __init__(self, frames, duration):
+                '''
+                Description:
+                A transition (fade, slide) is rendered into a list of
+                surfaces when it starts, so playing it back only picks a
+                frame by the time elapsed and blits it. The same strip plays
+                at 10 or 60 frames per second, a slow frame skips frames
+                instead of slowing the transition down.
+
+                Inputs:
+                frames (list): Surfaces of the transition, the last one is
+                               the final look.
+                duration (int): Length of the transition in ms.
+
+                Output:
+                A frame strip class
+                '''
+                self.frames = frames
+                self.duration = max(1, duration)
+
+        # Frame shown after some time.
+        def frame_at(self, elapsed):
+                '''
+                Description:
+                Index of the frame from the time elapsed since the start.
+
+                Input:
+                elapsed (int): ms since the transition started.
+
+                Output:
+                frame (pygame.Surface): The frame to blit.
+                '''
+                if elapsed >= self.duration:
+                    return self.frames[-1]
+                return self.frames[max(0, elapsed) * len(self.frames) // self.duration]
+
+        # True once the last frame is reached.
+        def done(self, elapsed):
+                return elapsed >= self.duration
+
+        def __len__(self):
+                return len(self.frames)
+
+
+# Slows down at the end, baked into the frames so it costs nothing to play.
+def ease_out(t):
+    return 1 - (1 - t) ** 3
+
+
+# Blits a surface with an opacity into a frame.
+def blit_faded(frame, source, alpha, position=(0, 0)):
+    '''
+    Description:
+    Bakes the opacity into the pixels of the frame, so playing the frame
+    back is a plain blit. The alpha of the surface is changed, pass a copy
+    of shared surfaces.
+
+    Input:
+    frame (pygame.Surface): Frame with per pixel alpha.
+    source (pygame.Surface): Surface to blit.
+    alpha (int): Opacity, 0-255.
+    position (tuple): Top left corner in the frame.
+
+    Output:
+    None
+    '''
+    source.set_alpha(alpha)
+    frame.blit(source, position)
+
+
+# Fade in of a surface.
+def fade_in_strip(image, duration, steps=12):
+    '''
+    Description:
+    Frames from almost transparent to fully opaque.
+
+    Input:
+    image (pygame.Surface): Final look.
+    duration (int): Length of the fade in ms.
+    steps (int): Frames of the strip.
+
+    Output:
+    strip (FrameStrip): The fade.
+    '''
+    source = image.copy()
+    frames = []
+    for i in range(steps):
+        frame = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        blit_faded(frame, source, 255 * (i + 1) // steps)
+        frames.append(frame)
+    return FrameStrip(frames, duration)
+
+
+# Fade from one surface to another.
+def crossfade_strip(old, new, duration, steps=12):
+    '''
+    Description:
+    The old surface fades out while the new one fades in, both from the
+    top left corner, in frames as large as the larger of the two.
+
+    Input:
+    old (pygame.Surface): Look before the change.
+    new (pygame.Surface): Look after the change.
+    duration (int): Length of the fade in ms.
+    steps (int): Frames of the strip.
+
+    Output:
+    strip (FrameStrip): The crossfade.
+    '''
+    size = (max(old.get_width(), new.get_width()), max(old.get_height(), new.get_height()))
+    old, new = old.copy(), new.copy()
+    frames = []
+    for i in range(steps):
+        alpha = int(255 * ease_out((i + 1) / steps))
+        frame = pygame.Surface(size, pygame.SRCALPHA)
+        if alpha < 255:
+            blit_faded(frame, old, 255 - alpha)
+        blit_faded(frame, new, alpha)
+        frames.append(frame)
+    return FrameStrip(frames, duration)
+
+
+# Slide from one surface to another.
+def slide_strip(old, new, duration, steps=12):
+    '''
+    Description:
+    The old surface leaves through the top while the new one comes in
+    from the bottom, clipped to a box as large as the larger of the two.
+
+    Input:
+    old (pygame.Surface): Look before the change.
+    new (pygame.Surface): Look after the change.
+    duration (int): Length of the slide in ms.
+    steps (int): Frames of the strip.
+
+    Output:
+    strip (FrameStrip): The slide.
+    '''
+    size = (max(old.get_width(), new.get_width()), max(old.get_height(), new.get_height()))
+    frames = []
+    for i in range(steps):
+        offset = round(size[1] * ease_out((i + 1) / steps))
+        frame = pygame.Surface(size, pygame.SRCALPHA)
+        frame.blit(old, (0, -offset))
+        frame.blit(new, (0, size[1] - offset))
+        frames.append(frame)
+    return FrameStrip(frames, duration)
+
+
+# Builders of the transitions by name, e.g. for the SCORE_TRANSITION setting.
+TRANSITIONS = {
+    "fade": crossfade_strip,
+    "slide": slide_strip,
+}
+
+
+# Builds a transition by name.
+def transition_strip(kind, old, new, duration, steps=12):
+    '''
+    Description:
+    Renders the frames of a "fade" or "slide" between two surfaces.
+
+    Input:
+    kind (str): Name of the transition.
+    old (pygame.Surface): Look before the change.
+    new (pygame.Surface): Look after the change.
+    duration (int): Length of the transition in ms.
+    steps (int): Frames of the strip.
+
+    Output:
+    strip (FrameStrip): The transition, None if the name is unknown.
+    '''
+    build = TRANSITIONS.get(kind)
+    if build is None:
+        print(f"Unknown transition: {kind}")
+        return None
+    return build(old, new, duration, steps)
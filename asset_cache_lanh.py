@@ -0,0 +1,73 @@
+import glob
+import hashlib
+import os
+import pygame
+
+
+# pygame 2.1.3 renamed tostring/fromstring to tobytes/frombytes.
+_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+_from_bytes = getattr(pygame.image, "frombytes", None) or pygame.image.fromstring
+
+
+# Hash of the content of a file.
+def file_hash(path):
+    '''
+    Description:
+    Hashes the source image, so a new image replaces the cached one.
+
+    Input:
+    path (str): File to hash.
+
+    Output:
+    digest (str): First 16 hex characters of the SHA-1.
+    '''
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+# Loads an image already scaled for this resolution.
+def load_scaled(path, size, cache_dir, alpha=False):
+    '''
+    Description:
+    Returns the image scaled to the size, in the pixel format of the
+    display. The scaled pixels are kept raw on disk per source hash and
+    size, so the next start skips the PNG decoding and the scaling.
+    Needs the display mode to be set.
+
+    Input:
+    path (str): Source image.
+    size (tuple): Width and height wanted.
+    cache_dir (str): Folder of the cached images.
+    alpha (bool): Keeps the transparency (convert_alpha instead of convert).
+
+    Output:
+    image (pygame.Surface): The scaled image, ready for fast blits.
+    '''
+    width, height = size
+    mode = "RGBA" if alpha else "RGB"
+    name = os.path.splitext(os.path.basename(path))[0]
+    digest = file_hash(path)
+    cache_path = os.path.join(cache_dir, f"{name}-{digest}-{width}x{height}-{mode}.raw")
+
+    try:
+        with open(cache_path, "rb") as f:
+            image = _from_bytes(f.read(), (width, height), mode)
+    except (OSError, ValueError):
+        image = pygame.transform.scale(pygame.image.load(path), (width, height))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+
+            # Cached images of an older version of the source are removed.
+            for stale in glob.glob(os.path.join(cache_dir, f"{name}-*.raw")):
+                if f"-{digest}-" not in os.path.basename(stale):
+                    os.remove(stale)
+
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_to_bytes(image, mode))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not cache {path}: {e}")
+
+    # Same pixel format as the display, so blits need no conversion.
+    return image.convert_alpha() if alpha else image.convert()
@@ -1,18 +1,39 @@
 import pygame
 import os
-import requests
-
-
-# Init and get screen resolution
-pygame.init()
-pygame.mixer.init()
+import resources_lanh
+import asset_cache_lanh
+import font_registry_lanh
+
+
+# Times the startup, each resource is created the first time it is used.
+profiler = resources_lanh.StartupProfiler()
+resources = resources_lanh.ResourceRegistry(profiler)
+
+# Headless mode renders without a screen (SDL dummy driver) for the
+# stream overlay, at HEADLESS_SIZE. PADEL_HEADLESS=1 also turns it on.
+HEADLESS = os.environ.get("PADEL_HEADLESS") == "1"
+HEADLESS_SIZE = (1920, 1080)
+if HEADLESS:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+# Init and get screen resolution. The mixer starts with the first sound.
+with profiler.phase("pygame.init"):
+    pygame.display.init()
+    pygame.font.init()
+    # pygame.init() would also start the mixer. Without the timer,
+    # pygame.time.get_ticks() stays 0, the first clock tick starts it.
+    pygame.time.Clock().tick()
 info = pygame.display.Info()
 screen_width = info.current_w
 screen_height = info.current_h
+if HEADLESS:
+    screen_width, screen_height = HEADLESS_SIZE
 width, height = screen_width, screen_height
 
 # Set screen and scale factor
-win = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
+with profiler.phase("set_mode"):
+    win = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
 SCALE = screen_height / 1080  # Base reference from 1080p
 
 # Define colors
@@ -38,58 +59,171 @@ points_offset = int(140 * SCALE)
 center_x = screen_width / 2
 center_y = screen_height / 2
 
+# Rendering: only redraw the regions that changed (False repaints everything).
+DIRTY_RENDERING = True
+
+# Journal of the match in progress, replayed after a crash.
+JOURNAL_PATH = "match_journal.bin"
+
+# Statistics of every match played, one fixed size record per match (see
+# match_stats_lanh). The side that serves first sets the serve rotation.
+STATS_ARCHIVE_PATH = "match_archive.bin"
+FIRST_SERVER = 0
+
+# Local SQLite history of the matches and their events, None to turn it
+# off. With a sync URL the rows are posted there in chunks.
+STORE_PATH = "padel_store.db"
+STORE_SYNC_URL = None
+STORE_SYNC_CHUNK = 1000
+STORE_SYNC_INTERVAL = 60  # s
+
+# Outbox of the results waiting to be exported. With a batch URL the
+# results are posted together as JSON instead of one by one to Sheets.
+OUTBOX_PATH = "export_outbox.jsonl"
+EXPORT_BATCH_URL = None
+
+# Frames of the scoreboard for a stream overlay, None to turn it off:
+# "pipe:<path>" raw RGBA, "png:<folder>" PNG files or "shm:<name>" shared
+# memory ring. At most STREAM_FPS frames per second, only when it changed.
+STREAM_OUTPUT = os.environ.get("PADEL_STREAM_OUTPUT")
+STREAM_FPS = 10
+
+# Live score over HTTP (GET /score) and WebSocket (GET /live), None to
+# turn it off. Load test: python live_score_lanh.py <subscribers>
+LIVE_SCORE_HOST = "0.0.0.0"
+LIVE_SCORE_PORT = None
+
+# Input latency summaries (F4 or on exit).
+LATENCY_LOG_PATH = "latency_log.jsonl"
+
+# Frame profiler: time of each stage of the main loop, with an overlay
+# (F5). When on, a summary is added to the log every interval seconds.
+FRAME_PROFILER = False
+FRAME_PROFILE_LOG_PATH = "frame_profile.jsonl"
+FRAME_PROFILE_INTERVAL = 60
+
+# Speed of the controllers. 9600 for the text protocol, framed firmware
+# can use a higher one (e.g. 115200).
+CONTROLLER_BAUD = 9600
+
+# Courts run by this computer. Each court gets a region of the window,
+# COURT_REGIONS can place them by hand as (x, y, width, height), e.g. one
+# per screen when the window covers several screens. COURT_PORTS fixes the
+# court of a controller, {"COM3": 1, "COM4": 2}; the other controllers go
+# to the court with the fewest. With the keyboard, 1-9 selects the court.
+COURTS = 1
+COURT_REGIONS = None
+COURT_PORTS = {}
+
+# Rules of the matches, a name of scoring_rules_lanh.RULE_SETS: "advantage",
+# "golden_point", "super_tiebreak", "advantage_super_tiebreak", "best_of_5",
+# "best_of_5_advantage_final" or "pro_set".
+SCORING_RULES = "advantage"
+
 # Winner display duration
 WINNER_DISPLAY_DURATION = 10 * 1000  # ms
+WINNER_FADE_DURATION = 400  # ms
+
+# Transition of the players when the score changes: "fade", "slide" or
+# None, pre-rendered once per change.
+SCORE_TRANSITION = "fade"
+SCORE_TRANSITION_DURATION = 300  # ms
 
-# Responsive fonts
-label_font = pygame.font.SysFont("arialblack", int(80 * SCALE), bold=True)
-score_font = pygame.font.SysFont("arialblack", int(300 * SCALE), bold=False)
-numbers_font = pygame.font.SysFont("arialblack", int(80 * SCALE), bold=True)
-time_font = pygame.font.SysFont("arialblack", int(70 * SCALE), bold=True)
+# Frames per second during transitions, idle the screen only changes on
+# inputs and clock ticks.
+BURST_FPS = 60
 
 # General font
-font = "verdana"
+font = "verdana" #verdana, dejavusans o arial black.
 font_size = int((center_x + center_y) / 14 * SCALE)
 
+# Font files are looked up once and kept on disk, fonts are shared.
+FONT_CACHE_PATH = "font_cache.json"
+fonts = font_registry_lanh.FontRegistry(FONT_CACHE_PATH)
+
+# Responsive fonts: family, size and bold.
+FONT_SPECS = {
+    "label_font": ("arialblack", 80 * SCALE, True),
+    "score_font": ("arialblack", 300 * SCALE, False),
+    "numbers_font": ("arialblack", 80 * SCALE, True),
+    "time_font": ("arialblack", 80 * SCALE, True),
+    "padel_font": (font, font_size, True),
+    "small_font": (font, 100, True),
+    "debug_font": (font, 24, True),
+}
+
+# Gets a font of the list, scaled down for a court smaller than the screen.
+def scaled_font(name, scale=1):
+    '''
+    Description:
+    Returns the shared font with its size multiplied by the scale. Courts
+    of the same size get the same font objects.
+
+    Input:
+    name (str): Name in FONT_SPECS, e.g. "score_font".
+    scale (float): Size of the court compared to the screen.
+
+    Output:
+    font (pygame.font.Font): The font.
+    '''
+    family, size, bold = FONT_SPECS[name]
+    return fonts.get(family, max(1, int(size * scale)), bold=bold)
+
+for font_name in FONT_SPECS:
+    resources.register(font_name, lambda font_name=font_name: scaled_font(font_name))
+
+# Images scaled for each resolution are cached here, in display format.
+ASSET_CACHE_DIR = os.path.join('02_Assets', '.cache')
+
 # Load scaled background
-background_image = pygame.transform.scale(
-    pygame.image.load(os.path.join('02_Assets', 'background.png')),
-    (screen_width, screen_height)
-)
+resources.register("background_image", lambda: asset_cache_lanh.load_scaled(
+    os.path.join('02_Assets', 'background.png'),
+    (screen_width, screen_height),
+    ASSET_CACHE_DIR
+))
 
 # Load and scale logo
 logo_width = int(384 * SCALE)
 logo_height = int(216 * SCALE)
-logo_img = pygame.transform.scale(
-    pygame.image.load(os.path.join('02_Assets', 'logo.png')),
-    (logo_width, logo_height)
-)
-logo_rect = logo_img.get_rect(midtop=(screen_width // 2, 0))
+resources.register("logo_img", lambda: asset_cache_lanh.load_scaled(
+    os.path.join('02_Assets', 'logo.png'),
+    (logo_width, logo_height),
+    ASSET_CACHE_DIR,
+    alpha=True
+))
+logo_rect = pygame.Rect(0, 0, logo_width, logo_height)
+logo_rect.midtop = (screen_width // 2, 0)
 
 # Google Sheets CSV
 GOOGLE_SHEET_CSV_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQGzn7wVZMkWaImxEyxxv4V4c6e_BPKdye7Wh5QX0D8KQ15Y8jFj4QOLAxvCnflR7XqonJoB7Ul1ynB/pub?output=csv"
-response = requests.get(GOOGLE_SHEET_CSV_URL, timeout=10, headers={"Cache-Control": "no-cache"})
 
-time_font = pygame.font.SysFont("arialblack", 80, bold=True)
-font = "verdana" #verdana, dejavusans o arial black.
-font_size = int((center_x + center_y)/14)
+# Cache of the last license verdict, and how long it is trusted offline.
+LICENSE_CACHE_PATH = "license_cache.json"
+LICENSE_GRACE_DAYS = 7
 
-background_image = pygame.transform.scale(
-                pygame.image.load(
-                                  os.path.join('02_Assets','background.png')),
-                                  (width,height)
-                                   )
+# Create a sound, the mixer starts with the first one.
+def load_sound(path):
+    '''
+    Description:
+    Starts the mixer if needed and loads a sound.
 
-logo_img = pygame.transform.scale(
-                pygame.image.load(
-                                  os.path.join('02_Assets','logo.png')),
-                                  (384,216)
-                                   )
+    Input:
+    path (str): File of the sound.
 
-logo_rect = logo_img.get_rect(midtop=(width // 2, 0))
+    Output:
+    sound (pygame.mixer.Sound): The sound.
+    '''
+    if not pygame.mixer.get_init():
+        with profiler.phase("pygame.mixer.init"):
+            pygame.mixer.init()
+    return pygame.mixer.Sound(path)
 
+resources.register("peep_sound", lambda: load_sound("beep.wav"))
+resources.register("bell_sound", lambda: load_sound("bell.wav"))
 
-# Create a sound
-peep_sound = pygame.mixer.Sound("beep.wav")
-bell_sound = pygame.mixer.Sound("bell.wav")
 
+# Resources are module attributes, created the first time they are used.
+def __getattr__(name):
+    if name in resources:
+        return resources.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
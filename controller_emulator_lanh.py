@@ -0,0 +1,360 @@
+import heapq
+import os
+import random
+import time
+import pygame
+import serial.tools.list_ports
+import serial.tools.list_ports_common
+import controller_protocol_lanh as protocol
+import latency_lanh as lat
+import serial_reader_lanh as serial_lanh
+
+
+# Frame number of each command, the opposite of protocol.FRAME_COMMANDS.
+COMMAND_NUMBERS = {name: number for number, name in protocol.FRAME_COMMANDS.items()}
+
+# Commands of a random stream and how often they come, mostly points.
+RANDOM_COMMANDS = {
+    "LEFT": 45,
+    "RIGHT": 45,
+    "ENTER": 5,
+    "SPACE": 5,
+}
+
+
+# A fake controller on a pseudo-terminal.
+class EmulatedController:
+        def __init__(self, source_id=1, framed=False):
+                '''
+                Description:
+                Opens a pty pair. The reader opens the slave side like a
+                real serial port, the emulator writes the commands into the
+                master side without blocking: bytes that do not fit in the
+                pty buffer are counted as dropped, like a controller writing
+                to a port nobody reads.
+
+                Inputs:
+                source_id (int): Id of the controller in the frames.
+                framed (bool): True for the binary frame protocol, False for text.
+
+                Output:
+                An emulated controller class
+                '''
+                import pty
+                import tty
+                self.master, self.slave = pty.openpty()
+                tty.setraw(self.slave)
+                os.set_blocking(self.master, False)
+                self.device = os.ttyname(self.slave)
+                self.source_id = source_id
+                self.framed = framed
+                self.sequence = 0
+                self.sent = 0
+                self.dropped = 0
+
+        # Sends a command.
+        def send(self, command):
+                '''
+                Description:
+                Writes a command as a frame or a text line.
+
+                Input:
+                command (str): ENTER, SPACE, LEFT or RIGHT.
+
+                Output:
+                sent (bool): False if the pty buffer was full.
+                '''
+                if self.framed:
+                    self.sequence = (self.sequence + 1) & 0xFF
+                    data = protocol.encode_frame(self.source_id, self.sequence, COMMAND_NUMBERS[command])
+                else:
+                    data = f"{command}\n".encode()
+                try:
+                    os.write(self.master, data)
+                except BlockingIOError:
+                    self.dropped += 1
+                    return False
+                self.sent += 1
+                return True
+
+        # Unplugs the controller.
+        def close(self):
+                for fd in (self.master, self.slave):
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+
+
+# Makes list_ports show the emulated controllers as CH340 ports.
+def install_comports(controllers):
+    '''
+    Description:
+    Replaces serial.tools.list_ports.comports so find_all_arduino_ports
+    of the app finds the emulated controllers, e.g. to run the whole app
+    (arduino_commands) against them.
+
+    Input:
+    controllers (list): The emulated controllers.
+
+    Output:
+    None
+    '''
+    real_comports = serial.tools.list_ports.comports
+
+    def comports(*args, **kwargs):
+        ports = list(real_comports(*args, **kwargs))
+        for controller in controllers:
+            info = serial.tools.list_ports_common.ListPortInfo(controller.device, skip_link_detection=True)
+            info.description = "USB-SERIAL CH340 (emulated)"
+            ports.append(info)
+        return ports
+
+    serial.tools.list_ports.comports = comports
+
+
+# Commands of a random stream.
+def random_script(rate, duration, seed=None):
+    '''
+    Description:
+    Commands at random times (Poisson arrivals) at the given rate.
+
+    Input:
+    rate (float): Commands per second.
+    duration (float): Seconds of the stream.
+    seed (int): Seed for a repeatable stream.
+
+    Output:
+    script (list): (seconds from the start, command) in order.
+    '''
+    generator = random.Random(seed)
+    names = list(RANDOM_COMMANDS)
+    weights = list(RANDOM_COMMANDS.values())
+    script = []
+    at = generator.expovariate(rate)
+    while at < duration:
+        script.append((at, generator.choices(names, weights)[0]))
+        at += generator.expovariate(rate)
+    return script
+
+
+# Reads a scripted stream, one "<milliseconds> <COMMAND>" per line.
+def load_script(path):
+    '''
+    Description:
+    Loads a script. The time of each line is from the start, blank lines
+    and lines starting with # are skipped.
+
+    Input:
+    path (str): File of the script.
+
+    Output:
+    script (list): (seconds from the start, command) in order.
+    '''
+    script = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            at, command = line.split()
+            script.append((int(at) / 1000, command.upper()))
+    return sorted(script)
+
+
+# Runs the streams through the serial reader and an emulated main loop.
+def run_load(ports=4, rate=5, duration=10, framed=False, scripts=None,
+             frame_ms=0, handle_ms=0.0, seed=None, debounce=True):
+    '''
+    Description:
+    Creates the controllers, reads them with the SerialReader of the app
+    and drains the pygame queue like main() does. The main loop wakes on
+    each event (frame_ms=0) or at a fixed frame time, and each event can
+    cost handle_ms to emulate a slow frame. The score key lockout of
+    the text protocol is done by the debouncer of the reader (the
+    courts never lock controller events), it is reported apart from
+    the other duplicates.
+
+    Input:
+    ports (int): Emulated controllers.
+    rate (float): Commands per second of each controller.
+    duration (float): Seconds of the test.
+    framed (bool): Binary frame protocol instead of text.
+    scripts (list): One script per controller, random streams if None.
+    frame_ms (float): Minimum time of a main loop frame.
+    handle_ms (float): Time spent on each event.
+    seed (int): Seed of the random streams.
+    debounce (bool): False to only drop retransmitted frames, so every
+                     command reaches the queue.
+
+    Output:
+    report (dict): Counts, queue depth and latency.
+    '''
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.event.set_allowed(None)
+    pygame.event.clear()
+
+    post_failures = [0]
+
+    # Same as post_key, counting the events the full queue refuses.
+    def post(key, port, t_read):
+        event = pygame.event.Event(
+                    pygame.KEYDOWN,
+                    {'key': key, 'port': port, 'debounced': True,
+                     't_read': t_read, 't_post': time.perf_counter()}
+                    )
+        try:
+            if pygame.event.post(event) is False:
+                post_failures[0] += 1
+        except pygame.error:
+            post_failures[0] += 1
+
+    controllers = [EmulatedController(i + 1, framed) for i in range(ports)]
+    debouncer = protocol.Debouncer() if debounce else protocol.Debouncer(0, 0)
+    reader = serial_lanh.SerialReader(post=post, debouncer=debouncer)
+    reader.start()
+    for controller in controllers:
+        reader.add_port(controller.device)
+
+    if scripts is None:
+        scripts = [random_script(rate, duration, None if seed is None else seed + i) for i in range(ports)]
+
+    # Every stream in one heap, one thread writes all the ports.
+    pending = []
+    for index, script in enumerate(scripts):
+        if script:
+            heapq.heappush(pending, (script[0][0], index, 0))
+
+    tracker = lat.LatencyTracker()
+    depths = []
+    waited = []
+    handled = 0
+
+    start = time.perf_counter()
+    end = start + max(duration, max((script[-1][0] for script in scripts if script), default=0)) + 0.5
+    while True:
+        now = time.perf_counter()
+
+        # Writes the commands that are due.
+        while pending and start + pending[0][0] <= now:
+            _, index, position = heapq.heappop(pending)
+            controllers[index].send(scripts[index][position][1])
+            if position + 1 < len(scripts[index]):
+                heapq.heappush(pending, (scripts[index][position + 1][0], index, position + 1))
+
+        # Drains the queue like the main loop.
+        events = waited + pygame.event.get()
+        if events:
+            depths.append(len(events))
+        for event in events:
+            if event.type != pygame.KEYDOWN:
+                continue
+            handled += 1
+            if handle_ms:
+                time.sleep(handle_ms / 1000)
+            tracker.handled(event)
+        if events:
+            tracker.flipped()
+
+        if now > end and not pending:
+            break
+
+        # Sleeps until the next command, or an event like main(). With a
+        # frame time it sleeps the whole frame, like a polling loop.
+        wake = start + pending[0][0] if pending else now + 0.01
+        if frame_ms:
+            time.sleep(max(0.0, now + frame_ms / 1000 - time.perf_counter()))
+            waited = []
+        else:
+            event = pygame.event.wait(max(1, int((wake - time.perf_counter()) * 1000)))
+            waited = [event] if event.type != pygame.NOEVENT else []
+
+    for controller in controllers:
+        reader.remove_port(controller.device)
+        controller.close()
+
+    sent = sum(controller.sent for controller in controllers)
+    stats = list(reader.stats.values())
+    decoded = sum(port["frames"] + port["lines"] for port in stats)
+    depths.sort()
+    accepted = sum(port["events"] for port in stats)
+    return {
+        "ports": ports,
+        "rate_per_port": rate,
+        "sent": sent,
+        "dropped_in_pty": sum(controller.dropped for controller in controllers),
+        "dropped_in_transport": sent - decoded,
+        "bad_frames": sum(port["bad_frames"] for port in stats),
+        "lost_to_debounce": sum(port["duplicates"] for port in stats) - debouncer.locked_out,
+        "lost_to_lockout": debouncer.locked_out,
+        "queue_full": post_failures[0],
+        "lost_in_queue": accepted - post_failures[0] - handled,
+        "handled": handled,
+        "queue_depth": {
+            "p50": depths[len(depths) // 2] if depths else 0,
+            "p99": depths[int(len(depths) * 0.99)] if depths else 0,
+            "max": depths[-1] if depths else 0,
+        },
+        "latency": tracker.summary(),
+    }
+
+
+# Raises the rate until the input path breaks.
+def find_breaking_point(ports=4, rates=(5, 20, 50, 100, 200, 500, 1000), duration=3,
+                        framed=True, p99_limit_ms=50, **options):
+    '''
+    Description:
+    Runs short loads at higher and higher rates and stops at the first
+    one that loses events, or whose p99 latency from the read to the end
+    of the frame is over the limit. Frames are used by default,
+    the text protocol debounces most of a fast random stream.
+
+    Input:
+    ports (int): Emulated controllers.
+    rates (tuple): Commands per second of each controller, in order.
+    duration (float): Seconds of each load.
+    framed (bool): Binary frame protocol instead of text.
+    p99_limit_ms (float): Worst p99 latency accepted.
+    options: More arguments of run_load.
+
+    Output:
+    reports (list): The report of each rate, the last one broke.
+    '''
+    reports = []
+    for rate in rates:
+        report = run_load(ports, rate, duration, framed, **options)
+        reports.append(report)
+        p99 = report["latency"]["read_to_flip"]["p99_ms"]
+        lost = report["dropped_in_pty"] + report["dropped_in_transport"] + report["queue_full"] + report["lost_in_queue"]
+        print(f"{ports} ports x {rate}/s: sent {report['sent']}, handled {report['handled']}, "
+              f"lost {lost}, max queue {report['queue_depth']['max']}, p99 {p99} ms")
+        if lost or p99 > p99_limit_ms:
+            break
+    return reports
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Emulated controllers over pseudo-terminals.")
+    parser.add_argument("--ports", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5, help="commands per second of each port")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--framed", action="store_true", help="binary frames instead of text")
+    parser.add_argument("--script", help="file with '<ms> <COMMAND>' lines, sent by every port")
+    parser.add_argument("--frame-ms", type=float, default=0)
+    parser.add_argument("--handle-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--no-debounce", action="store_true", help="let every command reach the queue")
+    parser.add_argument("--sweep", action="store_true", help="raise the rate until it breaks")
+    args = parser.parse_args()
+
+    if args.sweep:
+        find_breaking_point(args.ports, framed=args.framed, frame_ms=args.frame_ms,
+                            handle_ms=args.handle_ms, seed=args.seed, debounce=not args.no_debounce)
+    else:
+        scripts = [load_script(args.script)] * args.ports if args.script else None
+        report = run_load(args.ports, args.rate, args.duration, args.framed, scripts,
+                          args.frame_ms, args.handle_ms, args.seed, not args.no_debounce)
+        print(json.dumps(report, indent=1))
@@ -0,0 +1,185 @@
+import time
+
+
+# Binary frame of the controllers:
+#   0xA5 | source | sequence | command | checksum
+# The checksum is source ^ sequence ^ command ^ 0x5A. 0xA5 is never sent
+# by the text protocol, so both can share the same port.
+SYNC = 0xA5
+FRAME_SIZE = 5
+CHECKSUM_SEED = 0x5A
+
+# Command numbers of the frames and their names in the text protocol.
+FRAME_COMMANDS = {
+    1: "ENTER",
+    2: "SPACE",
+    3: "RIGHT",
+    4: "LEFT",
+}
+
+# Text commands, checked in order like the original protocol.
+TEXT_COMMANDS = ("ENTER", "SPACE", "RIGHT", "LEFT")
+
+
+# Builds a frame, used by the controller firmware and the emulator.
+def encode_frame(source, sequence, command):
+    '''
+    Description:
+    Packs a command into a 5 byte frame.
+
+    Input:
+    source (int): Id of the controller, 0-255.
+    sequence (int): Sequence number, 0-255, wraps around.
+    command (int): Command number, see FRAME_COMMANDS.
+
+    Output:
+    frame (bytes): The frame.
+    '''
+    checksum = source ^ sequence ^ command ^ CHECKSUM_SEED
+    return bytes((SYNC, source, sequence & 0xFF, command, checksum))
+
+
+# Finds the frames and the text lines in the bytes of a port.
+class FrameDecoder:
+        def __init__(self, max_line=1024):
+                '''
+                Description:
+                Splits the bytes of a port into binary frames and text lines.
+                A frame with a bad checksum is dropped and the decoder looks
+                for the next sync byte.
+
+                Inputs:
+                max_line (int): Longest text line kept, noise is dropped.
+
+                Output:
+                A frame decoder class
+                '''
+                self.max_line = max_line
+                self.bad_frames = 0
+                self._buffer = bytearray()
+
+        # Adds bytes and returns what was found.
+        def feed(self, data):
+                '''
+                Description:
+                Decodes the bytes together with what was left from before.
+
+                Input:
+                data (bytes): Bytes read from the port.
+
+                Output:
+                items (list): ("frame", source, sequence, command) and
+                              ("line", text) tuples in order.
+                '''
+                buffer = self._buffer
+                buffer += data
+                items = []
+                start = 0
+                size = len(buffer)
+                while start < size:
+                    byte = buffer[start]
+                    if byte == SYNC:
+                        if size - start < FRAME_SIZE:
+                            break
+                        source, sequence, command, checksum = buffer[start + 1:start + FRAME_SIZE]
+                        if source ^ sequence ^ command ^ CHECKSUM_SEED == checksum:
+                            items.append(("frame", source, sequence, command))
+                            start += FRAME_SIZE
+                        else:
+                            self.bad_frames += 1
+                            start += 1
+                        continue
+
+                    # Text until the end of the line or the next frame.
+                    newline = buffer.find(b"\n", start)
+                    sync = buffer.find(SYNC, start)
+                    if newline == -1 or (sync != -1 and sync < newline):
+                        if sync == -1:
+                            if size - start > self.max_line:
+                                start = size
+                            break
+                        start = sync  # Text cut by a frame is noise.
+                        continue
+                    items.append(("line", buffer[start:newline].decode(errors='ignore').strip().upper()))
+                    start = newline + 1
+                del buffer[:start]
+                return items
+
+
+# Drops repeated and bouncing inputs for each controller.
+class Debouncer:
+        def __init__(self, frame_interval=0.15, text_interval=3.0, sequence_timeout=5.0,
+                     text_commands=("LEFT", "RIGHT")):
+                '''
+                Description:
+                Frames with the same or an older sequence number than the
+                last accepted one of the same source are retransmissions.
+                A command repeated by the same source within the interval is
+                a bounce. Other sources are never blocked. Text commands
+                are only debounced for the score keys, like the lockout the
+                app always had, so ENTER and SPACE go through.
+
+                Inputs:
+                frame_interval (float): Seconds between two equal frame commands.
+                text_interval (float): Same for the text protocol, which has no
+                                       sequence numbers.
+                sequence_timeout (float): Seconds after which the sequence of a
+                                          silent source is forgotten (e.g. the
+                                          controller restarted).
+                text_commands (tuple): Text commands that are debounced.
+
+                Output:
+                A debouncer class
+                '''
+                self.frame_interval = frame_interval
+                self.text_interval = text_interval
+                self.sequence_timeout = sequence_timeout
+                self.text_commands = text_commands
+                self.duplicates = 0
+                self.locked_out = 0
+                self._last_sequence = {}
+                self._last_time = {}
+
+        # Decides if an input is accepted.
+        def accept(self, source, command, sequence=None, now=None):
+                '''
+                Description:
+                Checks the sequence (frames only) and the time since the last
+                equal command of the source.
+
+                Input:
+                source (hashable): The controller, e.g. (port, id).
+                command (str): Name of the command.
+                sequence (int): Sequence number of the frame, None for text.
+                now (float): Current time.monotonic(), taken if None.
+
+                Output:
+                accepted (bool): False for duplicates and bounces.
+                '''
+                if now is None:
+                    now = time.monotonic()
+
+                if sequence is not None:
+                    last, last_time = self._last_sequence.get(source, (None, 0.0))
+                    if last is not None and now - last_time < self.sequence_timeout:
+                        if sequence == last or (sequence - last) % 256 >= 128:
+                            self.duplicates += 1
+                            return False
+                    interval = self.frame_interval
+                elif command in self.text_commands:
+                    interval = self.text_interval
+                else:
+                    return True
+
+                key = (source, command)
+                if now - self._last_time.get(key, -interval) < interval:
+                    self.duplicates += 1
+                    if sequence is None:
+                        # The score key lockout of the text protocol.
+                        self.locked_out += 1
+                    return False
+
+                if sequence is not None:
+                    self._last_sequence[source] = (sequence, now)
+                self._last_time[key] = now
+                return True
@@ -0,0 +1,152 @@
+import math
+import os
+import threading
+import pygame
+
+
+# Splits the window into a grid, one region per court.
+def split_regions(size, count):
+    '''
+    Description:
+    Divides the window in a grid with as many columns as rows (or one
+    more), filled row by row. A single court gets the whole window.
+
+    Input:
+    size (tuple): Width and height of the window.
+    count (int): Number of courts.
+
+    Output:
+    regions (list): One pygame.Rect per court.
+    '''
+    width, height = size
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    cell_width = width // columns
+    cell_height = height // rows
+
+    regions = []
+    for i in range(count):
+        row, column = divmod(i, columns)
+        regions.append(pygame.Rect(column * cell_width, row * cell_height, cell_width, cell_height))
+    return regions
+
+
+# File of a court, the first court keeps the original name.
+def court_path(path, index):
+    '''
+    Description:
+    Gives each court its own file (journal...), e.g. match_journal.bin,
+    match_journal_court2.bin, match_journal_court3.bin.
+
+    Input:
+    path (str): File of the first court.
+    index (int): Number of the court, from 0.
+
+    Output:
+    path (str): File of the court.
+    '''
+    if index == 0:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}_court{index + 1}{extension}"
+
+
+# Lockout of the keyboard score keys of a court.
+class ScoreKeyLock:
+        def __init__(self, duration=3000):
+                '''
+                Description:
+                A keyboard score key is ignored for a while after a press.
+                Each key has its own lockout, so one team never blocks the
+                other. Controller inputs were already debounced by the
+                reader and are never locked.
+
+                Inputs:
+                duration (int): ms a key stays locked.
+
+                Output:
+                A score key lock class
+                '''
+                self.duration = duration
+                self.pressed = {
+                        pygame.K_LEFT: -duration,
+                        pygame.K_RIGHT: -duration
+                        }
+
+        # Checks a key press, and locks the key if it scores.
+        def locked(self, event):
+                '''
+                Description:
+                True if the press of a score key comes too soon after the
+                last one. Otherwise a score key press starts its lockout.
+
+                Input:
+                event (pygame.event.Event): The KEYDOWN event.
+
+                Output:
+                locked (bool): True if the press must be ignored.
+                '''
+                if event.key not in self.pressed:
+                    return False
+                ticks = pygame.time.get_ticks()
+                if (not getattr(event, 'debounced', False)
+                        and ticks - self.pressed[event.key] <= self.duration):
+                    return True
+                self.pressed[event.key] = ticks
+                return False
+
+
+# Decides which court each controller scores on.
+class CourtRouter:
+        def __init__(self, court_count, fixed_ports=None):
+                '''
+                Description:
+                Maps each serial port to a court. Ports in fixed_ports go to
+                their court, the others are given to the court with the
+                fewest controllers when they connect. A port keeps its court
+                if it is unplugged and plugged again.
+
+                Inputs:
+                court_count (int): Number of courts.
+                fixed_ports (dict): Port -> court number, from 1.
+
+                Output:
+                A court router class
+                '''
+                self.court_count = court_count
+                self._courts = {}
+                self._lock = threading.Lock()
+                for port, number in (fixed_ports or {}).items():
+                    if 1 <= number <= court_count:
+                        self._courts[port] = number - 1
+                    else:
+                        print(f"Port {port}: there is no court {number}")
+
+        # Court of a port, assigned the first time the port is seen.
+        def assign(self, port):
+                '''
+                Description:
+                Returns the court of the port, giving it one if it has none.
+
+                Input:
+                port (str): Device of the controller, e.g. "COM3".
+
+                Output:
+                index (int): Court of the port, from 0.
+                '''
+                with self._lock:
+                    index = self._courts.get(port)
+                    if index is None:
+                        controllers = [0] * self.court_count
+                        for court in self._courts.values():
+                            controllers[court] += 1
+                        index = controllers.index(min(controllers))
+                        self._courts[port] = index
+                        if self.court_count > 1:
+                            print(f"Controller {port} -> court {index + 1}")
+                    return index
+
+        # Ports of a court.
+        def ports(self, index):
+                with self._lock:
+                    return [port for port, court in self._courts.items() if court == index]
@@ -0,0 +1,309 @@
+import collections
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import requests
+
+
+# Sends each result with the Google Sheets exporter, one result per call.
+def ptexp_sender(records):
+    '''
+    Description:
+    Exports the results with ptexp.export_to_google_sheets. The exporter
+    takes one result per call, so use it with batch_size=1.
+
+    Input:
+    records (list): Results to export.
+
+    Output:
+    None, raises an exception if the export failed.
+    '''
+    # Imported here so the outbox can be used without the exporter.
+    import v01_padeltracker_dataexporter_lanh as ptexp
+    for record in records:
+        # The sheet has no court column, the court goes with the winner.
+        winner = record["winner"]
+        if record.get("court"):
+            winner = f"{record['court']}: {winner or ''}"
+        ptexp.export_to_google_sheets(
+                    winner,
+                    record["p1_score"],
+                    record["p2_score"],
+                    record["elapsed_time"],
+                    record["user_license"],
+                    record["version_number"]
+                    )
+
+
+# Sends many results in a single POST request.
+def http_sender(url, timeout=10):
+    '''
+    Description:
+    Creates a sender that posts the results as JSON, {"results": [...]},
+    to an URL. Each result has an "id" so the server can drop duplicates.
+    Can be pointed to a local stand-in server for testing.
+
+    Input:
+    url (str): Endpoint that receives the results.
+    timeout (float): Seconds before the request is abandoned.
+
+    Output:
+    send (function): The sender for ExportOutbox.
+    '''
+    def send(records):
+        response = requests.post(url, json={"results": records}, timeout=timeout)
+        response.raise_for_status()
+    return send
+
+
+# Results waiting to be exported, saved on disk and sent in the background.
+class ExportOutbox:
+        def __init__(self, path, send_batch, batch_size=20, base_delay=2, max_delay=300):
+                '''
+                Description:
+                Keeps the match results in a file until they are exported. A
+                worker thread sends them in batches and retries with an
+                exponential backoff, so the scoreboard never waits on the
+                network. Results still in the file are sent on the next start.
+
+                Inputs:
+                path (str): File of the outbox.
+                send_batch (function): Sends a list of results, raises on failure.
+                batch_size (int): Maximum results sent per call.
+                base_delay (float): Seconds before the first retry.
+                max_delay (float): Maximum seconds between retries.
+
+                Output:
+                An export outbox class
+                '''
+                self.path = path
+                self.send_batch = send_batch
+                self.batch_size = batch_size
+                self.base_delay = base_delay
+                self.max_delay = max_delay
+                self.sent = 0
+                self.failures = 0
+                self.duplicates = 0
+                self._pending = []
+                self._recent_ids = collections.deque(maxlen=256)
+                self._condition = threading.Condition()
+                self._stopped = False
+                self._dirty = False
+
+                # Results left from the last run.
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                            except ValueError:
+                                continue
+                            # A truncated or hand edited line is not a result.
+                            if not isinstance(record, dict) or "id" not in record:
+                                continue
+                            if record["id"] not in self._ids():
+                                self._pending.append(record)
+                except FileNotFoundError:
+                    pass
+
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+
+        # Adds a result to the outbox.
+        def put(self, winner, p1_score, p2_score, elapsed_time, user_license, version_number, court=None, stats=None,
+                started=None):
+                '''
+                Description:
+                Adds a result to the outbox and wakes the worker, which
+                saves it in the file and sends it. Nothing is written here,
+                so a frame never waits on the disk. The same score of the
+                same match put twice (e.g. Enter then ESC) is only sent once.
+
+                Inputs:
+                Same as ptexp.export_to_google_sheets.
+                court (str): Court of the match, None with a single court.
+                stats (dict): Statistics of the match (MatchStats.summary),
+                              not part of what makes a result a duplicate.
+                started (float): Time the match started, identifies the
+                                 match with the court.
+
+                Output:
+                added (bool): False if the result was a duplicate.
+                '''
+                record = {
+                    "winner": winner,
+                    "p1_score": p1_score,
+                    "p2_score": p2_score,
+                    "elapsed_time": elapsed_time,
+                    "user_license": user_license,
+                    "version_number": version_number,
+                }
+                if court is not None:
+                    record["court"] = court
+                if started is not None:
+                    record["started"] = started
+
+                # The elapsed time changes between two exports of the same score.
+                key = json.dumps([started, court, winner, p1_score, p2_score, user_license]).encode("utf-8")
+                record["id"] = hashlib.sha1(key).hexdigest()
+                record["created"] = time.time()
+                if stats is not None:
+                    record["stats"] = stats
+
+                with self._condition:
+                    if record["id"] in self._ids():
+                        self.duplicates += 1
+                        return False
+                    self._pending.append(record)
+                    self._dirty = True
+                    self._condition.notify()
+                return True
+
+        # Stops the worker and tries once to send the pending results.
+        def close(self, timeout=5):
+                '''
+                Description:
+                Stops the worker and makes one attempt to send what is
+                pending, like the export on exit used to, but gives up after
+                the timeout. Results not sent are exported on the next start.
+
+                Input:
+                timeout (float): Seconds to wait for the worker and the attempt.
+
+                Output:
+                None
+                '''
+                deadline = time.monotonic() + timeout
+                with self._condition:
+                    self._stopped = True
+                    self._condition.notify()
+                self._thread.join(timeout)
+                if self._thread.is_alive():
+                    # Still waiting on the network, the results are in the file.
+                    return
+
+                flusher = threading.Thread(target=self._flush, daemon=True)
+                flusher.start()
+                flusher.join(max(0, deadline - time.monotonic()))
+
+        # Counters of the outbox.
+        def stats(self):
+                '''
+                Description:
+                Returns the sent, pending, failure and duplicate counters.
+
+                Input:
+                None
+
+                Output:
+                stats (dict): The counters.
+                '''
+                with self._condition:
+                    return {
+                        "sent": self.sent,
+                        "pending": len(self._pending),
+                        "failures": self.failures,
+                        "duplicates": self.duplicates,
+                    }
+
+        # Ids of the pending and recently sent results.
+        def _ids(self):
+                return {record["id"] for record in self._pending}.union(self._recent_ids)
+
+        # Pending results to save if they changed, called with the lock held.
+        def _take_dirty(self):
+                if not self._dirty:
+                    return None
+                self._dirty = False
+                return list(self._pending)
+
+        # Writes the results, replacing the file atomically.
+        def _save(self, records):
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+                os.replace(tmp_path, self.path)
+
+        # Removes the results that were sent.
+        def _sent(self, batch):
+                sent_ids = {record["id"] for record in batch}
+                with self._condition:
+                    self._pending = [r for r in self._pending if r["id"] not in sent_ids]
+                    self._recent_ids.extend(sent_ids)
+                    self.sent += len(batch)
+                    self._dirty = True
+
+        # Waits until ready, stopped or the deadline, saving new results meanwhile.
+        def _wait(self, ready, deadline=None):
+                '''
+                Description:
+                Only the worker writes the file, outside the lock, so put()
+                never waits for the disk.
+
+                Inputs:
+                ready (function): True when the wait is over.
+                deadline (float): time.monotonic() to stop waiting, None to
+                                  wait until ready or stopped.
+
+                Output:
+                None
+                '''
+                while True:
+                    with self._condition:
+                        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                        self._condition.wait_for(lambda: self._stopped or self._dirty or ready(), timeout=timeout)
+                        records = self._take_dirty()
+                        done = self._stopped or ready() or (deadline is not None and time.monotonic() >= deadline)
+                    if records is not None:
+                        self._save(records)
+                    if done:
+                        return
+
+        # Worker thread, sends the results and retries with backoff.
+        def _worker(self):
+                attempt = 0
+                while True:
+                    self._wait(lambda: bool(self._pending))
+                    with self._condition:
+                        if self._stopped:
+                            return
+                        batch = self._pending[:self.batch_size]
+
+                    try:
+                        self.send_batch(batch)
+                    except Exception as e:
+                        # Waits longer after each failure, with some jitter.
+                        attempt += 1
+                        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                        delay *= random.uniform(0.5, 1.0)
+                        print(f"Export failed ({e}), retrying in {delay:.0f}s")
+                        with self._condition:
+                            self.failures += 1
+                        self._wait(lambda: False, time.monotonic() + delay)
+                        continue
+
+                    attempt = 0
+                    self._sent(batch)
+
+        # One attempt to send the pending results, after the worker stopped.
+        def _flush(self):
+                while True:
+                    with self._condition:
+                        records = self._take_dirty()
+                        batch = self._pending[:self.batch_size]
+                    if records is not None:
+                        self._save(records)
+                    if not batch:
+                        return
+                    try:
+                        self.send_batch(batch)
+                    except Exception as e:
+                        print(f"Export failed ({e}), sent on the next start")
+                        with self._condition:
+                            self.failures += 1
+                        return
+                    self._sent(batch)
@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import pygame
+
+
+# Families tried, in order, when a font is not installed.
+FALLBACKS = {
+    "arialblack": ["arialblack", "arial", "dejavusans", "liberationsans", "freesans"],
+    "verdana": ["verdana", "dejavusans", "arial", "liberationsans", "freesans"],
+}
+
+
+# Finds font files once and shares the Font objects.
+class FontRegistry:
+        def __init__(self, cache_path, fallbacks=FALLBACKS):
+                '''
+                Description:
+                Resolves a family name to a font file the first time and
+                keeps the answer on disk, so the next starts don't scan the
+                system fonts (fc-list on Linux). Fonts are shared per
+                (family, size, bold).
+
+                Inputs:
+                cache_path (str): JSON file with the resolved font files.
+                fallbacks (dict): Family -> families to try, in order.
+
+                Output:
+                A font registry class
+                '''
+                self.cache_path = cache_path
+                self.fallbacks = fallbacks
+                self._fonts = {}
+                self._lock = threading.Lock()
+                try:
+                    with open(cache_path, encoding="utf-8") as f:
+                        self._paths = json.load(f)
+                except (OSError, ValueError):
+                    self._paths = {}
+
+        # File of a family, and if bold has to be faked.
+        def resolve(self, family, bold=False):
+                '''
+                Description:
+                Returns the font file for the family, trying the fallbacks
+                when it is missing. Uses the disk cache if the file still
+                exists.
+
+                Input:
+                family (str): Name of the family, e.g. "arialblack".
+                bold (bool): True for the bold face.
+
+                Output:
+                path (str): Font file, None for the pygame default font.
+                fake_bold (bool): True if there is no bold file and pygame
+                                  has to make the font bold.
+                '''
+                key = f"{family.lower().replace(' ', '')}|{int(bold)}"
+                cached = self._paths.get(key)
+                if cached and (cached[0] is None or os.path.exists(cached[0])):
+                    return cached[0], cached[1]
+
+                # Slow path, it scans the system fonts the first time.
+                path = None
+                fake_bold = bold
+                for candidate in self.fallbacks.get(key.split("|")[0], [family]):
+                    path = pygame.font.match_font(candidate, bold=bold)
+                    if path:
+                        fake_bold = bold and path == pygame.font.match_font(candidate, bold=False)
+                        break
+                if path is None:
+                    print(f"Font '{family}' not found, using the default font")
+
+                self._paths[key] = [path, fake_bold]
+                self._save()
+                return path, fake_bold
+
+        # Writes the resolved fonts.
+        def _save(self):
+                try:
+                    tmp_path = self.cache_path + ".tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(self._paths, f, indent=1)
+                    os.replace(tmp_path, self.cache_path)
+                except OSError as e:
+                    print(f"Could not save the font cache: {e}")
+
+        # Shared font of a family, size and weight.
+        def get(self, family, size, bold=False):
+                '''
+                Description:
+                Same as pygame.font.SysFont, but the Font is created once
+                per (family, size, bold) and shared.
+
+                Input:
+                family (str): Name of the family.
+                size (int): Size of the font.
+                bold (bool): True for bold.
+
+                Output:
+                font (pygame.font.Font): The shared font.
+                '''
+                key = (family, size, bool(bold))
+                with self._lock:
+                    font = self._fonts.get(key)
+                    if font is None:
+                        path, fake_bold = self.resolve(family, bold)
+                        font = pygame.font.Font(path, size)
+                        if fake_bold:
+                            font.set_bold(True)
+                        self._fonts[key] = font
+                    return font
@@ -0,0 +1,118 @@
+import time
+import pygame
+
+
+# Decides how long the main loop sleeps: event driven when idle, a steady
+# frame rate while something is moving on screen.
+class FrameGovernor:
+        MODES = ("idle", "burst")
+
+        def __init__(self, burst_fps=60):
+                '''
+                Description:
+                Idle, the loop sleeps until an input or a deadline (the clock
+                tick once per second, an overlay that expires), so a court
+                nobody plays on draws about one frame per second. A
+                transition (fade, slide) asks for a burst and the loop wakes
+                every 1/burst_fps seconds until it is over. The time and the
+                frames of each mode are counted.
+
+                Inputs:
+                burst_fps (float): Frames per second during a burst.
+
+                Output:
+                A frame governor class
+                '''
+                self.frame_ms = 1000 / burst_fps
+                self.mode = "idle"
+                self.burst_until = 0
+                self.last_frame = 0
+                self.seconds = {mode: 0.0 for mode in self.MODES}
+                self.frames = {mode: 0 for mode in self.MODES}
+                self._mode_started = time.perf_counter()
+
+        # Asks for a steady frame rate for a while.
+        def burst(self, duration_ms, now=None):
+                '''
+                Description:
+                Keeps the loop at the burst frame rate until the transition
+                is over. Overlapping bursts extend each other.
+
+                Input:
+                duration_ms (int): Length of the transition.
+                now (int): pygame ticks, taken if None.
+
+                Output:
+                None
+                '''
+                if now is None:
+                    now = pygame.time.get_ticks()
+                self.burst_until = max(self.burst_until, now + duration_ms)
+
+        # Milliseconds the loop can sleep, None to wait for an event.
+        def wait_ms(self, deadlines, now=None):
+                '''
+                Description:
+                During a burst, the time to the next frame. Otherwise the
+                time to the nearest deadline, or None to sleep until an
+                event arrives.
+
+                Input:
+                deadlines (list): pygame ticks when something expires.
+                now (int): pygame ticks, taken if None.
+
+                Output:
+                wait_ms (int): Milliseconds to sleep, None for no timeout.
+                '''
+                if now is None:
+                    now = pygame.time.get_ticks()
+                if now < self.burst_until:
+                    self._set_mode("burst")
+                    deadlines = deadlines + [self.last_frame + self.frame_ms]
+                else:
+                    self._set_mode("idle")
+                if not deadlines:
+                    return None
+                return max(0, int(min(deadlines) - now))
+
+        # Called after each frame was drawn.
+        def frame_drawn(self, now=None):
+                self.last_frame = pygame.time.get_ticks() if now is None else now
+                self.frames[self.mode] += 1
+
+        def _set_mode(self, mode):
+                if mode != self.mode:
+                    now = time.perf_counter()
+                    self.seconds[self.mode] += now - self._mode_started
+                    self._mode_started = now
+                    self.mode = mode
+
+        # Time and frames in each mode.
+        def stats(self):
+                '''
+                Description:
+                Seconds, frames and frames per second of each mode.
+
+                Input:
+                None
+
+                Output:
+                stats (dict): Mode -> values.
+                '''
+                seconds = dict(self.seconds)
+                seconds[self.mode] += time.perf_counter() - self._mode_started
+                return {
+                    mode: {
+                        "seconds": round(seconds[mode], 1),
+                        "frames": self.frames[mode],
+                        "fps": round(self.frames[mode] / seconds[mode], 2) if seconds[mode] else 0,
+                    }
+                    for mode in self.MODES
+                }
+
+        # Text report of the modes.
+        def report(self):
+                total = sum(values["seconds"] for values in self.stats().values()) or 1
+                parts = [f"{mode} {values['seconds']} s ({values['seconds'] / total:.0%}, {values['fps']} fps)"
+                         for mode, values in self.stats().items()]
+                return "Frame rate: " + ", ".join(parts)
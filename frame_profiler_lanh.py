@@ -0,0 +1,156 @@
+import collections
+import json
+import time
+
+
+# Time of each stage of the main loop, frame by frame.
+class FrameProfiler:
+        def __init__(self, enabled=False, log_path=None, log_interval=60, window=600):
+                '''
+                Description:
+                The main loop calls begin() when it wakes up and lap(stage)
+                after each stage, so a stage is the time since the previous
+                lap. Stages that run more than once in a frame (one per
+                court) are added up. The last frames of each stage are kept
+                for rolling percentiles and a summary is appended to the log
+                every log_interval seconds. Disabled, a lap is a single
+                attribute check.
+
+                Inputs:
+                enabled (bool): True to start measuring right away.
+                log_path (str): JSON lines file of the summaries, None for none.
+                log_interval (float): Seconds between two summaries in the log.
+                window (int): Frames kept per stage for the percentiles.
+
+                Output:
+                A frame profiler class
+                '''
+                self.enabled = enabled
+                self.log_path = log_path
+                self.log_interval = log_interval
+                self.window = window
+                self.samples = collections.OrderedDict()
+                self.frames = 0
+                self._frame = {}
+                self._mark = 0.0
+                self._begin = 0.0
+                self._next_log = time.monotonic() + log_interval
+
+        # Turns the profiler on or off.
+        def toggle(self):
+                self.enabled = not self.enabled
+                self._frame = {}
+                self._begin = self._mark = time.perf_counter()
+                return self.enabled
+
+        # Start of a frame, after the loop woke up.
+        def begin(self):
+                if not self.enabled:
+                    return
+                self._begin = self._mark = time.perf_counter()
+                self._frame = {}
+
+        # End of a stage.
+        def lap(self, stage):
+                '''
+                Description:
+                Adds the time since the last lap (or begin) to the stage.
+
+                Input:
+                stage (str): Name of the stage, e.g. "events".
+
+                Output:
+                None
+                '''
+                if not self.enabled:
+                    return
+                now = time.perf_counter()
+                self._frame[stage] = self._frame.get(stage, 0.0) + now - self._mark
+                self._mark = now
+
+        # Adds a time measured apart, e.g. score_point inside the events.
+        def add(self, stage, seconds):
+                if self.enabled:
+                    self._frame[stage] = self._frame.get(stage, 0.0) + seconds
+
+        # End of the frame, keeps its stages.
+        def end_frame(self):
+                '''
+                Description:
+                Stores the stages of the frame and the whole frame, and
+                writes the summary to the log when it is time.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                if not self.enabled:
+                    return
+                self._frame["frame"] = time.perf_counter() - self._begin
+                for stage, seconds in self._frame.items():
+                    samples = self.samples.get(stage)
+                    if samples is None:
+                        samples = self.samples[stage] = collections.deque(maxlen=self.window)
+                    samples.append(seconds)
+                self._frame = {}
+                self.frames += 1
+
+                if self.log_path and time.monotonic() >= self._next_log:
+                    self._next_log = time.monotonic() + self.log_interval
+                    self.dump(self.log_path)
+
+        # Rolling percentiles of each stage.
+        def summary(self):
+                '''
+                Description:
+                p50, p95, p99 and max of the frames kept, in milliseconds.
+
+                Input:
+                None
+
+                Output:
+                summary (dict): Stage -> values.
+                '''
+                summary = {}
+                for stage, samples in self.samples.items():
+                    ordered = sorted(samples)
+                    count = len(ordered)
+                    summary[stage] = {
+                        "count": count,
+                        "p50_ms": round(ordered[count // 2] * 1000, 3),
+                        "p95_ms": round(ordered[min(count - 1, int(count * 0.95))] * 1000, 3),
+                        "p99_ms": round(ordered[min(count - 1, int(count * 0.99))] * 1000, 3),
+                        "max_ms": round(ordered[-1] * 1000, 3),
+                    }
+                return summary
+
+        # Lines of text for the overlay.
+        def summary_lines(self):
+                lines = []
+                for stage, values in self.summary().items():
+                    lines.append(f"{stage}: p50={values['p50_ms']}ms "
+                                 f"p95={values['p95_ms']}ms p99={values['p99_ms']}ms")
+                return lines
+
+        # Writes the summary to a file.
+        def dump(self, path):
+                '''
+                Description:
+                Appends the summary with a timestamp as a JSON line.
+
+                Input:
+                path (str): File of the frame profile log.
+
+                Output:
+                None
+                '''
+                if not self.samples:
+                    return
+                record = {"time": time.time(), "frames": self.frames, "stages": self.summary()}
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    print(f"Could not write the frame profile: {e}")
@@ -0,0 +1,380 @@
+import os
+import struct
+import threading
+import time
+import pygame
+
+
+# pygame 2.1.3 renamed tostring/fromstring to tobytes/frombytes.
+_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+_from_bytes = getattr(pygame.image, "frombytes", None) or pygame.image.fromstring
+
+# Shared memory ring:
+#   header: magic, width, height, slots, frame size, last sequence
+#   slots:  sequence, timestamp, RGBA pixels
+# The writer fills a slot, then its sequence, then the last sequence. A
+# reader copies the slot of the last sequence and checks that the slot
+# sequence did not change while it was copying.
+RING_MAGIC = b"PADL"
+RING_HEADER = struct.Struct("<4sIIIIQ")
+SLOT_HEADER = struct.Struct("<Qd")
+
+
+# Writes the frames of a slow output (pipe, PNG) from its own thread.
+class _FrameWriter:
+        def __init__(self, write, finish=None):
+                '''
+                Description:
+                Keeps only the newest frame. When the output is slower than
+                the frames, the older ones are dropped so the scoreboard
+                never waits on the output.
+
+                Inputs:
+                write (function): Writes one frame, (data, number, timestamp).
+                finish (function): Called by the thread after its last write,
+                                   e.g. to close the output.
+
+                Output:
+                A frame writer class
+                '''
+                self.write = write
+                self.finish = finish
+                self.dropped = 0
+                self._frame = None
+                self._condition = threading.Condition()
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        # Hands a frame to the thread.
+        def put(self, data, number, timestamp):
+                with self._condition:
+                    if self._frame is not None:
+                        self.dropped += 1
+                    self._frame = (data, number, timestamp)
+                    self._condition.notify()
+
+        # Thread loop.
+        def _run(self):
+                try:
+                    while True:
+                        with self._condition:
+                            while self._frame is None and not self._stopped:
+                                self._condition.wait()
+                            if self._frame is None:
+                                return
+                            frame = self._frame
+                            self._frame = None
+                        try:
+                            self.write(*frame)
+                        except (OSError, ValueError) as e:
+                            print(f"Frame output stopped: {e}")
+                            return
+                finally:
+                    if self.finish:
+                        self.finish()
+
+        # Writes the last frame and stops, the thread finishes a write
+        # still blocked after the timeout on its own.
+        def close(self, timeout=2):
+                with self._condition:
+                    self._stopped = True
+                    self._condition.notify()
+                self._thread.join(timeout)
+
+
+# Raw RGBA frames into a pipe or a file.
+class PipeSink:
+        def __init__(self, path, size):
+                '''
+                Description:
+                Writes each frame as width * height * 4 bytes of RGBA, e.g.
+                for ffmpeg -f rawvideo -pix_fmt rgba. A named pipe is created
+                if the path does not exist. Unchanged frames are not sent,
+                so the reader should take the arrival time of each frame
+                (ffmpeg -use_wallclock_as_timestamps 1).
+
+                Inputs:
+                path (str): Named pipe or file.
+                size (tuple): Width and height of the frames.
+
+                Output:
+                A pipe sink class
+                '''
+                if not os.path.exists(path) and hasattr(os, "mkfifo"):
+                    os.mkfifo(path)
+                self.path = path
+                self.size = size
+                self._file = None
+                self._writer = _FrameWriter(self._write, self._close_file)
+
+        # Opens the pipe on the first frame, it waits for a reader.
+        def _write(self, data, number, timestamp):
+                if self._file is None:
+                    self._file = open(self.path, "wb")
+                self._file.write(data)
+                self._file.flush()
+
+        def write(self, data, number, timestamp):
+                self._writer.put(data, number, timestamp)
+
+        @property
+        def dropped(self):
+                return self._writer.dropped
+
+        # Closed by the writer thread, never in the middle of a write.
+        def _close_file(self):
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except OSError:
+                        pass
+
+        def close(self):
+                self._writer.close()
+
+
+# Numbered PNG files.
+class PngSequenceSink:
+        def __init__(self, folder, size):
+                '''
+                Description:
+                Saves each frame as frame_000001.png, ... The number is the
+                frame number of the stream, so skipped frames leave gaps.
+
+                Inputs:
+                folder (str): Folder of the images.
+                size (tuple): Width and height of the frames.
+
+                Output:
+                A PNG sequence sink class
+                '''
+                os.makedirs(folder, exist_ok=True)
+                self.folder = folder
+                self.size = size
+                self._writer = _FrameWriter(self._write)
+
+        # PNG compression is slow, it runs in the writer thread.
+        def _write(self, data, number, timestamp):
+                image = _from_bytes(data, self.size, "RGBA")
+                pygame.image.save(image, os.path.join(self.folder, f"frame_{number:06d}.png"))
+
+        def write(self, data, number, timestamp):
+                self._writer.put(data, number, timestamp)
+
+        @property
+        def dropped(self):
+                return self._writer.dropped
+
+        def close(self):
+                self._writer.close()
+
+
+# Ring of frames in shared memory.
+class SharedMemoryRing:
+        def __init__(self, name, size, slots=3):
+                '''
+                Description:
+                Keeps the last frames in a block of shared memory that other
+                processes open by name (multiprocessing.shared_memory). A
+                frame is one copy, the scoreboard never waits on a reader.
+
+                Inputs:
+                name (str): Name of the shared memory block.
+                size (tuple): Width and height of the frames.
+                slots (int): Frames kept in the ring.
+
+                Output:
+                A shared memory ring class
+                '''
+                from multiprocessing import shared_memory
+
+                self.size = size
+                self.slots = slots
+                self.dropped = 0
+                self.frame_size = size[0] * size[1] * 4
+                self.slot_size = SLOT_HEADER.size + self.frame_size
+                total = RING_HEADER.size + self.slots * self.slot_size
+                try:
+                    self.memory = shared_memory.SharedMemory(name=name, create=True, size=total)
+                except FileExistsError:
+                    # Left by a previous run.
+                    old = shared_memory.SharedMemory(name=name)
+                    old.close()
+                    old.unlink()
+                    self.memory = shared_memory.SharedMemory(name=name, create=True, size=total)
+                RING_HEADER.pack_into(self.memory.buf, 0, RING_MAGIC, size[0], size[1], slots, self.frame_size, 0)
+
+        def write(self, data, number, timestamp):
+                '''
+                Description:
+                Copies the frame into the next slot and publishes it.
+
+                Inputs:
+                data (bytes): RGBA pixels.
+                number (int): Frame number, from 1.
+                timestamp (float): time.time() of the frame.
+
+                Output:
+                None
+                '''
+                offset = RING_HEADER.size + (number % self.slots) * self.slot_size
+                buffer = self.memory.buf
+                SLOT_HEADER.pack_into(buffer, offset, 0, timestamp)
+                buffer[offset + SLOT_HEADER.size:offset + self.slot_size] = data
+                SLOT_HEADER.pack_into(buffer, offset, number, timestamp)
+                struct.pack_into("<Q", buffer, RING_HEADER.size - 8, number)
+
+        def close(self):
+                self.memory.close()
+                self.memory.unlink()
+
+
+# Reads the newest frame of a ring, for the overlay process.
+def read_ring(memory):
+    '''
+    Description:
+    Copies the last published frame out of a ring opened with
+    shared_memory.SharedMemory(name=...).
+
+    Input:
+    memory (SharedMemory): The ring.
+
+    Output:
+    frame (tuple): (number, timestamp, size, data), None if there is no
+                   frame yet or it was being written.
+    '''
+    magic, width, height, slots, frame_size, last = RING_HEADER.unpack_from(memory.buf, 0)
+    if magic != RING_MAGIC or last == 0:
+        return None
+    offset = RING_HEADER.size + (last % slots) * (SLOT_HEADER.size + frame_size)
+    number, timestamp = SLOT_HEADER.unpack_from(memory.buf, offset)
+    data = bytes(memory.buf[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + frame_size])
+    if SLOT_HEADER.unpack_from(memory.buf, offset)[0] != number or number != last:
+        return None
+    return number, timestamp, (width, height), data
+
+
+# Creates the output of a STREAM_OUTPUT setting.
+def open_sink(spec, size):
+    '''
+    Description:
+    "pipe:<path>" for raw RGBA, "png:<folder>" for a PNG sequence or
+    "shm:<name>" for a shared memory ring.
+
+    Input:
+    spec (str): The output.
+    size (tuple): Width and height of the frames.
+
+    Output:
+    sink (object): The output, None if the setting is not valid.
+    '''
+    kind, _, target = spec.partition(":")
+    if kind == "pipe":
+        return PipeSink(target, size)
+    if kind == "png":
+        return PngSequenceSink(target, size)
+    if kind == "shm":
+        return SharedMemoryRing(target, size)
+    print(f"Unknown stream output: {spec}")
+    return None
+
+
+# Sends the frames of a surface to an output at a fixed maximum rate.
+class FrameStreamer:
+        def __init__(self, surface, sink, fps=10):
+                '''
+                Description:
+                Captures the surface after it was drawn, at most fps times per
+                second. Frames where nothing was drawn are skipped, so an
+                idle scoreboard costs no capture at all. Changes closer than
+                a frame are sent together in the next frame.
+
+                Inputs:
+                surface (pygame.Surface): Surface to capture (the window).
+                sink (object): Output of the frames, see open_sink.
+                fps (float): Maximum frames per second.
+
+                Output:
+                A frame streamer class
+                '''
+                self.surface = surface
+                self.sink = sink
+                self.interval = 1000 / fps
+                self.fps = fps
+                self.frames = 0
+                self.skipped = 0
+                self.capture_seconds = 0.0
+                self.started = time.perf_counter()
+                self._changed = True
+                self._last_tick = None
+                self._skip_tick = -self.interval
+
+        # Called after each draw with the regions that changed.
+        def drawn(self, dirty_rects):
+                '''
+                Description:
+                Remembers if anything changed and sends a frame if the last
+                one is old enough.
+
+                Input:
+                dirty_rects (list): Regions redrawn, empty if none.
+
+                Output:
+                None
+                '''
+                if dirty_rects:
+                    self._changed = True
+                self.pump()
+
+        # Sends the pending frame if its time has come.
+        def pump(self):
+                now = pygame.time.get_ticks()
+                if not self._changed:
+                    # A frame time with nothing new to send, counted once.
+                    last = self._skip_tick if self._last_tick is None else max(self._skip_tick, self._last_tick)
+                    if now - last >= self.interval:
+                        self.skipped += 1
+                        self._skip_tick = now
+                    return
+                if self._last_tick is not None and now - self._last_tick < self.interval:
+                    return
+                begin = time.perf_counter()
+                data = _to_bytes(self.surface, "RGBA")
+                self.frames += 1
+                self.sink.write(data, self.frames, time.time())
+                self.capture_seconds += time.perf_counter() - begin
+                self._last_tick = now
+                self._changed = False
+
+        # Tick when a pending frame can be sent, None if there is none.
+        def deadline(self):
+                if not self._changed or self._last_tick is None:
+                    return None
+                return int(self._last_tick + self.interval) + 1
+
+        # Text report of the throughput.
+        def report(self):
+                '''
+                Description:
+                Frames sent, skipped (a frame was due but nothing was drawn,
+                at most one per frame interval) and dropped by a slow
+                output, and the cost of a frame.
+
+                Input:
+                None
+
+                Output:
+                report (str): The report to print.
+                '''
+                elapsed = time.perf_counter() - self.started
+                per_frame = self.capture_seconds / self.frames * 1000 if self.frames else 0
+                capacity = 1000 / per_frame if per_frame else 0
+                return (f"Stream: {self.frames} frames in {elapsed:.0f} s "
+                        f"({self.frames / elapsed if elapsed else 0:.1f} fps), "
+                        f"{self.skipped} unchanged skipped, {getattr(self.sink, 'dropped', 0)} dropped, "
+                        f"{per_frame:.1f} ms per frame (up to {capacity:.0f} fps)")
+
+        def close(self):
+                print(self.report())
+                self.sink.close()
@@ -0,0 +1,167 @@
+import bisect
+import json
+import time
+
+
+# Histogram with logarithmic buckets, from 10 microseconds to 100 seconds.
+class LatencyHistogram:
+        BOUNDS = [10 ** (exponent / 10) for exponent in range(-50, 21)]
+
+        def __init__(self):
+                '''
+                Description:
+                Counts latencies into fixed buckets (10 per decade), so it
+                uses the same memory after a minute or after a month.
+
+                Inputs:
+                None
+
+                Output:
+                A latency histogram class
+                '''
+                self.counts = [0] * (len(self.BOUNDS) + 1)
+                self.total = 0
+                self.max = 0.0
+
+        # Adds a latency.
+        def record(self, seconds):
+                self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+                self.total += 1
+                if seconds > self.max:
+                    self.max = seconds
+
+        # Latency under which the given fraction of the samples are.
+        def percentile(self, fraction):
+                '''
+                Description:
+                Returns the upper bound of the bucket holding the percentile,
+                never more than the largest latency seen.
+
+                Input:
+                fraction (float): 0.5 for p50, 0.99 for p99.
+
+                Output:
+                seconds (float): The latency, 0 if there are no samples.
+                '''
+                if not self.total:
+                    return 0.0
+                wanted = fraction * self.total
+                seen = 0
+                for i, count in enumerate(self.counts):
+                    seen += count
+                    if seen >= wanted:
+                        return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+                return self.max
+
+        # p50, p95 and p99 in milliseconds.
+        def summary(self):
+                return {
+                    "count": self.total,
+                    "p50_ms": round(self.percentile(0.50) * 1000, 3),
+                    "p95_ms": round(self.percentile(0.95) * 1000, 3),
+                    "p99_ms": round(self.percentile(0.99) * 1000, 3),
+                    "max_ms": round(self.max * 1000, 3),
+                }
+
+
+# Latency of the inputs from the serial read to the display update.
+class LatencyTracker:
+        SEGMENTS = ("read_to_post", "post_to_handled", "handled_to_flip", "read_to_flip")
+
+        def __init__(self):
+                '''
+                Description:
+                Each controller input is stamped when it is read from the
+                serial port, posted to pygame, handled by the main loop
+                (score_point done) and shown by pygame.display.update. The
+                time between stamps is kept in one histogram per segment.
+
+                Inputs:
+                None
+
+                Output:
+                A latency tracker class
+                '''
+                self.histograms = {segment: LatencyHistogram() for segment in self.SEGMENTS}
+                self._waiting = []
+
+        # An input was handled, it waits for the next display update.
+        def handled(self, event):
+                '''
+                Description:
+                Stamps an event from the serial reader once it is handled.
+                Keyboard events have no stamps and are ignored.
+
+                Input:
+                event (pygame.event.Event): The handled event.
+
+                Output:
+                None
+                '''
+                t_read = getattr(event, 't_read', None)
+                if t_read is not None:
+                    self._waiting.append((t_read, event.t_post, time.perf_counter()))
+
+        # The display was updated, every handled input is now on screen.
+        def flipped(self):
+                '''
+                Description:
+                Records the latencies of the inputs handled since the last
+                display update.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                if not self._waiting:
+                    return
+                t_flip = time.perf_counter()
+                for t_read, t_post, t_handled in self._waiting:
+                    self.histograms["read_to_post"].record(t_post - t_read)
+                    self.histograms["post_to_handled"].record(t_handled - t_post)
+                    self.histograms["handled_to_flip"].record(t_flip - t_handled)
+                    self.histograms["read_to_flip"].record(t_flip - t_read)
+                self._waiting.clear()
+
+        # Summary of every segment.
+        def summary(self):
+                return {segment: histogram.summary() for segment, histogram in self.histograms.items()}
+
+        # Lines of text for the debug overlay.
+        def summary_lines(self):
+                '''
+                Description:
+                One line per segment with its p50, p95 and p99.
+
+                Input:
+                None
+
+                Output:
+                lines (list): The lines to draw.
+                '''
+                lines = []
+                for segment, values in self.summary().items():
+                    lines.append(f"{segment}: n={values['count']} "
+                                 f"p50={values['p50_ms']}ms p95={values['p95_ms']}ms "
+                                 f"p99={values['p99_ms']}ms")
+                return lines
+
+        # Writes the summary to a file.
+        def dump(self, path):
+                '''
+                Description:
+                Appends the summary with a timestamp as a JSON line.
+
+                Input:
+                path (str): File of the latency log.
+
+                Output:
+                None
+                '''
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"time": time.time(), "latency": self.summary()}) + "\n")
+                except OSError as e:
+                    print(f"Could not write the latency log: {e}")
@@ -0,0 +1,228 @@
+import csv
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import requests
+
+
+# Indexes the license sheet by license key.
+def build_index(csv_text):
+    '''
+    Description:
+    Reads the CSV of the licenses once into a dict, so a key is found with
+    one lookup instead of scanning every row.
+
+    Input:
+    csv_text (str): The license sheet as CSV.
+
+    Output:
+    index (dict): License key -> row.
+    '''
+    index = {}
+    for row in csv.DictReader(csv_text.splitlines()):
+        key = row.get("License Key", "").strip()
+        if key:
+            index[key] = row
+    return index
+
+
+# Checks a row of the license sheet.
+def evaluate_row(row):
+    '''
+    Description:
+    Verifies the status and the expiration date of a license.
+
+    Input:
+    row (dict): Row of the license, None if the key was not found.
+
+    Output:
+    is_valid (bool): True if the license can be used.
+    message (str): Reason of the verdict.
+    expiration (str): Expiration date, "YYYY-MM-DD", None if unknown.
+    '''
+    if row is None:
+        return False, "❌ License key not found", None
+
+    status = row.get("Status", "").lower()
+    if status != "active":
+        return False, "❌ License is not active", None
+
+    expiration_str = row.get("Expiration Date", "").strip()
+    try:
+        exp_date = datetime.strptime(expiration_str, "%Y-%m-%d")
+    except ValueError:
+        return False, f"⚠️ Invalid date format: '{expiration_str}'", None
+
+    if exp_date < datetime.now():
+        return False, "❌ License expired", expiration_str
+
+    return True, "✅ License verified", expiration_str
+
+
+# License check that answers from a cached verdict and revalidates in the background.
+class LicenseChecker:
+        def __init__(self, url, cache_path, license_key, machine_id, grace_days=7, timeout=10):
+                '''
+                Description:
+                Keeps the last verdict of the server in a file with an HMAC
+                of the machine and the key. The HMAC is only an integrity
+                check (a damaged file, or one copied from another computer):
+                both are known on this computer, so it does not stop someone
+                from editing the file. While that verdict is younger than the
+                grace period and its expiration date has not passed, the
+                program starts at once and the sheet is checked again in the
+                background, asking the server only for changes (ETag /
+                If-Modified-Since).
+
+                Inputs:
+                url (str): CSV of the license sheet.
+                cache_path (str): File of the cached verdict.
+                license_key (str): License of this computer.
+                machine_id (str): Unique name of this computer.
+                grace_days (float): Days the program runs offline on a cached verdict.
+                timeout (float): Seconds before the request is abandoned.
+
+                Output:
+                A license checker class
+                '''
+                self.url = url
+                self.cache_path = cache_path
+                self.license_key = license_key.strip()
+                self.grace_seconds = grace_days * 24 * 3600
+                self.timeout = timeout
+                self._secret = hashlib.sha256(f"{machine_id}|{self.license_key}".encode()).digest()
+                self.index = {}
+                self.thread = None
+
+        # Signature of a cached verdict.
+        def _sign(self, cache):
+                payload = json.dumps(cache, sort_keys=True).encode("utf-8")
+                return hmac.new(self._secret, payload, hashlib.sha256).hexdigest()
+
+        # Reads the cached verdict, None if it is missing or damaged.
+        def load_cache(self):
+                '''
+                Description:
+                Loads the cached verdict and checks its HMAC.
+
+                Input:
+                None
+
+                Output:
+                cache (dict): The verdict with its validators, None if unusable.
+                '''
+                try:
+                    with open(self.cache_path, encoding="utf-8") as f:
+                        stored = json.load(f)
+                    cache = stored["cache"]
+                    if not hmac.compare_digest(stored["signature"], self._sign(cache)):
+                        return None
+                    return cache
+                except (OSError, ValueError, KeyError, TypeError):
+                    return None
+
+        # Writes the verdict with its HMAC. A cache that cannot be written
+        # (read-only or full disk) only costs a check on the next start.
+        def save_cache(self, cache):
+                tmp_path = self.cache_path + ".tmp"
+                try:
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump({"cache": cache, "signature": self._sign(cache)}, f)
+                    os.replace(tmp_path, self.cache_path)
+                except OSError as e:
+                    print(f"License cache not saved: {e}")
+
+        # Asks the server for the license sheet, only if it changed.
+        def revalidate(self):
+                '''
+                Description:
+                Downloads the sheet with a conditional GET. On a 304 answer
+                the sheet did not change, the cached verdict is kept but its
+                expiration date is checked again, since time has passed.
+
+                Input:
+                None
+
+                Output:
+                is_valid (bool): True if the license can be used.
+                message (str): Reason of the verdict.
+                '''
+                cache = self.load_cache() or {}
+                headers = {}
+                if cache.get("etag"):
+                    headers["If-None-Match"] = cache["etag"]
+                if cache.get("last_modified"):
+                    headers["If-Modified-Since"] = cache["last_modified"]
+
+                try:
+                    response = requests.get(self.url, timeout=self.timeout, headers=headers)
+                    if response.status_code == 304 and "valid" in cache:
+                        if cache["valid"]:
+                            is_valid, message, _ = evaluate_row({
+                                "Status": "active",
+                                "Expiration Date": cache.get("expiration") or "",
+                            })
+                            cache["valid"] = is_valid
+                            cache["message"] = message
+                        cache["checked_at"] = time.time()
+                        self.save_cache(cache)
+                        return cache["valid"], cache["message"]
+                    response.raise_for_status()  # throws error on bad request
+                except requests.exceptions.Timeout:
+                    return False, "⚠️ License check timed out"
+                except requests.exceptions.RequestException as e:
+                    return False, f"❌ Network error: {e}"
+
+                self.index = build_index(response.text)
+                is_valid, message, expiration = evaluate_row(self.index.get(self.license_key))
+                self.save_cache({
+                    "valid": is_valid,
+                    "message": message,
+                    "expiration": expiration,
+                    "checked_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                })
+                return is_valid, message
+
+        # Background revalidation.
+        def _revalidate_in_background(self):
+                try:
+                    is_valid, message = self.revalidate()
+                except Exception as e:
+                    print(f"License revalidation failed: {e}")
+                    return
+                if not is_valid:
+                    print(f"License revalidation: {message}")
+
+        # Verdict of the license, without waiting on the network if possible.
+        def check(self):
+                '''
+                Description:
+                Answers from the cache when it is recent enough and still
+                not expired, revalidating in a background thread. Without a
+                usable cache (first start, or offline longer than the grace
+                period) it waits for the server.
+
+                Input:
+                None
+
+                Output:
+                is_valid (bool): True if the license can be used.
+                message (str): Reason of the verdict.
+                '''
+                cache = self.load_cache()
+                if cache and cache.get("valid") and time.time() - cache.get("checked_at", 0) < self.grace_seconds:
+                    is_valid, message, _ = evaluate_row({
+                        "Status": "active",
+                        "Expiration Date": cache.get("expiration") or "",
+                    })
+                    if is_valid:
+                        self.thread = threading.Thread(target=self._revalidate_in_background, daemon=True)
+                        self.thread.start()
+                        return True, "✅ License verified (cached)"
+                return self.revalidate()
@@ -0,0 +1,370 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+import latency_lanh as lat
+
+
+# Key of the WebSocket handshake (RFC 6455).
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Opcodes of the WebSocket frames used here.
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+# Builds a WebSocket frame, masked when sent by a client.
+def websocket_frame(payload, opcode=OP_TEXT, mask=False):
+    '''
+    Description:
+    Packs a payload in a single final frame.
+
+    Input:
+    payload (bytes): Data of the frame.
+    opcode (int): OP_TEXT, OP_CLOSE, OP_PING or OP_PONG.
+    mask (bool): True for client frames.
+
+    Output:
+    frame (bytes): The frame.
+    '''
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length | (0x80 if mask else 0))
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126 | (0x80 if mask else 0), length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127 | (0x80 if mask else 0), length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+
+
+# Reads one WebSocket frame from a stream.
+async def read_frame(reader):
+    '''
+    Description:
+    Reads a frame and removes the mask of client frames.
+
+    Input:
+    reader (asyncio.StreamReader): The connection.
+
+    Output:
+    opcode (int): Opcode of the frame.
+    payload (bytes): Data of the frame.
+    '''
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key:
+        payload = bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+    return first & 0x0F, payload
+
+
+# Score of the courts served over HTTP and pushed over WebSocket.
+class LiveScoreServer:
+        def __init__(self, host="0.0.0.0", port=8765, max_buffer=65536):
+                '''
+                Description:
+                Runs an asyncio server in its own thread, away from the
+                render loop. GET /score answers the score of every court as
+                JSON. GET /live opens a WebSocket that gets the full score
+                first and then only what changed, e.g.
+                {"court": 0, "v": 12, "points": [30, 15], "t": ...}.
+                Each change is encoded once and written to every subscriber
+                without a task per subscriber. A subscriber too slow to
+                empty its buffer skips the changes and gets the full score
+                again once it caught up.
+
+                Inputs:
+                host (str): Address to listen on.
+                port (int): Port to listen on.
+                max_buffer (int): Bytes waiting for a subscriber before it
+                                  is considered too slow.
+
+                Output:
+                A live score server class
+                '''
+                self.host = host
+                self.port = port
+                self.max_buffer = max_buffer
+                self.courts = {}
+                self.versions = {}
+                self.published = 0
+                self.resyncs = 0
+                self.loop = None
+                self._subscribers = set()
+                self._stale = set()
+                self._lock = threading.Lock()
+                self._ready = threading.Event()
+
+        # Starts the server thread.
+        def start(self):
+                thread = threading.Thread(target=self._run, daemon=True)
+                thread.start()
+                self._ready.wait(5)
+                return thread
+
+        def _run(self):
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                try:
+                    server = loop.run_until_complete(
+                                asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+                except OSError as e:
+                    print(f"Live score server not started: {e}")
+                    loop.close()
+                    self._ready.set()
+                    return
+                self.port = server.sockets[0].getsockname()[1]
+                print(f"Live score on http://{self.host}:{self.port}/score")
+                # publish() only sends once the server is listening.
+                self.loop = loop
+                self._ready.set()
+                loop.run_forever()
+
+        # Called from the render loop with the current score of a court.
+        def publish(self, court, state):
+                '''
+                Description:
+                Compares the state with the last one of the court and sends
+                only the keys that changed. Costs a dict comparison when
+                nothing changed, the sending happens in the server thread.
+
+                Inputs:
+                court (int): Number of the court, from 0.
+                state (dict): Score of the court, e.g. points, games, sets,
+                              timer and winner.
+
+                Output:
+                None
+                '''
+                last = self.courts.get(court, {})
+                delta = {key: value for key, value in state.items() if last.get(key) != value}
+                if not delta or self.loop is None:
+                    return
+                # The server thread reads both in snapshot().
+                with self._lock:
+                    self.courts[court] = dict(state)
+                    self.versions[court] = version = self.versions.get(court, 0) + 1
+                delta["court"] = court
+                delta["v"] = version
+                delta["t"] = time.time()
+                self.published += 1
+                self.loop.call_soon_threadsafe(self._broadcast, delta)
+
+        # Full score of every court.
+        def snapshot(self):
+                with self._lock:
+                    courts = {str(court): dict(state, v=self.versions[court]) for court, state in self.courts.items()}
+                return {"courts": courts, "t": time.time()}
+
+        # Sends a change to every subscriber (server thread).
+        def _broadcast(self, delta):
+                frame = websocket_frame(json.dumps(delta, separators=(",", ":")).encode("utf-8"))
+                snapshot_frame = None
+                for writer in self._subscribers:
+                    if writer.transport.get_write_buffer_size() > self.max_buffer:
+                        self._stale.add(writer)
+                    elif writer in self._stale:
+                        # It caught up, the full score replaces the missed changes.
+                        if snapshot_frame is None:
+                            snapshot_frame = self._snapshot_frame()
+                        writer.write(snapshot_frame)
+                        self._stale.discard(writer)
+                        self.resyncs += 1
+                    else:
+                        writer.write(frame)
+
+        def _snapshot_frame(self):
+                return websocket_frame(json.dumps(self.snapshot(), separators=(",", ":")).encode("utf-8"))
+
+        # Reads the request of a connection.
+        async def _handle(self, reader, writer):
+                try:
+                    request = await reader.readuntil(b"\r\n\r\n")
+                    lines = request.decode("latin-1").split("\r\n")
+                    method, path, _ = (lines[0].split(" ") + ["", ""])[:3]
+                    headers = {}
+                    for line in lines[1:]:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                    if method == "GET" and path == "/live" and headers.get("upgrade", "").lower() == "websocket":
+                        key = headers.get("sec-websocket-key")
+                        if key:
+                            await self._websocket(reader, writer, key)
+                        else:
+                            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                            await writer.drain()
+                    elif method == "GET" and path == "/score":
+                        body = json.dumps(self.snapshot()).encode("utf-8")
+                        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                                     b"Access-Control-Allow-Origin: *\r\n"
+                                     b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+                        await writer.drain()
+                    else:
+                        writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                        await writer.drain()
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    pass
+                finally:
+                    writer.close()
+
+        # Pushes the changes to a WebSocket subscriber.
+        async def _websocket(self, reader, writer, key):
+                accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest())
+                writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                             b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+                writer.write(self._snapshot_frame())
+                self._subscribers.add(writer)
+
+                # The changes are written by _broadcast. Here it only answers
+                # pings and stops on close, the client sends nothing else.
+                try:
+                    while True:
+                        opcode, payload = await read_frame(reader)
+                        if opcode == OP_CLOSE:
+                            writer.write(websocket_frame(b"", OP_CLOSE))
+                            break
+                        if opcode == OP_PING:
+                            writer.write(websocket_frame(payload, OP_PONG))
+                finally:
+                    self._subscribers.discard(writer)
+                    self._stale.discard(writer)
+
+        # Number of WebSocket subscribers.
+        def subscribers(self):
+                return len(self._subscribers)
+
+
+# Opens a WebSocket as a client, used by the load test.
+async def open_websocket(host, port, path="/live"):
+    '''
+    Description:
+    Connects and does the WebSocket handshake.
+
+    Input:
+    host (str): Address of the server.
+    port (int): Port of the server.
+    path (str): Path of the WebSocket.
+
+    Output:
+    reader, writer: The streams of the connection.
+    '''
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  f"Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    response = await reader.readuntil(b"\r\n\r\n")
+    if not response.startswith(b"HTTP/1.1 101"):
+        raise ConnectionError(response.split(b"\r\n")[0].decode(errors="ignore"))
+    return reader, writer
+
+
+# Local load test: many subscribers and a fast publisher.
+def load_test(subscribers=500, courts=4, rate=50, duration=10):
+    '''
+    Description:
+    Starts a server on a free local port, connects the subscribers and
+    publishes random score changes. Reports the changes delivered and
+    the delay from publish to receive.
+
+    Input:
+    subscribers (int): WebSocket clients.
+    courts (int): Courts publishing.
+    rate (float): Changes per second, all courts together.
+    duration (float): Seconds of the test.
+
+    Output:
+    results (dict): Published, delivered, resyncs and the delay summary.
+    '''
+    server = LiveScoreServer("127.0.0.1", 0)
+    server.start()
+    delays = lat.LatencyHistogram()
+    received = [0]
+
+    async def subscriber(ready):
+        reader, writer = await open_websocket("127.0.0.1", server.port)
+        ready.release()
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == OP_CLOSE:
+                    return
+                message = json.loads(payload)
+                if "court" in message:
+                    received[0] += 1
+                    delays.record(time.time() - message["t"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def clients(ready, stop):
+        stop.append(asyncio.Event())
+        tasks = [asyncio.ensure_future(subscriber(ready)) for _ in range(subscribers)]
+        await stop[0].wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # The subscribers run in their own loop, like other processes would.
+    client_loop = asyncio.new_event_loop()
+    ready = threading.Semaphore(0)
+    stop = []
+
+    def run_clients():
+        asyncio.set_event_loop(client_loop)
+        client_loop.run_until_complete(clients(ready, stop))
+
+    client_thread = threading.Thread(target=run_clients, daemon=True)
+    client_thread.start()
+    for _ in range(subscribers):
+        ready.acquire()
+
+    # Publishes like the render loop would.
+    scores = {court: {"points": [0, 0], "games": [0, 0], "sets": [0, 0], "timer": "00:00", "winner": None}
+              for court in range(courts)}
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        court = random.randrange(courts)
+        state = scores[court]
+        side = random.randrange(2)
+        points = list(state["points"])
+        points[side] = (points[side] + 15) % 60
+        state["points"] = points
+        server.publish(court, state)
+        time.sleep(1 / rate)
+    time.sleep(0.5)
+    client_loop.call_soon_threadsafe(stop[0].set)
+    client_thread.join(5)
+
+    return {
+        "subscribers": subscribers,
+        "published": server.published,
+        "delivered": received[0],
+        "expected": server.published * subscribers,
+        "resyncs": server.resyncs,
+        "delay": delays.summary(),
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    clients_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    results = load_test(subscribers=clients_count)
+    print(json.dumps(results, indent=1))
@@ -0,0 +1,206 @@
+import os
+import queue
+import struct
+import threading
+import time
+import match_state_lanh as msl
+
+
+# Kinds of events in the journal.
+START = 1
+POINT = 2
+SWITCH = 3
+RESET = 4
+
+# Each record is the kind, an argument (the side for points) and the time.
+RECORD = struct.Struct("<BBd")
+
+
+# Append-only log of the match events, written by a background thread.
+class MatchJournal:
+        def __init__(self, path, fsync_interval=0.5, listener=None):
+                '''
+                Description:
+                Records every start, point, switch sides and reset of the
+                match. append() only puts the event in a queue, the writer
+                thread writes it and calls fsync at most once per interval,
+                so a frame never waits on the disk. A record cut by a crash
+                at the end of the file is removed before appending, so the
+                new records stay aligned.
+
+                Inputs:
+                path (str): File of the journal.
+                fsync_interval (float): Seconds between fsync calls.
+                listener (function): Also gets every event, (kind, arg, time),
+                                     e.g. MatchStore.journal_listener.
+
+                Output:
+                A match journal class
+                '''
+                self.path = path
+                self.fsync_interval = fsync_interval
+                self.listener = listener
+                self._queue = queue.SimpleQueue()
+                self._file = open(path, "ab")
+                size = self._file.tell()
+                if size % RECORD.size:
+                    self._file.truncate(size - size % RECORD.size)
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+
+        # Adds an event to the journal without blocking.
+        def append(self, kind, arg=0):
+                '''
+                Description:
+                Queues an event for the writer thread.
+
+                Inputs:
+                kind (int): START, POINT, SWITCH or RESET.
+                arg (int): Side that won the point, 0 otherwise.
+
+                Output:
+                None
+                '''
+                event = (kind, arg, time.time())
+                self._queue.put(event)
+                if self.listener:
+                    self.listener(*event)
+
+        def start(self):
+                self.append(START)
+
+        def point(self, side):
+                self.append(POINT, side)
+
+        def switch(self):
+                self.append(SWITCH)
+
+        # The match is over, the journal starts again.
+        def reset(self, swapped=False):
+                '''
+                Description:
+                Queues a reset. The writer empties the file, keeping only
+                whether the sides are swapped, so it never grows past a match.
+
+                Input:
+                swapped (bool): True if the teams are on switched sides.
+
+                Output:
+                None
+                '''
+                self.append(RESET, int(swapped))
+
+        # Writes what is left and stops the writer.
+        def close(self):
+                '''
+                Description:
+                Flushes the pending events to disk and closes the file.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                self._queue.put(None)
+                self._thread.join()
+
+        # Writer thread, batches the writes and the fsync calls.
+        def _writer(self):
+                running = True
+                while running:
+                    # Sleeps until there is something to write.
+                    events = [self._queue.get()]
+                    deadline = time.monotonic() + self.fsync_interval
+
+                    # Collects everything that arrives before the next fsync.
+                    while events[-1] is not None:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        try:
+                            events.append(self._queue.get(timeout=timeout))
+                        except queue.Empty:
+                            break
+
+                    for event in events:
+                        if event is None:
+                            running = False
+                            break
+                        kind, arg, stamp = event
+                        if kind == RESET:
+                            self._file.truncate(0)
+                            if arg:
+                                self._file.write(RECORD.pack(SWITCH, 0, stamp))
+                        else:
+                            self._file.write(RECORD.pack(kind, arg, stamp))
+
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                self._file.close()
+
+
+# Reads the events of the journal.
+def read_events(path):
+    '''
+    Description:
+    Reads every complete record of the journal. A record cut by a crash at
+    the end of the file is ignored.
+
+    Input:
+    path (str): File of the journal.
+
+    Output:
+    events (list): (kind, arg, time) tuples in order.
+    '''
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % RECORD.size
+    return list(RECORD.iter_unpack(data[:usable]))
+
+
+# True if a record read back is an event the journal writes.
+def valid_event(kind, arg):
+    return kind in (START, POINT, SWITCH, RESET) and (kind != POINT or arg in (0, 1))
+
+
+# Rebuilds the match in progress from the journal.
+def recover(path, point=msl.point):
+    '''
+    Description:
+    Replays the journal to get back the match that was being played when
+    the program stopped. Records that are not valid events are skipped.
+
+    Input:
+    path (str): File of the journal.
+    point (function): Scores a point, (state, side), e.g. the compiled
+                      rules of the match.
+
+    Output:
+    state (MatchState): Score of the match.
+    started_at (float): Time the match started, None if it did not start.
+    swapped (bool): True if the teams are on switched sides.
+    '''
+    state = msl.MatchState()
+    started_at = None
+    swapped = False
+    for kind, arg, stamp in read_events(path):
+        if not valid_event(kind, arg):
+            continue
+        if kind == START:
+            started_at = stamp
+        elif kind == POINT:
+            state = point(state, arg)
+            if state.winner is not None:
+                state = msl.MatchState()
+                started_at = None
+        elif kind == SWITCH:
+            swapped = not swapped
+        elif kind == RESET:
+            state = msl.MatchState()
+            started_at = None
+            swapped = bool(arg)
+    return state, started_at, swapped
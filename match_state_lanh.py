@@ -0,0 +1,257 @@
+import time
+
+
+# Points shown on screen for 0, 1, 2 and 3 points won in a game.
+POINT_STEPS = (0, 15, 30, 40)
+
+# Rules of the match.
+GAMES_PER_SET = 6
+TIEBREAK_POINTS = 7
+SETS_TO_WIN = 2
+
+
+# Score of a match, independent of pygame and the sprites.
+class MatchState:
+        __slots__ = ("points", "games", "sets", "tiebreak", "winner", "_hash")
+
+        def __init__(self, points=(0, 0), games=(0, 0), sets=(0, 0), tiebreak=False, winner=None):
+                '''
+                Description:
+                The state of a match. It is never modified, every transition
+                returns a new state.
+
+                Inputs:
+                points (tuple): Points won in the current game (or tiebreak) per side.
+                games (tuple): Games won in the current set per side.
+                sets (tuple): Sets won per side.
+                tiebreak (bool): True while the set is decided by a tiebreak.
+                winner (int): Side (0 or 1) that won the match, None while playing.
+
+                The hash is computed once, the transition tables of
+                scoring_rules_lanh look the states up by value.
+
+                Output:
+                A match state class
+                '''
+                self.points = points
+                self.games = games
+                self.sets = sets
+                self.tiebreak = tiebreak
+                self.winner = winner
+                self._hash = hash((points, games, sets, tiebreak, winner))
+
+        def __eq__(self, other):
+                return (isinstance(other, MatchState)
+                        and self.points == other.points
+                        and self.games == other.games
+                        and self.sets == other.sets
+                        and self.tiebreak == other.tiebreak
+                        and self.winner == other.winner)
+
+        def __hash__(self):
+                return self._hash
+
+        def __repr__(self):
+                return (f"MatchState(points={self.points}, games={self.games}, "
+                        f"sets={self.sets}, tiebreak={self.tiebreak}, winner={self.winner})")
+
+        # Points as they are shown on the scoreboard.
+        def display_points(self, side):
+                '''
+                Description:
+                Converts the points won into 0, 15, 30, 40 or 'AD'. During a
+                tiebreak the points are shown as they are.
+
+                Input:
+                side (int): 0 or 1.
+
+                Output:
+                points (int or str): The points to display.
+                '''
+                points = self.points[side]
+                if self.tiebreak:
+                    return points
+                if points > 3:
+                    return 'AD'
+                return POINT_STEPS[points]
+
+        # Score in the "set-games-points" format used by the export.
+        def score(self, side):
+                '''
+                Description:
+                Formats the score of one side for the exported results.
+
+                Input:
+                side (int): 0 or 1.
+
+                Output:
+                score (str): "set-games-points".
+                '''
+                return f"{self.sets[side]}-{self.games[side]}-{self.display_points(side)}"
+
+
+# Adds one to the value of the given side.
+def _add_one(pair, side):
+    if side == 0:
+        return (pair[0] + 1, pair[1])
+    return (pair[0], pair[1] + 1)
+
+
+# A point is won by a side.
+def point(state, side):
+    '''
+    Description:
+    Scores a point with the advantage rule: at 40-40 the next point gives
+    'AD' and losing the advantage goes back to 40-40.
+
+    Input:
+    state (MatchState): Current state.
+    side (int): Side that won the point, 0 or 1.
+
+    Output:
+    state (MatchState): The new state.
+    '''
+    if state.winner is not None:
+        return state
+    if state.tiebreak:
+        return tiebreak_point(state, side)
+
+    points = state.points[side]
+    opponent = state.points[1 - side]
+
+    # Opponent had advantage, back to deuce.
+    if opponent == 4:
+        return MatchState((3, 3), state.games, state.sets)
+
+    # 40 without deuce, or advantage: the game is won.
+    if points == 4 or (points == 3 and opponent < 3):
+        return game(state, side)
+
+    return MatchState(_add_one(state.points, side), state.games, state.sets)
+
+
+# A game is won by a side.
+def game(state, side):
+    '''
+    Description:
+    Adds a game. The set is won with 6 games and 2 of difference (or 7-5),
+    and at 6-6 the set goes to a tiebreak.
+
+    Input:
+    state (MatchState): Current state.
+    side (int): Side that won the game, 0 or 1.
+
+    Output:
+    state (MatchState): The new state.
+    '''
+    games = _add_one(state.games, side)
+    won = games[side]
+    lost = games[1 - side]
+
+    if won >= GAMES_PER_SET and won - lost >= 2:
+        return set_won(state, side)
+    if won == GAMES_PER_SET and lost == GAMES_PER_SET:
+        return MatchState((0, 0), games, state.sets, tiebreak=True)
+    return MatchState((0, 0), games, state.sets)
+
+
+# A point is won during the tiebreak.
+def tiebreak_point(state, side):
+    '''
+    Description:
+    Scores a tiebreak point. The tiebreak is won with 7 points and 2 of
+    difference, which also wins the set.
+
+    Input:
+    state (MatchState): Current state, in a tiebreak.
+    side (int): Side that won the point, 0 or 1.
+
+    Output:
+    state (MatchState): The new state.
+    '''
+    points = _add_one(state.points, side)
+    if points[side] >= TIEBREAK_POINTS and points[side] - points[1 - side] >= 2:
+        return set_won(state, side)
+    return MatchState(points, state.games, state.sets, tiebreak=True)
+
+
+# A set is won by a side.
+def set_won(state, side):
+    '''
+    Description:
+    Adds a set and resets the games. Winning SETS_TO_WIN sets wins the match.
+
+    Input:
+    state (MatchState): Current state.
+    side (int): Side that won the set, 0 or 1.
+
+    Output:
+    state (MatchState): The new state.
+    '''
+    sets = _add_one(state.sets, side)
+    if sets[side] >= SETS_TO_WIN:
+        return match_won(MatchState((0, 0), (0, 0), sets), side)
+    return MatchState((0, 0), (0, 0), sets)
+
+
+# The match is won by a side.
+def match_won(state, side):
+    '''
+    Description:
+    Marks the winner of the match. A finished match ignores new points.
+
+    Input:
+    state (MatchState): Current state.
+    side (int): Side that won the match, 0 or 1.
+
+    Output:
+    state (MatchState): The new state.
+    '''
+    return MatchState(state.points, state.games, state.sets, state.tiebreak, side)
+
+
+# Replays a list of points from a state.
+def replay(sides, state=None):
+    '''
+    Description:
+    Applies every point in order, starting a new match when one is won.
+    Used to validate and benchmark the scoring without a display.
+
+    Input:
+    sides (iterable): Side (0 or 1) that won each point.
+    state (MatchState): State to start from, a new match if None.
+
+    Output:
+    state (MatchState): The state after the last point.
+    '''
+    if state is None:
+        state = MatchState()
+    for side in sides:
+        state = point(state, side)
+        if state.winner is not None:
+            state = MatchState()
+    return state
+
+
+# Measures how many points per second can be replayed.
+def benchmark(total_points=1_000_000, seed=1):
+    '''
+    Description:
+    Replays random points headlessly and measures the speed.
+
+    Input:
+    total_points (int): Amount of points to replay.
+    seed (int): Seed of the random points.
+
+    Output:
+    points_per_second (float): Points scored per second.
+    '''
+    import random
+    sides = random.Random(seed).choices((0, 1), k=total_points)
+    start = time.perf_counter()
+    replay(sides)
+    return total_points / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    print(f"{benchmark():,.0f} points per second")
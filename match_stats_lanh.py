@@ -0,0 +1,464 @@
+import queue
+import struct
+import threading
+import time
+import match_state_lanh as msl
+import match_journal_lanh as mjl
+
+
+# Columns of a match in the archive: name, struct code and count (one per
+# side when 2). The same layout is read by NumPy as a structured array.
+ARCHIVE_FIELDS = (
+    ("start", "d", 1),
+    ("duration", "f", 1),
+    ("court", "B", 1),
+    ("winner", "b", 1),
+    ("points_won", "H", 2),
+    ("service_points", "H", 2),
+    ("service_won", "H", 2),
+    ("break_points", "H", 2),
+    ("breaks", "H", 2),
+    ("games_won", "H", 2),
+    ("sets", "B", 2),
+    ("longest_streak", "H", 2),
+    ("games_played", "H", 1),
+    ("game_seconds", "f", 1),
+    ("longest_game", "f", 1),
+)
+ARCHIVE_RECORD = struct.Struct("<" + "".join(f"{count}{code}" for _, code, count in ARCHIVE_FIELDS))
+
+
+# True if the next point of the side wins the game (or the tiebreak).
+def wins_game(state, side, point=msl.point):
+    after = point(state, side)
+    return after.games != state.games or after.sets != state.sets or after.winner is not None
+
+
+# Running statistics of a match, updated on every point.
+class MatchStats:
+        def __init__(self, first_server=0, started_at=None, point=msl.point):
+                '''
+                Description:
+                Counts the points won, the points on serve, the break points
+                and breaks, the streaks and the length of the games. Each
+                point updates a few counters, nothing is replayed. The
+                scoreboard does not know who serves, so the serve follows
+                the rotation from the side that served the first game: one
+                game each, and in a tiebreak one point and then two each.
+
+                Inputs:
+                first_server (int): Side (0 or 1) that served the first game.
+                started_at (float): time.time() of the start, the first point if None.
+                point (function): Scores a point with the rules of the match.
+
+                Output:
+                A match stats class
+                '''
+                self.first_server = first_server
+                self.started_at = started_at
+                self.score_point = point
+                self.points_won = [0, 0]
+                self.service_points = [0, 0]
+                self.service_won = [0, 0]
+                self.break_points = [0, 0]
+                self.breaks = [0, 0]
+                self.games_won = [0, 0]
+                self.longest_streak = [0, 0]
+                self.streak_side = None
+                self.streak = 0
+                self.games_played = 0
+                self.game_points = 0
+                self.game_start = started_at
+                self.game_seconds = 0.0
+                self.longest_game = 0.0
+                self.last_point = started_at
+                self._summary = None
+
+        # Side serving the next point.
+        def server(self, state):
+                '''
+                Description:
+                Serve of the next point from the games played, and from the
+                points played when the game is a tiebreak.
+
+                Input:
+                state (MatchState): State before the point.
+
+                Output:
+                side (int): 0 or 1.
+                '''
+                game_server = (self.first_server + self.games_played) % 2
+                if state.tiebreak and (self.game_points + 1) // 2 % 2:
+                    return 1 - game_server
+                return game_server
+
+        # A point was scored.
+        def point(self, before, after, side, stamp=None):
+                '''
+                Description:
+                Updates the counters with one point.
+
+                Input:
+                before (MatchState): State before the point.
+                after (MatchState): State after the point.
+                side (int): Side that won the point, 0 or 1.
+                stamp (float): time.time() of the point, now if None.
+
+                Output:
+                None
+                '''
+                if stamp is None:
+                    stamp = time.time()
+                if self.started_at is None:
+                    self.started_at = stamp
+                if self.game_start is None:
+                    self.game_start = stamp
+
+                server = self.server(before)
+                receiver = 1 - server
+                game_over = after.games != before.games or after.sets != before.sets or after.winner is not None
+
+                # A break point is a point the receiver can win the game with.
+                if not before.tiebreak:
+                    if side == receiver:
+                        break_point = game_over
+                    else:
+                        break_point = wins_game(before, receiver, self.score_point)
+                    if break_point:
+                        self.break_points[receiver] += 1
+                        if side == receiver:
+                            self.breaks[receiver] += 1
+
+                self.points_won[side] += 1
+                self.service_points[server] += 1
+                if side == server:
+                    self.service_won[server] += 1
+
+                # Points won in a row.
+                if side == self.streak_side:
+                    self.streak += 1
+                else:
+                    self.streak_side = side
+                    self.streak = 1
+                if self.streak > self.longest_streak[side]:
+                    self.longest_streak[side] = self.streak
+
+                self.game_points += 1
+                if game_over:
+                    seconds = stamp - self.game_start
+                    self.games_won[side] += 1
+                    self.games_played += 1
+                    self.game_seconds += seconds
+                    self.longest_game = max(self.longest_game, seconds)
+                    self.game_start = stamp
+                    self.game_points = 0
+                self.last_point = stamp
+                self._summary = None
+
+        # The statistics as a dict, e.g. for the live score or the export.
+        def summary(self):
+                '''
+                Description:
+                Builds the dict once per point, the same dict is returned
+                until the next point.
+
+                Input:
+                None
+
+                Output:
+                summary (dict): Counters per side and game lengths.
+                '''
+                if self._summary is None:
+                    self._summary = {
+                        "points_won": list(self.points_won),
+                        "service_won": [f"{self.service_won[side]}/{self.service_points[side]}" for side in (0, 1)],
+                        "breaks": [f"{self.breaks[side]}/{self.break_points[side]}" for side in (0, 1)],
+                        "longest_streak": list(self.longest_streak),
+                        "streak": [self.streak_side, self.streak],
+                        "games_played": self.games_played,
+                        "mean_game_seconds": round(self.game_seconds / self.games_played) if self.games_played else 0,
+                        "longest_game_seconds": round(self.longest_game),
+                    }
+                return self._summary
+
+        # The match as an archive record.
+        def archive_record(self, state, court=0, ended=None):
+                '''
+                Description:
+                Packs the statistics and the final score into a fixed size
+                record of the archive.
+
+                Input:
+                state (MatchState): Final state of the match.
+                court (int): Number of the court, from 0.
+                ended (float): time.time() of the end, the last point if None.
+
+                Output:
+                record (bytes): The packed record.
+                '''
+                start = self.started_at or 0.0
+                end = ended if ended is not None else (self.last_point or start)
+                return ARCHIVE_RECORD.pack(
+                            start,
+                            end - start,
+                            court,
+                            -1 if state.winner is None else state.winner,
+                            *self.points_won,
+                            *self.service_points,
+                            *self.service_won,
+                            *self.break_points,
+                            *self.breaks,
+                            *self.games_won,
+                            *state.sets,
+                            *self.longest_streak,
+                            self.games_played,
+                            self.game_seconds,
+                            self.longest_game
+                            )
+
+
+# Rebuilds the statistics of the match in progress from its journal.
+def replay_journal(path, first_server=0, point=msl.point):
+    '''
+    Description:
+    Replays the events of the journal like mjl.recover, with the time of
+    each point, so the statistics survive a restart.
+
+    Input:
+    path (str): File of the journal.
+    first_server (int): Side that served the first game.
+    point (function): Scores a point with the rules of the match.
+
+    Output:
+    stats (MatchStats): Statistics of the match.
+    '''
+    state = msl.MatchState()
+    stats = MatchStats(first_server, point=point)
+    for kind, arg, stamp in mjl.read_events(path):
+        if not mjl.valid_event(kind, arg):
+            continue
+        if kind == mjl.START:
+            stats = MatchStats(first_server, stamp, point)
+        elif kind == mjl.POINT:
+            after = point(state, arg)
+            stats.point(state, after, arg, stamp)
+            state = after
+            if state.winner is not None:
+                state = msl.MatchState()
+                stats = MatchStats(first_server, point=point)
+        elif kind == mjl.RESET:
+            state = msl.MatchState()
+            stats = MatchStats(first_server, point=point)
+    return stats
+
+
+# Appends a finished match to the archive.
+def append_archive(path, record):
+    '''
+    Description:
+    A single small append at the end of a match.
+
+    Input:
+    path (str): File of the archive.
+    record (bytes): Record from MatchStats.archive_record.
+
+    Output:
+    None
+    '''
+    try:
+        with open(path, "ab") as f:
+            f.write(record)
+    except OSError as e:
+        print(f"Could not archive the match: {e}")
+
+
+# Appends the finished matches to the archive from a background thread.
+class ArchiveWriter:
+        def __init__(self, path):
+                '''
+                Description:
+                append() only queues the record, the thread appends it to
+                the archive, so the end of a match never waits on the disk.
+
+                Inputs:
+                path (str): File of the archive.
+
+                Output:
+                An archive writer class
+                '''
+                self.path = path
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+
+        # Queues a record from MatchStats.archive_record.
+        def append(self, record):
+                self._queue.put(record)
+
+        # Writes what is left and stops the thread.
+        def close(self):
+                self._queue.put(None)
+                self._thread.join()
+
+        def _writer(self):
+                while True:
+                    record = self._queue.get()
+                    if record is None:
+                        return
+                    append_archive(self.path, record)
+
+
+# NumPy type of an archive record.
+def archive_dtype():
+    import numpy as np
+    dtype = np.dtype([(name, "<" + code) if count == 1 else (name, "<" + code, (count,))
+                      for name, code, count in ARCHIVE_FIELDS])
+    assert dtype.itemsize == ARCHIVE_RECORD.size
+    return dtype
+
+
+# Loads the archive into NumPy arrays.
+def load_archive(path):
+    '''
+    Description:
+    Reads every complete record in one go as a structured array, one
+    column per field (archive["duration"], archive["points_won"][:, 0]).
+    A record cut by a crash at the end of the file is ignored.
+
+    Input:
+    path (str): File of the archive.
+
+    Output:
+    archive (numpy.ndarray): One row per match.
+    '''
+    import numpy as np
+    dtype = archive_dtype()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return np.zeros(0, dtype)
+    usable = len(data) - len(data) % dtype.itemsize
+    return np.frombuffer(data[:usable], dtype)
+
+
+# Totals of the matches grouped by a key, without a Python loop.
+def _grouped(archive, keys, size):
+    import numpy as np
+    matches = np.bincount(keys, minlength=size)
+    count = np.maximum(matches, 1)
+    points = archive["points_won"].sum(axis=1)
+    break_points = archive["break_points"].sum(axis=1)
+    breaks = archive["breaks"].sum(axis=1)
+    games = archive["games_played"]
+    total_break_points = np.bincount(keys, break_points, size)
+    longest_streak = np.zeros(size, np.int64)
+    np.maximum.at(longest_streak, keys, archive["longest_streak"].max(axis=1))
+    return {
+        "matches": matches,
+        "finished": np.bincount(keys, archive["winner"] >= 0, size).astype(int),
+        "mean_minutes": np.bincount(keys, archive["duration"], size) / count / 60,
+        "mean_points": np.bincount(keys, points, size) / count,
+        "break_conversion": np.bincount(keys, breaks, size) / np.maximum(total_break_points, 1),
+        "mean_game_seconds": np.bincount(keys, archive["game_seconds"], size) / np.maximum(np.bincount(keys, games, size), 1),
+        "longest_streak": longest_streak,
+    }
+
+
+# Statistics of each court.
+def per_court(archive):
+    '''
+    Description:
+    Matches, finished matches, mean length, mean points, break point
+    conversion, mean game length and longest streak of each court.
+
+    Input:
+    archive (numpy.ndarray): From load_archive.
+
+    Output:
+    stats (dict): Name -> array indexed by the court number.
+    '''
+    size = int(archive["court"].max()) + 1 if len(archive) else 1
+    return _grouped(archive, archive["court"].astype(int), size)
+
+
+# Statistics of each hour of the day the matches started.
+def per_hour(archive, utc_offset=None):
+    '''
+    Description:
+    Same values as per_court, grouped by the local hour the match started.
+    The offset of today is used for every match, a match played across a
+    daylight saving change counts one hour off.
+
+    Input:
+    archive (numpy.ndarray): From load_archive.
+    utc_offset (int): Seconds from UTC, the local offset if None.
+
+    Output:
+    stats (dict): Name -> array of 24 values, index 0 is midnight.
+    '''
+    import numpy as np
+    if utc_offset is None:
+        utc_offset = time.localtime().tm_gmtoff
+    hours = ((archive["start"] + utc_offset) // 3600 % 24).astype(np.int64)
+    return _grouped(archive, hours, 24)
+
+
+# Writes random matches to an archive, for the benchmark.
+def synthetic_archive(path, matches=5000, courts=4, seed=1):
+    '''
+    Description:
+    Plays random matches point by point through MatchStats, with random
+    times over the last 90 days.
+
+    Input:
+    path (str): File of the archive, replaced.
+    matches (int): Matches to write.
+    courts (int): Courts the matches are spread on.
+    seed (int): Seed of the random matches.
+
+    Output:
+    None
+    '''
+    import random
+    generator = random.Random(seed)
+    records = []
+    now = time.time()
+    for _ in range(matches):
+        stamp = now - generator.uniform(0, 90 * 86400)
+        stats = MatchStats(generator.randrange(2), stamp)
+        state = msl.MatchState()
+        bias = generator.uniform(0.4, 0.6)
+        while state.winner is None:
+            stamp += generator.uniform(15, 50)
+            side = 0 if generator.random() < bias else 1
+            after = msl.point(state, side)
+            stats.point(state, after, side, stamp)
+            state = after
+        records.append(stats.archive_record(state, generator.randrange(courts)))
+    with open(path, "wb") as f:
+        f.write(b"".join(records))
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else "match_archive_benchmark.bin"
+    if not os.path.exists(path):
+        print(f"Writing random matches to {path}...")
+        synthetic_archive(path)
+
+    begin = time.perf_counter()
+    archive = load_archive(path)
+    courts_stats = per_court(archive)
+    hours_stats = per_hour(archive)
+    elapsed = time.perf_counter() - begin
+    print(f"{len(archive)} matches loaded and grouped in {elapsed * 1000:.1f} ms")
+    for court, matches in enumerate(courts_stats["matches"]):
+        print(f"Court {court + 1}: {matches} matches, "
+              f"{courts_stats['mean_minutes'][court]:.0f} min, "
+              f"{courts_stats['mean_points'][court]:.0f} points, "
+              f"breaks {courts_stats['break_conversion'][court]:.0%}, "
+              f"{courts_stats['mean_game_seconds'][court]:.0f} s per game")
+    busiest = int(hours_stats["matches"].argmax())
+    print(f"Busiest hour: {busiest:02}:00 ({hours_stats['matches'][busiest]} matches)")
@@ -0,0 +1,469 @@
+import hashlib
+import json
+import queue
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+# Tables and indexes of the store. The partial indexes keep the rows not
+# synced yet, so the sync never scans the whole history.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    license TEXT,
+    version TEXT,
+    court INTEGER NOT NULL,
+    label TEXT,
+    day TEXT NOT NULL,
+    started REAL,
+    ended REAL NOT NULL,
+    winner TEXT,
+    winner_side INTEGER,
+    p1_score TEXT,
+    p2_score TEXT,
+    elapsed INTEGER,
+    stats TEXT,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS matches_license ON matches (license, day);
+CREATE INDEX IF NOT EXISTS matches_court ON matches (court, day);
+CREATE INDEX IF NOT EXISTS matches_day ON matches (day);
+CREATE INDEX IF NOT EXISTS matches_winner ON matches (winner);
+CREATE INDEX IF NOT EXISTS matches_unsynced ON matches (id) WHERE synced = 0;
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    court INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    arg INTEGER NOT NULL,
+    time REAL NOT NULL,
+    started REAL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS events_court ON events (court, time);
+CREATE INDEX IF NOT EXISTS events_unsynced ON events (id) WHERE synced = 0;
+"""
+
+# Columns of the matches as they are sent upstream.
+MATCH_COLUMNS = ("id", "uid", "license", "version", "court", "label", "day", "started", "ended",
+                 "winner", "winner_side", "p1_score", "p2_score", "elapsed", "stats")
+EVENT_COLUMNS = ("id", "court", "kind", "arg", "time", "started")
+
+
+# Opens the database with the settings of the store.
+def connect(path):
+    '''
+    Description:
+    WAL mode lets the sync and the queries read while the writer writes.
+    With WAL, synchronous=NORMAL only syncs at checkpoints: a power cut
+    can lose the last transactions but never corrupts the file, and the
+    journal of the match in progress still has the points.
+
+    Input:
+    path (str): File of the database.
+
+    Output:
+    connection (sqlite3.Connection): The connection.
+    '''
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+# Local history of the matches and their events.
+class MatchStore:
+        def __init__(self, path, batch_interval=1.0):
+                '''
+                Description:
+                Records every match and event in SQLite. add_match() and
+                add_event() only queue the row, a writer thread inserts what
+                arrived during batch_interval in a single transaction, so
+                the scoreboard never waits on the disk and a burst of points
+                costs one commit.
+
+                Inputs:
+                path (str): File of the database.
+                batch_interval (float): Seconds of rows written together.
+
+                Output:
+                A match store class
+                '''
+                self.path = path
+                self.batch_interval = batch_interval
+                self.written = 0
+                self.transactions = 0
+                self.sync = None
+                self._queue = queue.SimpleQueue()
+                connection = connect(path)
+                connection.executescript(SCHEMA)
+                connection.close()
+                self._thread = threading.Thread(target=self._writer, daemon=True)
+                self._thread.start()
+
+        # Queues a match result.
+        def add_match(self, winner, p1_score, p2_score, elapsed_time, user_license, version_number,
+                      court=0, label=None, started=None, winner_side=None, stats=None):
+                '''
+                Description:
+                Queues a result. The same score of the same match saved twice
+                (e.g. Enter then ESC) is only kept once, the match is its
+                court and start.
+
+                Inputs:
+                Same as ExportOutbox.put.
+                court (int): Number of the court, from 0.
+                label (str): Name of the court, None with a single court.
+                started (float): time.time() of the start of the match.
+                winner_side (int): 0 or 1, None if the match was not won.
+                stats (dict): Statistics of the match (MatchStats.summary).
+
+                Output:
+                None
+                '''
+                ended = time.time()
+                key = json.dumps([started, court, winner, p1_score, p2_score, user_license])
+                self._queue.put(("matches", (
+                        hashlib.sha1(key.encode("utf-8")).hexdigest(),
+                        user_license,
+                        version_number,
+                        court,
+                        label,
+                        datetime.fromtimestamp(started or ended).strftime("%Y-%m-%d"),
+                        started,
+                        ended,
+                        winner,
+                        winner_side,
+                        p1_score,
+                        p2_score,
+                        elapsed_time,
+                        json.dumps(stats) if stats is not None else None
+                        )))
+
+        # Queues an event of a match.
+        def add_event(self, court, kind, arg, stamp, started=None):
+                '''
+                Description:
+                Queues a start, point, switch or reset, see match_journal_lanh.
+
+                Inputs:
+                court (int): Number of the court, from 0.
+                kind (int): START, POINT, SWITCH or RESET.
+                arg (int): Side of the point, 0 otherwise.
+                stamp (float): time.time() of the event.
+                started (float): Start of the match of the event, the same
+                                 as in its row of matches.
+
+                Output:
+                None
+                '''
+                self._queue.put(("events", (court, kind, arg, stamp, started)))
+
+        # Listener of a match journal, mirrors its events into the store.
+        def journal_listener(self, court, started=None):
+                '''
+                Description:
+                Creates the listener of the journal of a court.
+
+                Inputs:
+                court (int): Number of the court, from 0.
+                started (function): Returns the start of the current match,
+                                    stored with each event.
+
+                Output:
+                listener (function): Listener for MatchJournal.
+                '''
+                return lambda kind, arg, stamp: self.add_event(court, kind, arg, stamp, started() if started else None)
+
+        # Starts pushing the rows upstream.
+        def start_sync(self, send, user_license=None, chunk_size=1000, interval=60):
+                '''
+                Description:
+                Starts a StoreSync on this store, stopped by close().
+
+                Input:
+                See StoreSync.
+
+                Output:
+                sync (StoreSync): The sync.
+                '''
+                self.sync = StoreSync(self.path, send, user_license, chunk_size, interval)
+                return self.sync
+
+        # Writes what is left and stops.
+        def close(self):
+                '''
+                Description:
+                Stops the sync, writes the pending rows and stops the writer.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                if self.sync:
+                    self.sync.close()
+                self._queue.put(None)
+                self._thread.join()
+
+        # Writer thread, one transaction per batch.
+        def _writer(self):
+                connection = connect(self.path)
+                running = True
+                while running:
+                    rows = [self._queue.get()]
+                    deadline = time.monotonic() + self.batch_interval
+                    while rows[-1] is not None:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        try:
+                            rows.append(self._queue.get(timeout=timeout))
+                        except queue.Empty:
+                            break
+                    if rows[-1] is None:
+                        rows.pop()
+                        running = False
+                    if rows:
+                        self._write(connection, rows)
+                connection.close()
+
+        def _write(self, connection, rows):
+                matches = [values for table, values in rows if table == "matches"]
+                events = [values for table, values in rows if table == "events"]
+                try:
+                    with connection:
+                        if matches:
+                            connection.executemany(
+                                        "INSERT OR IGNORE INTO matches (uid, license, version, court, label, day, "
+                                        "started, ended, winner, winner_side, p1_score, p2_score, elapsed, stats) "
+                                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", matches)
+                        if events:
+                            connection.executemany(
+                                        "INSERT INTO events (court, kind, arg, time, started) VALUES (?, ?, ?, ?, ?)",
+                                        events)
+                except sqlite3.Error as e:
+                    print(f"Could not write to the match store: {e}")
+                    return
+                self.written += len(rows)
+                self.transactions += 1
+
+
+# Pushes the rows not synced yet upstream, in large chunks.
+class StoreSync:
+        def __init__(self, path, send, user_license=None, chunk_size=1000, interval=60,
+                     base_delay=2, max_delay=300):
+                '''
+                Description:
+                A thread reads the unsynced matches, then the unsynced
+                events, chunk_size rows at a time, sends each chunk in one
+                call and marks it synced in one transaction. It runs again
+                every interval seconds, and retries with an exponential
+                backoff while the network is down, so the scoreboard plays
+                the same offline. A chunk sent but not marked (crash) is
+                sent again, every row has an id for the server to drop
+                duplicates.
+
+                Inputs:
+                path (str): File of the database.
+                send (function): Sends a list of rows, raises on failure, e.g.
+                                 export_outbox_lanh.http_sender(url).
+                user_license (str): License added to the events sent.
+                chunk_size (int): Rows sent per call.
+                interval (float): Seconds between two syncs.
+                base_delay (float): Seconds before the first retry.
+                max_delay (float): Maximum seconds between retries.
+
+                Output:
+                A store sync class
+                '''
+                self.path = path
+                self.send = send
+                self.user_license = user_license
+                self.chunk_size = chunk_size
+                self.interval = interval
+                self.base_delay = base_delay
+                self.max_delay = max_delay
+                self.sent = 0
+                self.failures = 0
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+
+        # Sends every unsynced row once.
+        def sync_all(self, connection):
+                '''
+                Description:
+                Sends the unsynced rows chunk by chunk until none is left.
+
+                Input:
+                connection (sqlite3.Connection): Connection of the sync.
+
+                Output:
+                sent (int): Rows sent, raises if a chunk could not be sent.
+                '''
+                sent = 0
+                for table, columns in (("matches", MATCH_COLUMNS), ("events", EVENT_COLUMNS)):
+                    while not self._stop.is_set():
+                        rows = connection.execute(
+                                    f"SELECT {', '.join(columns)} FROM {table} WHERE synced = 0 ORDER BY id LIMIT ?",
+                                    (self.chunk_size,)).fetchall()
+                        if not rows:
+                            break
+                        self.send([self._record(table, row) for row in rows])
+                        # The chunk is every unsynced row between its first and
+                        # last id, new rows always get a higher id.
+                        ids = [row["id"] for row in rows]
+                        with connection:
+                            connection.execute(
+                                        f"UPDATE {table} SET synced = 1 WHERE id BETWEEN ? AND ? AND synced = 0",
+                                        (ids[0], ids[-1]))
+                        sent += len(rows)
+                        self.sent += len(rows)
+                return sent
+
+        def _record(self, table, row):
+                record = dict(row)
+                record["table"] = table
+                if table == "matches":
+                    record["id"] = record.pop("uid")
+                    record["stats"] = json.loads(record["stats"]) if record["stats"] else None
+                else:
+                    record["id"] = f"{self.user_license}:{record['id']}"
+                    record["license"] = self.user_license
+                return record
+
+        # Worker thread, syncs and waits for the next interval or retry.
+        def _worker(self):
+                connection = connect(self.path)
+                attempt = 0
+                while not self._stop.is_set():
+                    try:
+                        self.sync_all(connection)
+                        attempt = 0
+                        delay = self.interval
+                    except Exception as e:
+                        # Waits longer after each failure, with some jitter.
+                        attempt += 1
+                        self.failures += 1
+                        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                        delay *= random.uniform(0.5, 1.0)
+                        print(f"Store sync failed ({e}), retrying in {delay:.0f}s")
+                    self._stop.wait(delay)
+                connection.close()
+
+        def close(self, timeout=2):
+                self._stop.set()
+                self._thread.join(timeout)
+
+
+# Matches of the history, newest first.
+def query_matches(path, user_license=None, court=None, day=None, winner=None, limit=100):
+    '''
+    Description:
+    Reads matches with any of the indexed filters, from a connection of
+    its own, while the scoreboard keeps writing.
+
+    Input:
+    path (str): File of the database.
+    user_license (str): License, None for any.
+    court (int): Number of the court from 0, None for any.
+    day (str): "YYYY-MM-DD", None for any.
+    winner (str): Winner as exported, e.g. "Equipo 1 Ganador", None for any.
+    limit (int): Maximum matches returned.
+
+    Output:
+    matches (list): One dict per match.
+    '''
+    filters = {"license": user_license, "court": court, "day": day, "winner": winner}
+    where = [f"{column} = ?" for column, value in filters.items() if value is not None]
+    values = [value for value in filters.values() if value is not None]
+    sql = "SELECT * FROM matches"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ended DESC LIMIT ?"
+    connection = connect(path)
+    try:
+        return [dict(row) for row in connection.execute(sql, values + [limit])]
+    finally:
+        connection.close()
+
+
+# Rows waiting for the sync.
+def pending(path):
+    connection = connect(path)
+    try:
+        return {table: connection.execute(f"SELECT COUNT(*) FROM {table} WHERE synced = 0").fetchone()[0]
+                for table in ("matches", "events")}
+    finally:
+        connection.close()
+
+
+# Measures the events per second of batched and single row transactions.
+def benchmark(path, events=20000):
+    '''
+    Description:
+    Writes events through the store (batched) and one commit per event,
+    into a scratch database.
+
+    Input:
+    path (str): File of the scratch database, replaced.
+    events (int): Events to write.
+
+    Output:
+    results (dict): Events per second of each way.
+    '''
+    import os
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    store = MatchStore(path, batch_interval=0.2)
+    begin = time.perf_counter()
+    for i in range(events):
+        store.add_event(i % 4, 2, i % 2, time.time())
+    store.close()
+    batched = events / (time.perf_counter() - begin)
+
+    connection = connect(path)
+    single = min(events, 2000)
+    begin = time.perf_counter()
+    for i in range(single):
+        with connection:
+            connection.execute("INSERT INTO events (court, kind, arg, time) VALUES (?, ?, ?, ?)",
+                               (i % 4, 2, i % 2, time.time()))
+    connection.close()
+    return {
+        "batched_per_second": round(batched),
+        "single_per_second": round(single / (time.perf_counter() - begin)),
+        "transactions": store.transactions,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Local history of the matches.")
+    parser.add_argument("path", nargs="?", default="padel_store.db")
+    parser.add_argument("--license")
+    parser.add_argument("--court", type=int, help="number of the court, from 1")
+    parser.add_argument("--day", help="YYYY-MM-DD")
+    parser.add_argument("--winner")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--benchmark", action="store_true", help="write speed into a scratch database")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(json.dumps(benchmark(args.path + ".bench"), indent=1))
+    else:
+        court = args.court - 1 if args.court else None
+        for match in query_matches(args.path, args.license, court, args.day, args.winner, args.limit):
+            print(f"{match['day']} court {match['court'] + 1}: {match['winner'] or '-'} "
+                  f"{match['p1_score']} / {match['p2_score']} ({match['elapsed']} s)"
+                  f"{'' if match['synced'] else ' (not synced)'}")
+        print(f"Not synced: {pending(args.path)}")
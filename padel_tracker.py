@@ -3,23 +3,38 @@ import os
 import constants_lanh as con
 from datetime import datetime 
 import sys
-import requests
-import csv
 import platform
 import serial
 import threading
 import keyboard
 import serial.tools.list_ports
+import serial_reader_lanh as serial_lanh
+import port_watcher_lanh as pw
 import time
-import v01_padeltracker_dataexporter_lanh as ptexp
+import render_lanh as render
+import animation_lanh as anim
+import asset_cache_lanh as asset_cache
+import courts_lanh as courts
+import match_state_lanh as msl
+import scoring_rules_lanh as srl
+import match_journal_lanh as mjl
+import match_stats_lanh as mstats
+import match_store_lanh as mstore
+import export_outbox_lanh as exo
+import latency_lanh as lat
+import frame_profiler_lanh as fprof
+import frame_governor_lanh as fgov
+import frame_stream_lanh as frame_stream
+import live_score_lanh as live_score
+import license_lanh
 import v01_updater_lanh as appup
 import license_key as lkey
 
 # Version Number
 version_number = "1.0.8"
 
-# Set of ports already connected.
-connected_ports = set()
+# Set of ports already connected, shared between threads.
+connected_ports = pw.PortRegistry()
 
 # Find all the ports in the serial library and check if input comes from it.
 def find_all_arduino_ports():
@@ -44,70 +59,73 @@ def find_all_arduino_ports():
             arduino_ports.append(port.device)
     return arduino_ports
 
-#Constantly tries to listen for an arduino.
-def listen_to_arduino(port):
+# Reads all the controllers from one thread.
+serial_reader = serial_lanh.SerialReader(con.CONTROLLER_BAUD, on_disconnect=connected_ports.discard)
+
+# Latency of the controller inputs, from the serial read to the screen.
+latency = lat.LatencyTracker()
+
+# Time of each stage of the main loop (F5).
+frame_profiler = fprof.FrameProfiler(con.FRAME_PROFILER, con.FRAME_PROFILE_LOG_PATH, con.FRAME_PROFILE_INTERVAL)
+
+# Sleeps until events when idle, steady frames during transitions.
+frame_governor = fgov.FrameGovernor(con.BURST_FPS)
+
+# Statistics of the finished matches, written in the background.
+stats_archive = mstats.ArchiveWriter(con.STATS_ARCHIVE_PATH)
+
+# Courts in the window, COURT_REGIONS must place each of them.
+court_count = con.COURTS
+if con.COURT_REGIONS and len(con.COURT_REGIONS) < court_count:
+    print(f"COURT_REGIONS places {len(con.COURT_REGIONS)} of the {court_count} courts, "
+          f"using {len(con.COURT_REGIONS)} courts")
+    court_count = len(con.COURT_REGIONS)
+
+# Court of each controller.
+court_router = courts.CourtRouter(court_count, con.COURT_PORTS)
+
+# Transition tables of the scoring rules, a point is one lookup.
+scoring = srl.compiled(con.SCORING_RULES)
+
+# Connects the arduino ports that are not connected yet.
+def connect_new_ports(device=None):
     '''
     Description:
-    listens for the information in serial between devices.
+    Adds every new arduino port to the serial reader. A port that was just
+    plugged can take a few milliseconds to be ready, so it is retried.
+
     Input:
-    port (list): The list of objects from my COM (usb) ports.
+    device (str): Device that was just plugged, None to only scan once.
 
     Output:
-    ser (list): List of the information from the arduino connection.
+    None
     '''
-    try:
-        # It creates the connection, speed of data, and timeout.
-        ser = serial.Serial(port, 9600, timeout=1)
-        #print(f"Started listening to {port}")
-
-        while True:
-            #Checks if the port has bytes waiting to be sent.
-            if ser.in_waiting > 0:
-                #Reads the byte line and converts to python.
-                raw = ser.readline()
-                line = raw.decode(errors='ignore').strip().upper()
-                #print(f"[{port}] Received: '{line}'")
-
-                #Checks every entry of the option.
-                if "ENTER" in line:
-                    event = pygame.event.Event(pygame.KEYDOWN, {'key': pygame.K_RETURN})
-                    pygame.event.post(event)
-                    #print("Posted KEYDOWN: ENTER")
-
-                elif "SPACE" in line:
-                    event = pygame.event.Event(pygame.KEYDOWN, {'key': pygame.K_SPACE})
-                    pygame.event.post(event)
-                    #print("Posted KEYDOWN: SPACE")
-
-                elif "RIGHT" in line:
-                    event = pygame.event.Event(pygame.KEYDOWN, {'key': pygame.K_RIGHT})
-                    pygame.event.post(event)
-                    #print("Posted KEYDOWN: RIGHT")
-
-                elif "LEFT" in line:
-                    event = pygame.event.Event(pygame.KEYDOWN, {'key': pygame.K_LEFT})
-                    pygame.event.post(event)
-                    #print("Posted KEYDOWN: LEFT")
-
-            # Buffer time.
-            time.sleep(0.01)
-
-    #Marks an error if there is an error.
-    except serial.SerialException as e:
-        print(f"[{port}] Serial error: {e}")
-        connected_ports.discard(port)
-
-    return ser
+    for attempt in range(5):
+        for port in find_all_arduino_ports():
+            if port not in connected_ports and serial_reader.add_port(port):
+                connected_ports.add(port)
+                court_router.assign(port)
+        if device is None or device in connected_ports:
+            return
+        time.sleep(0.05)
 
+#Constantly tries to listen for an arduino.
 def arduino_commands():
-    while True:
-        ports = find_all_arduino_ports()
-        for port in ports:
-                if port not in connected_ports:
-                    thread = threading.Thread(target=listen_to_arduino, args=(port,), daemon=True)
-                    thread.start()
-                    connected_ports.add(port)
-        time.sleep(2) # Check every 2 seconds.
+    '''
+    Description:
+    Starts the serial reader, connects the arduinos already plugged and
+    then waits for hotplug events to connect or remove the others.
+
+    Input:
+    None
+
+    Output:
+    None
+    '''
+    serial_reader.start()
+    connect_new_ports()
+    watcher = pw.HotplugWatcher(connect_new_ports, serial_reader.remove_port)
+    watcher.run()
 
 # License Platform.
 def get_machine_id():
@@ -130,6 +148,8 @@ def check_license(license_key):
     '''
     Description:
     It verifies the license of the user with the online database to verify.
+    A recent cached verdict answers at once and the database is checked
+    again in the background.
 
     Input:
     license_key (str): The license name as it is in the data base.
@@ -139,52 +159,46 @@ def check_license(license_key):
     '''
     try:
         print("Checking license...")
-        con.response.raise_for_status()  # throws error on bad request
-
-        # Get the information from the csv and splits it into a dict.
-        reader = csv.DictReader(con.response.text.splitlines())
-        machine_id = get_machine_id()
-
-        # Checks the licenses.
-        for row in reader:
-            print(f"Row: {row}")  # debug print
-
-            if row.get("License Key", "").strip() == license_key.strip():
-                status = row.get("Status", "").lower()
-                if status != "active":
-                    return False, "❌ License is not active"
+        checker = license_lanh.LicenseChecker(
+                        con.GOOGLE_SHEET_CSV_URL,
+                        con.LICENSE_CACHE_PATH,
+                        license_key,
+                        get_machine_id(),
+                        grace_days=con.LICENSE_GRACE_DAYS
+                        )
+        return checker.check()
 
-                expiration_str = row.get("Expiration Date", "").strip()
-                try:
-                    exp_date = datetime.strptime(expiration_str, "%Y-%m-%d")
-                except ValueError:
-                    return False, f"⚠️ Invalid date format: '{expiration_str}'"
+    except Exception as e:
+        return False, f"❌ Unexpected error: {e}"
 
-                if exp_date < datetime.now():
-                    return False, "❌ License expired"
+# Shared cache of the rendered player surfaces (a few per player).
+player_surface_cache = render.SurfaceCache(max_size=16)
 
-                return True, "✅ License verified"
+# Score change transitions of the players, rendered once per change.
+player_transition_cache = render.SurfaceCache(max_size=4)
 
-        return False, "❌ License key not found"
+# Event that wakes the main loop once per second for the clock and timer.
+CLOCK_TICK_EVENT = pygame.USEREVENT + 1
 
-    except requests.exceptions.Timeout:
-        return False, "⚠️ License check timed out"
-    except requests.exceptions.RequestException as e:
-        return False, f"❌ Network error: {e}"
-    except Exception as e:
-        return False, f"❌ Unexpected error: {e}"
+# Arms the clock tick for the next wall clock second.
+def arm_clock_tick():
+    '''
+    Description:
+    Sets a one shot timer that posts CLOCK_TICK_EVENT right when the wall
+    clock changes second, so the clock on screen never lags behind.
 
-# Initialize the software.
-pygame.init()
-pygame.mixer.init()
+    Input:
+    None
 
-# Set the font used for the software.
-padel_font = pygame.font.SysFont(con.font, con.font_size, bold = True)
-small_font = pygame.font.SysFont(con.font, 100, bold=True) 
+    Output:
+    None
+    '''
+    ms_to_next_second = 1000 - datetime.now().microsecond // 1000
+    pygame.time.set_timer(CLOCK_TICK_EVENT, ms_to_next_second, 1)
 
 # Set the Player Class
 class Player (pygame.sprite.DirtySprite):
-        def __init__(self, x_pos, y_pos,name, points, games, sets, color, font, font_small):
+        def __init__(self, x_pos, y_pos,name, points, games, sets, color, font, font_small, scale=1):
                 '''
                 Description:
                 This class creates a player with a location on screen, points,
@@ -198,6 +212,7 @@ class Player (pygame.sprite.DirtySprite):
                 games (int): Games won.
                 color (tuple): A set of values for the color of the font/
                 font_size (int): The size of the font
+                scale (float): Size of the court compared to the screen.
 
                 Output:
                 A player class
@@ -212,8 +227,13 @@ class Player (pygame.sprite.DirtySprite):
                 self.color = color
                 self.font = font
                 self.font_small = font_small
+                self.scale = scale
                 self.image = None
                 self.rect = None
+                self.key = None
+                self.target = None
+                self.strip = None
+                self.strip_start = 0
                 self.update()
         
         # Updates the class.
@@ -221,7 +241,10 @@ class Player (pygame.sprite.DirtySprite):
                 '''
                 Description:
                 Updates the players class attributes on the pygame along with 
-                the font size.
+                the font size. The surface comes from the shared cache and is
+                only rendered again when the score, name, color or layout
+                changed. A score change plays a pre-rendered transition from
+                the old surface, one blit per frame.
 
                 Inputs:
                 None
@@ -232,7 +255,78 @@ class Player (pygame.sprite.DirtySprite):
                 ###Can probably move some of these to the constants.###
 
                 '''
-                 # Render the name
+                # Everything that changes the look of the sprite. The fonts
+                # themselves are in the key, not their id(): the cache keeps
+                # them alive, so an id can not be reused by another font.
+                layout = (
+                        self.font,
+                        self.font_small,
+                        con.reduce_height,
+                        con.text_x,
+                        con.x_offset,
+                        con.points_offset,
+                        self.scale
+                        )
+                key = (
+                        self.name,
+                        self.points,
+                        self.games,
+                        self.set,
+                        tuple(self.color),
+                        layout
+                        )
+                image = player_surface_cache.get(key, self.render)
+                now = pygame.time.get_ticks()
+
+                # The score changed on the same layout, starts the transition.
+                if self.target is not None and image is not self.target:
+                    self.strip = None
+                    if con.SCORE_TRANSITION and key[5] == self.key[5]:
+                        old = self.target
+                        self.strip = player_transition_cache.get(
+                                        (self.key, key),
+                                        lambda: anim.transition_strip(con.SCORE_TRANSITION, old, image,
+                                                                      con.SCORE_TRANSITION_DURATION)
+                                        )
+                        self.strip_start = now
+                        frame_governor.burst(con.SCORE_TRANSITION_DURATION, now)
+                self.key = key
+                self.target = image
+
+                # Frame of the transition, the final surface once it is over.
+                frame = image
+                if self.strip is not None:
+                    if self.strip.done(now - self.strip_start):
+                        self.strip = None
+                    else:
+                        frame = self.strip.frame_at(now - self.strip_start)
+
+                # Only marks the sprite dirty when it changed or moved.
+                rect = frame.get_rect(topleft=(self.x_pos, self.y_pos))
+                if frame is not self.image or rect != self.rect:
+                    self.image = frame
+                    self.rect = rect
+                    self.dirty = 1
+
+        # Renders the player surface from scratch.
+        def render(self):
+                '''
+                Description:
+                Renders the name, points, games and sets of the player into a
+                single surface. Only called on a cache miss.
+
+                Inputs:
+                None
+
+                Output:
+                image (pygame.Surface): The rendered player.
+                '''
+                # Spacing of the layout, smaller on a smaller court.
+                reduce_height = int(con.reduce_height * self.scale)
+                text_x = int(con.text_x * self.scale)
+                margin = int(20 * self.scale)
+
+                # Render the name
                 name_surface = self.font_small.render(self.name, True, self.color)
 
                 # Render each score part separately
@@ -244,13 +338,13 @@ class Player (pygame.sprite.DirtySprite):
                 points_surface = self.font.render(points_text, True, con.white)  # white text
 
                 # Reduce background height by 20 pixels, and vertically center the points text
-                reduced_height = points_surface.get_height() - con.reduce_height
-                points_bg = pygame.Surface((points_surface.get_width() + 20, reduced_height), pygame.SRCALPHA)
+                reduced_height = points_surface.get_height() - reduce_height
+                points_bg = pygame.Surface((points_surface.get_width() + margin, reduced_height), pygame.SRCALPHA)
                 points_bg.fill(self.color)
 
                 # Center the text vertically inside the reduced background
                 text_y = (reduced_height - points_surface.get_height()) // 2
-                points_bg.blit(points_surface, (con.text_x, text_y))
+                points_bg.blit(points_surface, (text_x, text_y))
 
                 # ➤ GAMES + SETS: render normally (no background)
                 games_surface = self.font.render(f"  {games_text}", True, self.color)
@@ -260,7 +354,7 @@ class Player (pygame.sprite.DirtySprite):
                 total_width = (points_bg.get_width() + 
                                 games_surface.get_width() + 
                                 sets_surface.get_width() + 
-                                con.reduce_height)
+                                reduce_height)
                 height = max(
                             points_bg.get_height(), 
                             games_surface.get_height(), 
@@ -269,27 +363,26 @@ class Player (pygame.sprite.DirtySprite):
 
                 # Combine into one surface
                 score_surface = pygame.Surface((total_width, height), pygame.SRCALPHA)
-                x_offset = -con.x_offset
+                x_offset = -int(con.x_offset * self.scale)
                 score_surface.blit(sets_surface, (x_offset, 0))
                 x_offset += sets_surface.get_width()
                 score_surface.blit(games_surface, (x_offset, 0))
-                x_offset += games_surface.get_width() + con.points_offset
+                x_offset += games_surface.get_width() + int(con.points_offset * self.scale)
                 score_surface.blit(points_bg, (x_offset, 0))
 
                 # Combine name + score_surface horizontally
-                combined_width = name_surface.get_width() + 20 + score_surface.get_width()
+                combined_width = name_surface.get_width() + margin + score_surface.get_width()
                 combined_height = max(
                                     name_surface.get_height(), 
-                                    score_surface.get_height()-con.reduce_height
+                                    score_surface.get_height()-reduce_height
                                     )
 
-                self.image = pygame.Surface((combined_width, combined_height), pygame.SRCALPHA)
+                image = pygame.Surface((combined_width, combined_height), pygame.SRCALPHA)
                 name_y = (combined_height - name_surface.get_height()) // 2
                 score_y = (combined_height - score_surface.get_height()) // 2
-                self.image.blit(name_surface, (0, name_y))
-                self.image.blit(score_surface, (name_surface.get_width() + 20, score_y))
-
-                self.rect = self.image.get_rect(topleft=(self.x_pos, self.y_pos))
+                image.blit(name_surface, (0, name_y))
+                image.blit(score_surface, (name_surface.get_width() + margin, score_y))
+                return image
                 
         # Resets the points back to 0.       
         def reset_points(self):
@@ -336,470 +429,789 @@ class Player (pygame.sprite.DirtySprite):
             self.set = int(0)
             return self.set
 
-# Runs the app
-def main():
-        # Set the Game run settings. Attaches image to window.
-        run = True
-        fps =10
-        clock = pygame.time.Clock()
+# Time the enter key is held to reset the match.
+ENTER_HOLD_DURATION = 3000
 
-        #Sets sudden death to false
-        sudden_death = False
-        
+# Time a keyboard score key is locked after a press.
+SCORE_PRESSED_DURATION = 3000
+
+# Static layers, shared by the courts of the same size.
+static_layers = {}
 
-        #Tracks the winner variables
-        winner = None
-        winner_start_time = None
+# Background of a court with the texts and images that never change.
+def static_layer(size, scale):
+    '''
+    Description:
+    Bakes the background image, the labels and the logo of a court into
+    one surface. Courts of the same size share it.
 
-        #Gives a time and timer to the enter key.
-        enter_key_held = False
-        enter_start_time = 0
-        ENTER_HOLD_DURATION = 3000 
+    Input:
+    size (tuple): Width and height of the court.
+    scale (float): Size of the court compared to the screen.
 
-        # Variables to the score button.
-        score_key_pressed = False
-        score_key_time = 0
-        score_pressed_duration = 3000
+    Output:
+    background (pygame.Surface): The static layer.
+    '''
+    key = (tuple(size), scale)
+    if key in static_layers:
+        return static_layers[key]
 
-        # Last input time variable
-        last_input_time = time.time()
+    width, height = size
+    center_x = int(width/2)
 
-        # Add variable to the switch player.
-        player1_controls_left = True
-        
-        # Calling the background.
-        background = pygame.Surface(con.win.get_size())
-        background.blit(con.background_image,(0,0))
+    # The full screen uses the images loaded by the constants.
+    if tuple(size) == con.win.get_size():
+        background_image = con.background_image
+    else:
+        background_image = asset_cache.load_scaled(
+                                os.path.join('02_Assets', 'background.png'),
+                                size,
+                                con.ASSET_CACHE_DIR
+                                )
+    if scale == 1:
+        logo_img = con.logo_img
+    else:
+        logo_img = asset_cache.load_scaled(
+                                os.path.join('02_Assets', 'logo.png'),
+                                (int(con.logo_width * scale), int(con.logo_height * scale)),
+                                con.ASSET_CACHE_DIR,
+                                alpha=True
+                                )
+    logo_rect = logo_img.get_rect(midtop=(width // 2, 0))
+
+    # Static texts.
+    label_font = con.scaled_font("label_font", scale)
+    time_font = con.scaled_font("time_font", scale)
+    puntos_label_p1 = label_font.render(
+                                "     SETS    JUEGOS  PUNTOS",
+                                            True,
+                                            con.dark_gray
+                                            )
+    timer_label = time_font.render(TIMER_PREFIX, True, con.dark_gray)
+
+    static_layers[key] = render.compose_static_layer(
+                            size,
+                            [
+                                (background_image, (0, 0)),
+                                (puntos_label_p1, (int(500 * scale), int(200 * scale))),
+                                (timer_label, (center_x + int(190 * scale), int(50 * scale))),
+                                (logo_img, logo_rect),
+                            ]
+                            )
+    return static_layers[key]
 
-        # Setting the center of the screen.
-        center_x = int(con.width/2)
-        center_y = int(con.height/2)
-        
-        
-        # Create player 1. #### Cand move to con ###
-        player1_x = int(center_x/6 - 100)
-        player1_y = int(center_y -200) 
-        player1_color = con.marine_blue
-        player1 = Player(
-                        player1_x, 
-                        player1_y, 
-                        "Equipo 1", 
-                        0, 
-                        0,
-                        0, 
-                        player1_color,
-                        con.score_font,
-                        small_font
-                        )
+# Text in front of the timer.
+TIMER_PREFIX = "          T: "
+
+# A scoreboard: its match, players and timer, drawn in a region of the window.
+class Court:
+        def __init__(self, index, region, outbox, label=None, store=None):
+                '''
+                Description:
+                Keeps everything one scoreboard needs: the match engine, its
+                journal, the timer and the sprites drawn in its region of the
+                window. Fonts, glyphs, rendered players and the outbox are
+                shared by all the courts, so each court only costs the
+                sprites that changed.
+
+                Inputs:
+                index (int): Number of the court, from 0.
+                region (pygame.Rect): Part of the window where it is drawn.
+                outbox (ExportOutbox): Outbox of the results, shared.
+                label (str): Name of the court, None with a single court.
+                store (MatchStore): Local history of the matches, shared,
+                                    None for none.
+
+                Output:
+                A court class
+                '''
+                self.index = index
+                self.region = region
+                self.outbox = outbox
+                self.label = label
+                self.store = store
+                self.surface = con.win.subsurface(region)
+                self.scale = min(region.width / con.width, region.height / con.height)
+                scale = self.scale
+
+                # Score of the match, the players only display it. It is rebuilt
+                # from the journal if the program stopped in the middle of a match.
+                journal_path = courts.court_path(con.JOURNAL_PATH, index)
+                self.match, match_started_at, sides_swapped = mjl.recover(journal_path, scoring.point)
+                self.stats = mstats.replay_journal(journal_path, con.FIRST_SERVER, scoring.point)
+                listener = store.journal_listener(index, lambda: self.stats.started_at) if store else None
+                self.journal = mjl.MatchJournal(journal_path, listener=listener)
+
+                #Tracks the winner variables
+                self.winner = None
+                self.winner_start_time = None
+
+                #Gives a time and timer to the enter key.
+                self.enter_key_held = False
+                self.enter_start_time = 0
+
+                # Each score key has its own lockout, so one team never blocks the other.
+                self.score_keys = courts.ScoreKeyLock(SCORE_PRESSED_DURATION)
+
+                # Last input time variable
+                self.last_input_time = time.time()
+
+                # Add variable to the switch player.
+                self.player1_controls_left = True
+
+                # Create Timer
+                self.match_started = False
+                self.start_time = 0
+                self.elapsed_time = 0
+
+                # Setting the center of the court.
+                center_x = int(region.width/2)
+                center_y = int(region.height/2)
+                score_font = con.scaled_font("score_font", scale)
+                small_font = con.scaled_font("small_font", scale)
+                time_font = con.scaled_font("time_font", scale)
+
+                # Create player 1.
+                self.player1 = Player(
+                                int(center_x/6 - 100 * scale),
+                                int(center_y - 200 * scale),
+                                "Equipo 1",
+                                0,
+                                0,
+                                0,
+                                con.marine_blue,
+                                score_font,
+                                small_font,
+                                scale
+                                )
+
+                # Create Player 2.
+                self.player2 = Player(
+                                int(center_x/6 - 100 * scale),
+                                int(center_y + 150 * scale),
+                                "Equipo 2",
+                                0,
+                                0,
+                                0,
+                                con.fire_brick,
+                                score_font,
+                                small_font,
+                                scale
+                                )
+
+                # Group for convenience (optional)
+                self.players = pygame.sprite.Group(self.player1, self.player2)
+
+                # Clock, timer and winner banner as sprites, the digits come from a shared glyph atlas.
+                time_glyphs = render.shared_glyph_atlas(time_font, con.dark_gray)
+                timer_x = center_x + int(190 * scale) + time_font.size(TIMER_PREFIX)[0]
+                self.clock_sprite = render.GlyphTextSprite(time_glyphs, (int(100 * scale), int(50 * scale)), "00:00:00")
+                self.timer_sprite = render.GlyphTextSprite(time_glyphs, (timer_x, int(50 * scale)), "00:00")
+                self.winner_sprite = render.BannerSprite(small_font, (region.width // 2, region.height // 2),
+                                                         con.WINNER_FADE_DURATION)
+
+                # Only the regions that changed get redrawn and sent to the display.
+                self.sprites = pygame.sprite.LayeredDirty()
+                self.sprites.add(self.player1, self.player2, self.clock_sprite, self.timer_sprite)
+                self.sprites.add(self.winner_sprite, layer=1)
+                if label:
+                    label_font = con.scaled_font("label_font", scale)
+                    label_y = int(50 * scale) + time_glyphs.height
+                    self.sprites.add(render.TextSprite(label_font, con.dark_gray, (int(100 * scale), label_y), label))
+                self.sprites.clear(self.surface, static_layer(region.size, scale))
+                self.repaint()
+
+                # Puts back the match recovered from the journal.
+                if sides_swapped:
+                    self.switch_sides()
+                    self.player1_controls_left = False
+                if match_started_at is not None:
+                    self.match_started = True
+                    self.start_time = pygame.time.get_ticks() - int((time.time() - match_started_at) * 1000)
+                self.show_score()
+
+        # Redraws the whole court on the next draw.
+        def repaint(self):
+                self.sprites.repaint_rect(self.surface.get_rect())
 
-        # Create Player 2.  #### Can move to con ####              
-        player2_x = int(center_x/6 - 100)
-        player2_y = int(center_y + 150) 
-        player2_color = con.fire_brick
-        player2 = Player(
-                        player2_x, 
-                        player2_y, 
-                        "Equipo 2", 
-                        0, 
-                        0,
-                        0, 
-                        player2_color,
-                        con.score_font,
-                        small_font
-                         )
-
-        # Group for convenience (optional)
-        players = pygame.sprite.Group(player1, player2)
-
-        # Create Timer
-        match_started = False
-        start_time = 0
-        elapsed_time = 0
-        
         #Starts the timer if the timer hasnt started.
-        def start_timer(match_started, start_time):
-            '''
-            Description:
-            Checks the timer, if false starts the timer.
+        def start_timer(self):
+                '''
+                Description:
+                Starts the timer and the match.
 
-            Input:
-            match_started (bool): Checks if the match has started.
-            start_time (int): Starts the time at 0.
+                Input:
+                None
 
-            Output:
-            start_time(int): The timer in ticks.
-            match_started(bool): The boolean of the timer. 
-            '''
-            #nonlocal match_started, start_time
-            match_started = True
-            start_time = pygame.time.get_ticks()
-            return start_time, match_started
-        
-        def reset_timer(match_started, start_time, elapsed_time):
-            '''
-            Description:
-            Resets the timer and points back to 0.
+                Output:
+                None
+                '''
+                self.match_started = True
+                self.start_time = pygame.time.get_ticks()
+                self.stats = mstats.MatchStats(con.FIRST_SERVER, time.time(), scoring.point)
+                self.journal.start()
 
-            Input:
-            match_started (bool): Checks if the match has started.
-            start_time (int): Gets the current start_time.
-            elapsed_time (int): Gets the elapsed time since it started.
-
-            Output: 
-            start_time (int): The timer in ticks.
-            match_started (bool): The boolean of the timer. 
-            elapsed_time (int): The elapsed time since enter.
-            '''
-            #nonlocal match_started, start_time, elapsed_time
-            match_started = False
-            start_time = 0
-            elapsed_time = 0
-            player1.reset_game()
-            player1.reset_points()
-            player1.reset_set()
-            player2.reset_game()
-            player2.reset_points()
-            player2.reset_set()
-            return match_started, start_time, elapsed_time
+        def reset_timer(self):
+                '''
+                Description:
+                Resets the timer and points back to 0. A match with points
+                is added to the statistics archive first.
 
-        # Switch sides function.
-        def switch_sides():
-            '''
-            Description:
-            Switches the position, and colors of both teams.
+                Input:
+                None
 
-            Input: 
-            none
+                Output:
+                None
+                '''
+                if any(self.stats.points_won):
+                    stats_archive.append(self.stats.archive_record(self.match, self.index))
+                # The reset is the last event of the match that ends.
+                self.journal.reset(swapped=not self.player1_controls_left)
+                self.stats = mstats.MatchStats(con.FIRST_SERVER, point=scoring.point)
+                self.match_started = False
+                self.start_time = 0
+                self.elapsed_time = 0
+                self.match = msl.MatchState()
+                self.show_score()
+
+        # Copies the match state into the player sprites.
+        def show_score(self):
+                '''
+                Description:
+                Sets the points, games and sets of both players from the match
+                state. The sprites re-render on the next update if it changed.
 
-            Output:
-            players (dict): both clases of players
+                Input:
+                none
 
-            '''
-            # Swap y-positions
-            player1.y_pos, player2.y_pos = player2.y_pos, player1.y_pos
+                Output:
+                none
+                '''
+                for side, player in enumerate((self.player1, self.player2)):
+                    player.points = self.match.display_points(side)
+                    player.games = self.match.games[side]
+                    player.set = self.match.sets[side]
 
-            # Swap drawing order by swapping rects
-            player1.rect.topleft = (player1.x_pos, player1.y_pos)
-            player2.rect.topleft = (player2.x_pos, player2.y_pos)
+        # Switch sides function.
+        def switch_sides(self):
+                '''
+                Description:
+                Switches the position, and colors of both teams.
 
-            # Swap players in group to update rendering order
-            players.empty()
-            players.add(player1, player2)
+                Input:
+                none
 
-            player1.update()
-            player2.update()
+                Output:
+                players (Group): both clases of players
+                '''
+                # Swap y-positions
+                self.player1.y_pos, self.player2.y_pos = self.player2.y_pos, self.player1.y_pos
 
-            return players
-        
-        # Score points.
-        def score_point(player, opponent):
-            '''
-            Description:
-            Scores the points, games and sets.
+                # Moving the sprites marks them dirty.
+                self.player1.update()
+                self.player2.update()
 
-            Inputs:
-            player (obj): Player which the button will affect.
-            opponent (obj): Other player.
+                return self.players
 
-            Ouput:
-            player (obj): player with updated points.
-            opponent (obj): opponent with updated points.
-            '''
-            nonlocal match_started, start_time, elapsed_time, winner, winner_start_time
-            #Only starts if match has started.
-            if not match_started:
-                return  
-
-            # Set Dictionary of scores and update players.
-            score_steps = [0, 15, 30, 40]
-            player.update()
-            opponent.update()
-
-            #If both players have 'AD', reset to deuce (40-40) and stop scoring
-            if player.points == 'AD' and opponent.points == 'AD':
-                player.points = 40
-                opponent.points = 40
-                player.update()
-                opponent.update()
-                return  # Exit immediately to prevent further scoring
-            
-            #If player has 'AD' and opponent scores, reset to 40-40
-            if player.points == 40 and opponent.points == 'AD':
-                player.points = 40
-                opponent.points = 40
-                player.update()
-                opponent.update()
-                return
-
-            #If both players have 40 points (deuce), and player scores
-            if player.points == 40 and opponent.points == 40:
-                player.points = 'AD'
-
-            #If player already has advantage and scores again → wins game
-            elif player.points == 'AD':
-                player.points = 'Game'
-            
-            nonlocal sudden_death
-            if player.games == 6 and opponent.games == 6:
-                sudden_death = True
-
-            if sudden_death:
-                # Increment point by 1
-                if isinstance(player.points, int):
-                    player.points += 1
-                else:
-                    player.points = 1
-                
-                  # Check for win (must win by 2 points and have at least 7)
-                if player.points >= 7 and (player.points - opponent.points) >= 2:
-                    player.set += 1
-                    sudden_death = False  # reset sudden death
-                    player.reset_game()
-                    opponent.reset_game()
-                    player.reset_points()
-                    opponent.reset_points()
-                    
-
-            #Normal scoring steps (0 → 15 → 30 → 40)
-            elif player.points in score_steps:
-                idx = score_steps.index(player.points)
-                if idx < len(score_steps) - 1:
-                    player.points = score_steps[idx + 1]
-                else:
-                    # Player reached 40 but opponent less than 40 → player wins game
-                    if opponent.points != 40:
-                        player.points = 'Game'
-                    else:
-                        player.points = 40
-
-            if player.games == 6 and opponent.games <= 4:
-                player.reset_game()
-                opponent.reset_game()
-                player.reset_points()
-                opponent.reset_points()
-                player.set +=1
-
-            elif player.games == 7 and opponent.games >= 5:
-                player.reset_game()
-                opponent.reset_game()
-                player.reset_points()
-                opponent.reset_points()
-                player.set += 1
-
-            # 5) If player wins the game, increase games and reset points for both
-            if player.points == 'Game':
-                player.games += 1
-                player.reset_points()
-                opponent.reset_points()
-            
-            if player.set == 2:
-                winner = player.name + " Ganador"
-                winner_start_time = pygame.time.get_ticks()
-
-                p1_score = f"{player1.set}-{player1.games}-{player1.points}"
-                p2_score = f"{player2.set}-{player2.games}-{player2.points}"
-                
+        # Sends the current score to the outbox.
+        def export_result(self):
+                p1_score = f"{self.player1.set}-{self.player1.games}-{self.player1.points}"
+                p2_score = f"{self.player2.set}-{self.player2.games}-{self.player2.points}"
+                self.save_result(p1_score, p2_score)
 
-                ptexp.export_to_google_sheets(winner, p1_score, p2_score, elapsed_time,user_license, version_number)
+        # Saves a result in the outbox and the local history.
+        def save_result(self, p1_score, p2_score):
+                '''
+                Description:
+                Queues the result for the export and records it with its
+                statistics in the store. Neither waits on the disk or the
+                network.
 
-                match_started, start_time, elapsed_time = reset_timer(match_started, start_time, elapsed_time)
-                player.reset_game()
-                opponent.reset_game()
-                player.reset_points()
-                opponent.reset_points()
-                player.reset_set()
-                opponent.reset_set()
-                
+                Input:
+                p1_score (str): "set-games-points" of player 1.
+                p2_score (str): "set-games-points" of player 2.
 
+                Output:
+                None
+                '''
+                stats = self.stats.summary()
+                self.outbox.put(self.winner, p1_score, p2_score, self.elapsed_time, user_license, version_number,
+                                court=self.label, stats=stats, started=self.stats.started_at)
+                if self.store:
+                    self.store.add_match(self.winner, p1_score, p2_score, self.elapsed_time, user_license, version_number,
+                                         court=self.index, label=self.label, started=self.stats.started_at,
+                                         winner_side=self.match.winner, stats=stats)
 
-            
+        # Score points.
+        def score_point(self, player, opponent):
+                '''
+                Description:
+                Scores the points, games and sets.
 
-            player.update()
-            opponent.update()
+                Inputs:
+                player (obj): Player which the button will affect.
+                opponent (obj): Other player.
 
-            return player, opponent, winner, winner_start_time
+                Ouput:
+                None
+                '''
+                #Only starts if match has started.
+                if not self.match_started:
+                    return
+                begin = time.perf_counter()
 
+                # The rule tables do the scoring, player1 is side 0.
+                side = 0 if player is self.player1 else 1
+                before = self.match
+                self.match = scoring.point(before, side)
+                self.journal.point(side)
+                self.stats.point(before, self.match, side)
 
+                if self.match.winner is not None:
+                    self.winner = player.name + " Ganador"
+                    self.winner_start_time = pygame.time.get_ticks()
+                    frame_governor.burst(con.WINNER_FADE_DURATION)
 
-        # While loop that keeps the app running.
-        while run:
-                #Each event in pygame it checks it.
-                for event in pygame.event.get():
+                    self.save_result(self.match.score(0), self.match.score(1))
 
-                    #If it quits, it quits.
-                    if event.type == pygame.QUIT:
-                        p1_score = f"{player1.set}-{player1.games}-{player1.points}"
-                        p2_score = f"{player2.set}-{player2.games}-{player2.points}"
-                        ptexp.export_to_google_sheets(winner, p1_score, p2_score, elapsed_time,user_license, version_number)
-                        os.system("v01_updater_lanh.py")
-                        print ('updating software')
-                        quit()
+                    self.reset_timer()
 
-                    #Checks if a key is pressed.
-                    elif event.type == pygame.KEYDOWN:
-                        last_input_time = time.time()
-                        # Clear winner if LEFT, RIGHT or ENTER is pressed
-                        if winner and event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_RETURN]:
-                            winner = None
-                            winner_start_time = None
-
-                        # Point if left key is pressed to the player who controls it. 
-                        if event.key == pygame.K_LEFT and not score_key_pressed:
-                            if player1_controls_left:
-                                score_point(player1, player2)
-                                con.peep_sound.play()
-                            else:
-                                score_point(player2, player1)
-                                con.peep_sound.play()
-                            score_key_pressed = True
-                            score_key_time = pygame.time.get_ticks()
-
-                        # Point if right key is pressed to the player who controls it. 
-                        elif event.key == pygame.K_RIGHT and not score_key_pressed:
-                            if player1_controls_left:
-                                score_point(player2, player1)
-                                con.peep_sound.play()
-                            else:
-                                score_point(player1, player2)
-                                con.peep_sound.play()
-                            score_key_pressed = True
-                            score_key_time = pygame.time.get_ticks()
-                        
-                        
-
-                        # Enter to start time, if it has started and pressed it resets.
-                        elif event.key == pygame.K_RETURN:
-                            if not match_started:
-                                start_time, match_started = start_timer(match_started, start_time)
-                                con.bell_sound.play()
-                            else:
-                                p1_score = f"{player1.set}-{player1.games}-{player1.points}"
-                                p2_score = f"{player2.set}-{player2.games}-{player2.points}"
-                                ptexp.export_to_google_sheets(winner, p1_score, p2_score, elapsed_time,user_license, version_number)
-                                enter_key_held = True
-                                enter_start_time = pygame.time.get_ticks()
-
-                        #Checks if players control left, and switches sides.
-                        elif event.key == pygame.K_SPACE:
-                            switch_sides()
-                            player1_controls_left = not player1_controls_left
+                self.show_score()
+                player.update()
+                opponent.update()
+                frame_profiler.add("score_point", time.perf_counter() - begin)
 
-                        #Quits the game if escape is pressed.
-                        elif event.key == pygame.K_ESCAPE:
-                            p1_score = f"{player1.set}-{player1.games}-{player1.points}"
-                            p2_score = f"{player2.set}-{player2.games}-{player2.points}"
-                            ptexp.export_to_google_sheets(winner, p1_score, p2_score, elapsed_time,user_license, version_number)
-                            os.system("v01_updater_lanh.py")
-                            print ('updating software')
-                            quit()
+        # Next time an overlay (winner, enter hold) expires.
+        def deadlines(self):
+                '''
+                Description:
+                Tick times when the court needs a wake up. The score lockout
+                is checked when a key arrives, it needs no wake up.
 
-                    #It resets the enter_key_held back to false after it releases.
-                    elif event.type == pygame.KEYUP:
-                        if event.key == pygame.K_RETURN:
-                            enter_key_held = False
-                
-                                     
-                 # Updating the game tick in fps values, and updating display.
-                clock.tick(fps)
+                Input:
+                None
 
-                # Draws the background
-                con.win.blit(background, (0, 0))
+                Output:
+                deadlines (list): Times in pygame ticks.
+                '''
+                deadlines = []
+                if self.winner:
+                    deadlines.append(self.winner_start_time + con.WINNER_DISPLAY_DURATION)
+                    if pygame.time.get_ticks() < self.winner_start_time + con.WINNER_FADE_DURATION:
+                        deadlines.append(self.winner_start_time + con.WINNER_FADE_DURATION)
+
+                # Last frame of the transitions.
+                for player in self.players:
+                    if player.strip is not None:
+                        deadlines.append(player.strip_start + player.strip.duration)
+                if self.enter_key_held:
+                    deadlines.append(self.enter_start_time + ENTER_HOLD_DURATION)
+                return deadlines
+
+        # Handles a key of the court (score, start, reset, switch).
+        def key_down(self, event):
+                '''
+                Description:
+                Applies a key press from the keyboard or a controller.
 
+                Input:
+                event (pygame.event.Event): The KEYDOWN event.
 
-                # Update and draw players
-                players.update()                
-                players.draw(con.win)
+                Output:
+                None
+                '''
+                self.last_input_time = time.time()
+                # Clear winner if LEFT, RIGHT or ENTER is pressed
+                if self.winner and event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_RETURN]:
+                    self.winner = None
+                    self.winner_start_time = None
+
+                # Keyboard score keys are locked for a while after a press.
+                # Controller inputs were already debounced by the reader.
+                score_key_pressed = self.score_keys.locked(event)
+
+                # Point if left key is pressed to the player who controls it.
+                if event.key == pygame.K_LEFT and not score_key_pressed:
+                    if self.player1_controls_left:
+                        self.score_point(self.player1, self.player2)
+                        con.peep_sound.play()
+                    else:
+                        self.score_point(self.player2, self.player1)
+                        con.peep_sound.play()
+
+                # Point if right key is pressed to the player who controls it.
+                elif event.key == pygame.K_RIGHT and not score_key_pressed:
+                    if self.player1_controls_left:
+                        self.score_point(self.player2, self.player1)
+                        con.peep_sound.play()
+                    else:
+                        self.score_point(self.player1, self.player2)
+                        con.peep_sound.play()
+
+                # Enter to start time, if it has started and pressed it resets.
+                elif event.key == pygame.K_RETURN:
+                    if not self.match_started:
+                        self.start_timer()
+                        con.bell_sound.play()
+                    else:
+                        self.export_result()
+                        self.enter_key_held = True
+                        self.enter_start_time = pygame.time.get_ticks()
+
+                #Checks if players control left, and switches sides.
+                elif event.key == pygame.K_SPACE:
+                    self.switch_sides()
+                    self.player1_controls_left = not self.player1_controls_left
+                    self.journal.switch()
+
+        #It resets the enter_key_held back to false after it releases.
+        def key_up(self, event):
+                if event.key == pygame.K_RETURN:
+                    self.enter_key_held = False
+
+        # Updates the sprites of the court.
+        def update(self, current_time):
+                '''
+                Description:
+                Updates the players, the clock, the timer and the overlays.
+                Sprites only change (and get dirty) when their text changed.
 
-                # Get current time as a string
-                current_time = datetime.now().strftime("%H:%M:%S")
+                Input:
+                current_time (str): Wall clock, "HH:MM:SS".
+
+                Output:
+                None
+                '''
+                # Update players, they are drawn with the other sprites.
+                self.players.update()
+                frame_profiler.lap("players")
 
                 # Reset timer for inactivity.
-                if match_started and (time.time() - last_input_time > 1800):
+                if self.match_started and (time.time() - self.last_input_time > 1800):
                     print("🔁 Match reset due to 30 minutes of inactivity.")
 
-                    match_started = False
-                    last_input_time = time.time()
-                    p1_score = f"{player1.set}-{player1.games}-{player1.points}"
-                    p2_score = f"{player2.set}-{player2.games}-{player2.points}"
-                    ptexp.export_to_google_sheets(winner, p1_score, p2_score, elapsed_time, user_license, version_number)
-                    match_started, start_time, elapsed_time = reset_timer(match_started, start_time, elapsed_time)
-
-                # Render the time.
-                time_surface = con.time_font.render(
-                                            current_time, 
-                                            True, 
-                                            con.dark_gray
-                                                 )
-                con.win.blit(time_surface, (100, 50))
+                    self.match_started = False
+                    self.last_input_time = time.time()
+                    self.export_result()
+                    self.reset_timer()
+
+                # Render the time, only when the text changes.
+                self.clock_sprite.set_text(current_time)
 
                 #It gets the time it has transcured minus the start time in seconds.
-                if match_started:
-                    elapsed_time = (pygame.time.get_ticks() - start_time) // 1000
+                if self.match_started:
+                    self.elapsed_time = (pygame.time.get_ticks() - self.start_time) // 1000
 
                 #It gets the minutes and the seconds and formats it.
-                minutes = elapsed_time // 60
-                seconds = elapsed_time % 60
+                minutes = self.elapsed_time // 60
+                seconds = self.elapsed_time % 60
                 formatted_time = f"{minutes:02}:{seconds:02}"
 
                 # Render the timer text
-                timer_surface = con.time_font.render(
-                                                f"          T: {formatted_time}", 
-                                                True, 
-                                                con.dark_gray
-                                                  )
-                
-                # Render the labels
-                puntos_label_p1 = con.label_font.render(
-                                            "     SETS    JUEGOS  PUNTOS", 
-                                                        True, 
-                                                        con.dark_gray
-                                                        )
-                con.win.blit(puntos_label_p1, (500, 200))  
-                
-                #It resets the game.
-                if player1.set == 2:
-                    con.win.blit(player1.image, player1.rect)
-                elif player2.set == 2:
-                    con.win.blit(player2.image, player2.rect)
-
-                # Adjust position if needed of the timer and the logo.
-                con.win.blit(timer_surface, (center_x + 190, 50))
-                con.win.blit(con.logo_img, con.logo_rect) 
+                self.timer_sprite.set_text(formatted_time)
+                frame_profiler.lap("texts")
 
                 # Check if Enter has been held long enough
-                if enter_key_held:
-                    if pygame.time.get_ticks() - enter_start_time >= ENTER_HOLD_DURATION:
+                if self.enter_key_held:
+                    if pygame.time.get_ticks() - self.enter_start_time >= ENTER_HOLD_DURATION:
                         #print("Resetting match due to Enter hold")
-                        match_started, start_time, elapsed_time = reset_timer(match_started, start_time, elapsed_time)
-                        enter_key_held = False
+                        self.reset_timer()
+                        self.enter_key_held = False
 
-                # It checks if the score button has been pressed.
-                if pygame.time.get_ticks() - score_key_time > score_pressed_duration:
-                    score_key_pressed = False
+                # Hides the winner once its display time is over.
+                if self.winner and pygame.time.get_ticks() - self.winner_start_time >= con.WINNER_DISPLAY_DURATION:
+                    self.winner = None
+                    self.winner_start_time = None
 
-                # Draws the victory
-                if winner:
-                    # Create the winner text surface with a smaller font
-                    winner_surface = small_font.render(winner, True, (255, 255, 255))  # White text
-                    winner_rect = winner_surface.get_rect(center=(con.width // 2, con.height // 2))
+                # Draws the victory, fading in.
+                if self.winner:
+                    self.winner_sprite.show(self.winner, pygame.time.get_ticks() - self.winner_start_time)
+                else:
+                    self.winner_sprite.hide()
+                frame_profiler.lap("winner")
 
-                    # Draw a semi-transparent dark grey background behind the text
-                    bg_width = winner_rect.width + 40
-                    bg_height = winner_rect.height + 20
+        # Draws the sprites that changed.
+        def draw(self):
+                '''
+                Description:
+                Redraws only the changed regions of the court.
 
-                    # Create surface for background box
-                    background_box = pygame.Surface((bg_width, bg_height), pygame.SRCALPHA)
-                    background_box.fill((30, 30, 30, 200))  # Dark grey with alpha (0–255)
+                Input:
+                None
 
-                    # Get background position
-                    background_rect = background_box.get_rect(center=winner_rect.center)
+                Output:
+                dirty_rects (list): Changed rects, in window coordinates.
+                '''
+                # Full repaint when dirty rendering is turned off.
+                if not con.DIRTY_RENDERING:
+                    self.repaint()
+                return [rect.move(self.region.topleft) for rect in self.sprites.draw(self.surface)]
 
-                    # Blit the background first, then the text
-                    con.win.blit(background_box, background_rect)
-                    con.win.blit(winner_surface, winner_rect) 
-                
-                # in main loop (or right before it)
-                pygame.display.update()
+        # Score of the court for the live score server.
+        def snapshot(self):
+                '''
+                Description:
+                The score as shown on screen, the server only sends the
+                keys that changed.
+
+                Input:
+                None
+
+                Output:
+                state (dict): Teams, points, games, sets, timer, winner and
+                              the statistics of the match.
+                '''
+                return {
+                    "label": self.label,
+                    "teams": [self.player1.name, self.player2.name],
+                    "points": [self.player1.points, self.player2.points],
+                    "games": [self.player1.games, self.player2.games],
+                    "sets": [self.player1.set, self.player2.set],
+                    "timer": self.timer_sprite.text,
+                    "winner": self.winner,
+                    "stats": self.stats.summary(),
+                }
+
+        # Saves and closes the journal.
+        def close(self):
+                self.export_result()
+                self.journal.close()
+
+# Creates the courts of this computer.
+def create_courts(outbox, store=None):
+    '''
+    Description:
+    One court per region of the window, from COURT_REGIONS or a grid.
+    With a single court it takes the whole window, as before.
+
+    Input:
+    outbox (ExportOutbox): Outbox of the results, shared.
+    store (MatchStore): Local history of the matches, shared.
+
+    Output:
+    courts_list (list): The courts.
+    '''
+    if con.COURT_REGIONS:
+        regions = [pygame.Rect(region) for region in con.COURT_REGIONS[:court_count]]
+    else:
+        regions = courts.split_regions(con.win.get_size(), court_count)
+    window = con.win.get_rect()
+    courts_list = []
+    for index, region in enumerate(regions):
+        label = f"Pista {index + 1}" if len(regions) > 1 else None
+        courts_list.append(Court(index, region.clip(window), outbox, label, store))
+    return courts_list
+
+# Closes the courts and the app.
+def quit_app(courts_list, outbox, streamer=None, store=None):
+    for court in courts_list:
+        court.close()
+    stats_archive.close()
+    if store:
+        store.close()
+    if streamer:
+        streamer.close()
+    latency.dump(con.LATENCY_LOG_PATH)
+    frame_profiler.dump(con.FRAME_PROFILE_LOG_PATH)
+    print(frame_governor.report())
+    outbox.close()
+    os.system("v01_updater_lanh.py")
+    print ('updating software')
+    quit()
+
+# Runs the app
+def main():
+        # Set the Game run settings. Attaches image to window.
+        run = True
+
+        # The loop sleeps until an input, a clock tick or an overlay expires.
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+        arm_clock_tick()
+
+        # Results are exported in the background from an outbox on disk.
+        if con.EXPORT_BATCH_URL:
+            outbox = exo.ExportOutbox(con.OUTBOX_PATH, exo.http_sender(con.EXPORT_BATCH_URL))
+        else:
+            outbox = exo.ExportOutbox(con.OUTBOX_PATH, exo.ptexp_sender, batch_size=1)
+
+        # Local history of the matches, pushed upstream in chunks when online.
+        store = None
+        if con.STORE_PATH:
+            store = mstore.MatchStore(con.STORE_PATH)
+            if con.STORE_SYNC_URL:
+                store.start_sync(exo.http_sender(con.STORE_SYNC_URL), user_license,
+                                 con.STORE_SYNC_CHUNK, con.STORE_SYNC_INTERVAL)
+
+        # One scoreboard per court, they share fonts, glyphs and rendered players.
+        courts_list = create_courts(outbox, store)
+        player_surface_cache.max_size = 16 * len(courts_list)
+        player_transition_cache.max_size = 4 * len(courts_list)
+
+        # Court of the keyboard, changed with 1-9 when there are many.
+        keyboard_court = courts_list[0]
+
+        # Debug overlay with the input latency, toggled with F3.
+        first_court = courts_list[0]
+        latency_sprites = []
+        for i in range(len(lat.LatencyTracker.SEGMENTS)):
+            line_y = first_court.region.height - 30 * (len(lat.LatencyTracker.SEGMENTS) - i) - 10
+            line_sprite = render.TextSprite(con.debug_font, con.black, (20, line_y))
+            line_sprite.visible = 0
+            latency_sprites.append(line_sprite)
+        first_court.sprites.add(*latency_sprites, layer=2)
+
+        # Frame profile overlay, toggled with F5 with the profiler.
+        profile_sprites = []
+        for i in range(12):
+            line_sprite = render.TextSprite(con.debug_font, con.black, (first_court.region.width - 560, 20 + 30 * i))
+            line_sprite.visible = 0
+            profile_sprites.append(line_sprite)
+        first_court.sprites.add(*profile_sprites, layer=2)
+
+        # Frames of the window for a stream overlay.
+        streamer = None
+        if con.STREAM_OUTPUT:
+            sink = frame_stream.open_sink(con.STREAM_OUTPUT, con.win.get_size())
+            if sink:
+                streamer = frame_stream.FrameStreamer(con.win, sink, con.STREAM_FPS)
+
+        # Live score for phones and websites, served from its own thread.
+        live = None
+        if con.LIVE_SCORE_PORT:
+            live = live_score.LiveScoreServer(con.LIVE_SCORE_HOST, con.LIVE_SCORE_PORT)
+            live.start()
+
+        # Draws the first frame right away, then loads the sounds.
+        for court in courts_list:
+            court.draw()
+        pygame.display.update()
+        if streamer:
+            streamer.drawn([con.win.get_rect()])
+        con.resources.preload("peep_sound", "bell_sound")
+        print(con.profiler.report())
+
+        # While loop that keeps the app running.
+        while run:
+                # Next time an overlay (winner, enter hold) expires or,
+                # during a transition, the next frame.
+                deadlines = []
+                for court in courts_list:
+                    deadlines += court.deadlines()
+                if streamer and streamer.deadline():
+                    deadlines.append(streamer.deadline())
+
+                # Sleeps until something happens, without polling.
+                wait_ms = frame_governor.wait_ms(deadlines)
+                if wait_ms is not None:
+                    first_event = pygame.event.wait(max(1, wait_ms))
+                else:
+                    first_event = pygame.event.wait()
+                frame_profiler.begin()
+
+                #Each event in pygame it checks it.
+                for event in [first_event] + pygame.event.get():
+
+                    # Once per second, re-arms the clock for the next one.
+                    if event.type == CLOCK_TICK_EVENT:
+                        arm_clock_tick()
+
+                    # The window was uncovered or resized, repaint it all.
+                    elif event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+                        for court in courts_list:
+                            court.repaint()
+
+                    #If it quits, it quits.
+                    elif event.type == pygame.QUIT:
+                        quit_app(courts_list, outbox, streamer, store)
+
+                    #Checks if a key is pressed.
+                    elif event.type == pygame.KEYDOWN:
+                        # Controllers score on their court, the keyboard on the selected one.
+                        port = getattr(event, 'port', None)
+                        if port is not None:
+                            court = courts_list[court_router.assign(port)]
+                        else:
+                            court = keyboard_court
+
+                        #Quits the game if escape is pressed.
+                        if event.key == pygame.K_ESCAPE:
+                            quit_app(courts_list, outbox, streamer, store)
+
+                        # Shows or hides the latency overlay.
+                        elif event.key == pygame.K_F3:
+                            for line_sprite in latency_sprites:
+                                line_sprite.visible = not line_sprite.visible
+
+                        # Writes the latency summary to the log.
+                        elif event.key == pygame.K_F4:
+                            latency.dump(con.LATENCY_LOG_PATH)
+
+                        # Starts or stops the frame profiler and its overlay.
+                        elif event.key == pygame.K_F5:
+                            visible = frame_profiler.toggle()
+                            for line_sprite in profile_sprites:
+                                line_sprite.visible = visible
+                            if not visible:
+                                frame_profiler.dump(con.FRAME_PROFILE_LOG_PATH)
+
+                        # Selects the court of the keyboard.
+                        elif port is None and pygame.K_1 <= event.key < pygame.K_1 + min(len(courts_list), 9):
+                            if len(courts_list) > 1:
+                                keyboard_court = courts_list[event.key - pygame.K_1]
+                                print(f"Keyboard -> {keyboard_court.label}")
+
+                        else:
+                            court.key_down(event)
+
+                        # Stamps controller inputs once they are handled.
+                        latency.handled(event)
+
+                    #It resets the enter_key_held back to false after it releases.
+                    elif event.type == pygame.KEYUP:
+                        keyboard_court.key_up(event)
+
+                frame_profiler.lap("events")
+
+                # Get current time as a string
+                current_time = datetime.now().strftime("%H:%M:%S")
+
+                # Each court only redraws the sprites that changed.
+                dirty_rects = []
+                for court in courts_list:
+                    court.update(current_time)
+
+                    # Latency and frame profile overlays.
+                    if court is first_court:
+                        if latency_sprites[0].visible:
+                            for line_sprite, line in zip(latency_sprites, latency.summary_lines()):
+                                line_sprite.set_text(line)
+                        if profile_sprites[0].visible:
+                            lines = frame_profiler.summary_lines()
+                            for i, line_sprite in enumerate(profile_sprites):
+                                line_sprite.set_text(lines[i] if i < len(lines) else "")
+                        frame_profiler.lap("overlays")
+
+                    # Restores the background under the changed sprites and blits them.
+                    dirty_rects += court.draw()
+                    frame_profiler.lap("draw")
+
+                    # Sends what changed to the live score subscribers.
+                    if live:
+                        live.publish(court.index, court.snapshot())
+                        frame_profiler.lap("live")
+
+                # Updates just the changed regions.
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+                latency.flipped()
+                frame_profiler.lap("display")
+
+                # Sends the frame to the stream if it changed.
+                if streamer:
+                    streamer.drawn(dirty_rects)
+                    frame_profiler.lap("stream")
+                frame_governor.frame_drawn()
+                frame_profiler.end_frame()
                 
 
 if __name__ == '__main__':
@@ -807,7 +1219,8 @@ if __name__ == '__main__':
     user_license = str(lkey.license_key)  # Could load this from a file or user input
 
     # Gets the user name and cheks if its valid from the function.
-    is_valid, message = check_license(user_license)
+    with con.profiler.phase("license"):
+        is_valid, message = check_license(user_license)
     print(message)
 
     #If the license isvalid.
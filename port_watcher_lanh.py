@@ -0,0 +1,136 @@
+import socket
+import sys
+import threading
+import time
+
+
+# Netlink protocol of the kernel device events (linux/netlink.h).
+NETLINK_KOBJECT_UEVENT = 15
+
+
+# Thread safe set of the connected ports.
+class PortRegistry:
+        def __init__(self):
+                '''
+                Description:
+                Keeps the ports that are connected. It is shared by the
+                hotplug watcher and the serial reader, so every access goes
+                through a lock.
+
+                Inputs:
+                None
+
+                Output:
+                A port registry class
+                '''
+                self._ports = set()
+                self._lock = threading.Lock()
+
+        def add(self, port):
+                with self._lock:
+                    self._ports.add(port)
+
+        def discard(self, port):
+                with self._lock:
+                    self._ports.discard(port)
+
+        def __contains__(self, port):
+                with self._lock:
+                    return port in self._ports
+
+        def __len__(self):
+                with self._lock:
+                    return len(self._ports)
+
+        # Copy of the connected ports.
+        def snapshot(self):
+                with self._lock:
+                    return set(self._ports)
+
+
+# Splits a kernel uevent into its action and fields.
+def parse_uevent(message):
+    '''
+    Description:
+    A kernel uevent looks like "add@/devices/...\\0ACTION=add\\0SUBSYSTEM=tty\\0...".
+
+    Input:
+    message (bytes): The uevent as received from netlink.
+
+    Output:
+    fields (dict): KEY=VALUE pairs of the event, empty if it is not one.
+    '''
+    parts = message.split(b"\0")
+    if b"@" not in parts[0]:
+        return {}
+    fields = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition(b"=")
+        if sep:
+            fields[key.decode(errors='ignore')] = value.decode(errors='ignore')
+    return fields
+
+
+# Calls back when a serial device is plugged or unplugged.
+class HotplugWatcher:
+        def __init__(self, on_add, on_remove, poll_interval=2):
+                '''
+                Description:
+                Sleeps on the kernel netlink uevents and calls back as soon
+                as a tty device is added or removed. On systems without
+                netlink it falls back to calling on_add every poll_interval
+                seconds, the way ports were found before.
+
+                Inputs:
+                on_add (function): Called with the device, e.g. /dev/ttyUSB0.
+                on_remove (function): Called with the device that was removed.
+                poll_interval (float): Seconds between scans in the fallback.
+
+                Output:
+                A hotplug watcher class
+                '''
+                self.on_add = on_add
+                self.on_remove = on_remove
+                self.poll_interval = poll_interval
+                self.events = 0
+
+        # Opens the netlink socket, None if the system does not have it.
+        def _open_netlink(self):
+                if not sys.platform.startswith("linux"):
+                    return None
+                try:
+                    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+                    sock.bind((0, 1))  # Group 1: events sent by the kernel.
+                    return sock
+                except OSError as e:
+                    print(f"Hotplug events not available ({e}), scanning ports instead")
+                    return None
+
+        # Waits for devices forever.
+        def run(self):
+                '''
+                Description:
+                Blocks on the device events, costing nothing while idle.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                sock = self._open_netlink()
+                if sock is None:
+                    while True:
+                        self.on_add(None)
+                        time.sleep(self.poll_interval)
+
+                while True:
+                    fields = parse_uevent(sock.recv(16384))
+                    if fields.get("SUBSYSTEM") != "tty" or "DEVNAME" not in fields:
+                        continue
+                    self.events += 1
+                    device = "/dev/" + fields["DEVNAME"]
+                    if fields.get("ACTION") == "add":
+                        self.on_add(device)
+                    elif fields.get("ACTION") == "remove":
+                        self.on_remove(device)
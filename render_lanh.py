@@ -0,0 +1,386 @@
+import pygame
+from collections import OrderedDict
+import animation_lanh as anim
+
+
+# Bounded LRU cache for rendered surfaces.
+class SurfaceCache:
+        def __init__(self, max_size=64):
+                '''
+                Description:
+                Keeps the most recently used rendered surfaces so that a redraw
+                with an unchanged key costs a single dict lookup.
+
+                Inputs:
+                max_size (int): Maximum amount of surfaces kept in memory.
+
+                Output:
+                A surface cache class
+                '''
+                self.max_size = max_size
+                self.hits = 0
+                self.misses = 0
+                self._surfaces = OrderedDict()
+
+        # Gets a surface from the cache or renders it.
+        def get(self, key, render):
+                '''
+                Description:
+                Returns the cached surface for the key, calling render() only
+                when the key is not cached yet.
+
+                Inputs:
+                key (tuple): Hashable description of what is drawn.
+                render (function): Builds the surface on a cache miss.
+
+                Output:
+                surface (pygame.Surface): The cached or freshly rendered surface.
+                '''
+                surface = self._surfaces.get(key)
+                if surface is not None:
+                    self.hits += 1
+                    self._surfaces.move_to_end(key)
+                    return surface
+
+                self.misses += 1
+                surface = render()
+                self._surfaces[key] = surface
+
+                # Drops the least recently used surface when full.
+                if len(self._surfaces) > self.max_size:
+                    self._surfaces.popitem(last=False)
+                return surface
+
+        # Empties the cache, e.g. after the fonts or the layout change.
+        def clear(self):
+                '''
+                Description:
+                Removes every cached surface and resets the counters.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                self._surfaces.clear()
+                self.hits = 0
+                self.misses = 0
+
+        def __len__(self):
+                return len(self._surfaces)
+
+        # Cache counters for debugging.
+        def stats(self):
+                '''
+                Description:
+                Returns the hit and miss counters of the cache.
+
+                Input:
+                None
+
+                Output:
+                stats (dict): hits, misses, size and hit ratio.
+                '''
+                total = self.hits + self.misses
+                return {
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "size": len(self._surfaces),
+                    "hit_ratio": self.hits / total if total else 0.0,
+                }
+
+
+# Sprite for a single line of text that changes now and then (clock, timer).
+class TextSprite(pygame.sprite.DirtySprite):
+        def __init__(self, font, color, topleft, text=""):
+                '''
+                Description:
+                A line of text that is only rendered again when the text
+                changes, marking the sprite dirty.
+
+                Inputs:
+                font (pygame.font.Font): Font used to render the text.
+                color (tuple): Color of the text.
+                topleft (tuple): Position of the text on screen.
+                text (str): First text to display.
+
+                Output:
+                A text sprite class
+                '''
+                pygame.sprite.DirtySprite.__init__(self)
+                self.font = font
+                self.color = color
+                self.topleft = topleft
+                self.text = None
+                self.image = None
+                self.rect = None
+                self.set_text(text)
+
+        # Changes the text, re-rendering only if it is different.
+        def set_text(self, text):
+                '''
+                Description:
+                Renders the new text when it differs from the current one.
+
+                Input:
+                text (str): Text to display.
+
+                Output:
+                changed (bool): True if the sprite was re-rendered.
+                '''
+                if text == self.text:
+                    return False
+                self.text = text
+                self.image = self.font.render(text, True, self.color)
+                self.rect = self.image.get_rect(topleft=self.topleft)
+                self.dirty = 1
+                return True
+
+
+# Sprite for the winner banner over a semi-transparent box.
+class BannerSprite(pygame.sprite.DirtySprite):
+        def __init__(self, font, center, fade_ms=0):
+                '''
+                Description:
+                The winner banner. It is hidden until show() is called. The
+                fade in is rendered once per text as a frame strip.
+
+                Inputs:
+                font (pygame.font.Font): Font used for the banner text.
+                center (tuple): Center of the banner on screen.
+                fade_ms (int): Length of the fade in, 0 for none.
+
+                Output:
+                A banner sprite class
+                '''
+                pygame.sprite.DirtySprite.__init__(self)
+                self.font = font
+                self.center = center
+                self.fade_ms = fade_ms
+                self.text = None
+                self.strip = None
+                self.final = pygame.Surface((1, 1), pygame.SRCALPHA)
+                self.image = self.final
+                self.rect = self.image.get_rect(center=center)
+                self.visible = 0
+
+        # Shows the banner with the given text.
+        def show(self, text, elapsed=None):
+                '''
+                Description:
+                Renders the text over a dark grey box and makes it visible.
+                While it fades in, the frame of the elapsed time is shown.
+
+                Input:
+                text (str): Text of the banner.
+                elapsed (int): ms since the banner appeared, None for the
+                               final look.
+
+                Output:
+                None
+                '''
+                if text != self.text:
+                    self.text = text
+                    text_surface = self.font.render(text, True, (255, 255, 255))
+
+                    # Semi-transparent dark grey box behind the text.
+                    self.final = pygame.Surface(
+                                    (text_surface.get_width() + 40,
+                                     text_surface.get_height() + 20),
+                                    pygame.SRCALPHA
+                                    )
+                    self.final.fill((30, 30, 30, 200))
+                    self.final.blit(text_surface, (20, 10))
+                    self.strip = anim.fade_in_strip(self.final, self.fade_ms) if self.fade_ms else None
+                    self.rect = self.final.get_rect(center=self.center)
+                    self.dirty = 1
+
+                # One blit of a pre-rendered frame while it fades in.
+                if self.strip is not None and elapsed is not None:
+                    image = self.strip.frame_at(elapsed)
+                else:
+                    image = self.final
+                if image is not self.image:
+                    self.image = image
+                    self.dirty = 1
+                self.visible = 1
+
+        # Hides the banner.
+        def hide(self):
+                '''
+                Description:
+                Hides the banner, the group restores the background under it.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                self.visible = 0
+
+
+# Bakes the parts that never change into one background surface.
+def compose_static_layer(size, parts):
+        '''
+        Description:
+        Blits every static part (background image, labels, logo) once into a
+        single surface in the display pixel format.
+
+        Inputs:
+        size (tuple): Size of the layer, normally the window size.
+        parts (list): (surface, position) pairs, drawn in order.
+
+        Output:
+        layer (pygame.Surface): The composed background.
+        '''
+        layer = pygame.Surface(size)
+        for surface, position in parts:
+            layer.blit(surface, position)
+        return layer.convert()
+
+
+# Pre-rendered glyphs to draw numbers without rendering text.
+class GlyphAtlas:
+        def __init__(self, font, color, chars="0123456789:"):
+                '''
+                Description:
+                Renders each character once. Digits share the widest digit
+                width so a number never changes size or jitters on screen.
+
+                Inputs:
+                font (pygame.font.Font): Font used for the glyphs.
+                color (tuple): Color of the glyphs.
+                chars (str): Characters in the atlas.
+
+                Output:
+                A glyph atlas class
+                '''
+                self.glyphs = {}
+                self.widths = {}
+                digit_width = max(font.size(digit)[0] for digit in "0123456789")
+                for char in chars:
+                    glyph = font.render(char, True, color)
+                    self.glyphs[char] = glyph
+                    self.widths[char] = digit_width if char.isdigit() else glyph.get_width()
+                self.height = font.get_height()
+
+        # Size of a text drawn with the atlas.
+        def size(self, text):
+                '''
+                Description:
+                Returns the size the text takes when drawn with the atlas.
+
+                Input:
+                text (str): Text made of characters in the atlas.
+
+                Output:
+                size (tuple): Width and height in pixels.
+                '''
+                return sum(self.widths[char] for char in text), self.height
+
+        # Draws only the characters that changed.
+        def draw(self, surface, text, previous=None):
+                '''
+                Description:
+                Blits the glyphs of the text into the surface. When the
+                previous text has the same length, only the characters that
+                changed are cleared and drawn again.
+
+                Inputs:
+                surface (pygame.Surface): SRCALPHA surface to draw into.
+                text (str): Text to draw.
+                previous (str): Text currently drawn in the surface.
+
+                Output:
+                None
+                '''
+                if previous is None or len(previous) != len(text):
+                    surface.fill((0, 0, 0, 0))
+                    previous = None
+
+                x = 0
+                for i, char in enumerate(text):
+                    width = self.widths[char]
+                    if previous is None or previous[i] != char:
+                        cell = pygame.Rect(x, 0, width, self.height)
+                        surface.fill((0, 0, 0, 0), cell)
+                        glyph = self.glyphs[char]
+                        surface.blit(glyph, (x + (width - glyph.get_width()) // 2, 0))
+                    x += width
+
+
+# Glyph atlases shared by every sprite (e.g. every court) with the same font and color.
+_glyph_atlases = {}
+
+# Gets the shared atlas of a font and color.
+def shared_glyph_atlas(font, color):
+    '''
+    Description:
+    Creates the atlas the first time, then returns the same one, so many
+    clocks and timers render their glyphs only once.
+
+    Input:
+    font (pygame.font.Font): Font used for the glyphs.
+    color (tuple): Color of the glyphs.
+
+    Output:
+    atlas (GlyphAtlas): The shared atlas.
+    '''
+    key = (font, tuple(color))
+    atlas = _glyph_atlases.get(key)
+    if atlas is None:
+        atlas = _glyph_atlases[key] = GlyphAtlas(font, color)
+    return atlas
+
+
+# Sprite for the clock and timer, drawn from a glyph atlas.
+class GlyphTextSprite(pygame.sprite.DirtySprite):
+        def __init__(self, atlas, topleft, text):
+                '''
+                Description:
+                A text drawn from pre-rendered glyphs, so a tick only blits
+                the few glyphs that changed.
+
+                Inputs:
+                atlas (GlyphAtlas): Glyphs used to draw the text.
+                topleft (tuple): Position of the text on screen.
+                text (str): First text to display, e.g. "00:00".
+
+                Output:
+                A glyph text sprite class
+                '''
+                pygame.sprite.DirtySprite.__init__(self)
+                self.atlas = atlas
+                self.text = None
+                self.image = pygame.Surface(atlas.size(text), pygame.SRCALPHA)
+                self.rect = self.image.get_rect(topleft=topleft)
+                self.set_text(text)
+
+        # Changes the text, drawing only the glyphs that changed.
+        def set_text(self, text):
+                '''
+                Description:
+                Draws the new text when it differs from the current one.
+
+                Input:
+                text (str): Text to display.
+
+                Output:
+                changed (bool): True if the sprite was redrawn.
+                '''
+                if text == self.text:
+                    return False
+
+                # A longer text (e.g. 100 minutes) needs a bigger surface.
+                size = self.atlas.size(text)
+                if size != self.image.get_size():
+                    self.image = pygame.Surface(size, pygame.SRCALPHA)
+                    self.rect = self.image.get_rect(topleft=self.rect.topleft)
+                    self.text = None
+
+                self.atlas.draw(self.image, text, self.text)
+                self.text = text
+                self.dirty = 1
+                return True
@@ -0,0 +1,131 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Measures how long each phase of the start takes.
+class StartupProfiler:
+        def __init__(self):
+                '''
+                Description:
+                Records the time of each startup phase (display, fonts,
+                images, sounds, license...) since it was created.
+
+                Inputs:
+                None
+
+                Output:
+                A startup profiler class
+                '''
+                self.start = time.perf_counter()
+                self.phases = []
+
+        # Times a block of code.
+        @contextmanager
+        def phase(self, name):
+                '''
+                Description:
+                Context manager that records how long the block took.
+
+                Input:
+                name (str): Name of the phase.
+
+                Output:
+                None
+                '''
+                begin = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    self.phases.append((name, time.perf_counter() - begin))
+
+        # Time since the profiler was created.
+        def elapsed(self):
+                return time.perf_counter() - self.start
+
+        # Text report of the phases.
+        def report(self):
+                '''
+                Description:
+                Lists each phase with its time, slowest first.
+
+                Input:
+                None
+
+                Output:
+                report (str): The report to print.
+                '''
+                lines = [f"Startup: {self.elapsed() * 1000:.0f} ms"]
+                for name, seconds in sorted(self.phases, key=lambda phase: -phase[1]):
+                    lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms")
+                return "\n".join(lines)
+
+
+# Creates fonts, images and sounds the first time they are used.
+class ResourceRegistry:
+        def __init__(self, profiler=None):
+                '''
+                Description:
+                Keeps a factory per resource name. A resource is created on
+                first use and then shared, so resources that are never used
+                cost nothing at startup.
+
+                Inputs:
+                profiler (StartupProfiler): Times the creation of each resource.
+
+                Output:
+                A resource registry class
+                '''
+                self.profiler = profiler
+                self._factories = {}
+                self._resources = {}
+                self._lock = threading.RLock()
+
+        # Adds a resource without creating it.
+        def register(self, name, factory):
+                '''
+                Description:
+                Registers the function that creates a resource.
+
+                Input:
+                name (str): Name of the resource.
+                factory (function): Creates the resource, takes no arguments.
+
+                Output:
+                None
+                '''
+                self._factories[name] = factory
+
+        def __contains__(self, name):
+                return name in self._factories
+
+        # Gets a resource, creating it the first time.
+        def get(self, name):
+                '''
+                Description:
+                Returns the shared resource, creating it if needed.
+
+                Input:
+                name (str): Name of the resource.
+
+                Output:
+                resource (object): The font, surface, sound...
+                '''
+                try:
+                    return self._resources[name]
+                except KeyError:
+                    pass
+                with self._lock:
+                    if name not in self._resources:
+                        factory = self._factories[name]
+                        if self.profiler is None:
+                            self._resources[name] = factory()
+                        else:
+                            with self.profiler.phase(name):
+                                self._resources[name] = factory()
+                    return self._resources[name]
+
+        # Creates some resources ahead of their first use.
+        def preload(self, *names):
+                for name in names:
+                    self.get(name)
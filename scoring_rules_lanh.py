@@ -0,0 +1,367 @@
+import collections
+import time
+import match_state_lanh as msl
+
+
+# Points past the end of a tiebreak (or games past the end of a set without
+# tiebreak) kept in the tables. A longer one is scored by step() instead.
+OVERTIME_LIMIT = 10
+
+
+# Variant of the rules of a match.
+class Rules:
+        def __init__(self, name, golden_point=False, games_per_set=msl.GAMES_PER_SET,
+                     tiebreak_points=msl.TIEBREAK_POINTS, sets_to_win=msl.SETS_TO_WIN,
+                     final_set="tiebreak", super_tiebreak_points=10):
+                '''
+                Description:
+                The rules the scoring needs. A set is won with games_per_set
+                games and 2 of difference, and goes to a tiebreak when both
+                reach games_per_set (8 for a pro set).
+
+                Inputs:
+                name (str): Name of the rule set, e.g. for the SCORING_RULES setting.
+                golden_point (bool): At 40-40 the next point wins the game,
+                                     otherwise advantage.
+                games_per_set (int): Games to win a set.
+                tiebreak_points (int): Points to win a tiebreak.
+                sets_to_win (int): 2 for best of 3, 3 for best of 5, 1 for a
+                                   single (pro) set.
+                final_set (str): How the deciding set is played: "tiebreak"
+                                 like the others, "super_tiebreak" (a single
+                                 tiebreak replaces it) or "advantage" (no
+                                 tiebreak, 2 games of difference).
+                super_tiebreak_points (int): Points to win the super tiebreak.
+
+                Output:
+                A rules class
+                '''
+                self.name = name
+                self.golden_point = golden_point
+                self.games_per_set = games_per_set
+                self.tiebreak_points = tiebreak_points
+                self.sets_to_win = sets_to_win
+                self.final_set = final_set
+                self.super_tiebreak_points = super_tiebreak_points
+
+        def __repr__(self):
+                return f"Rules({self.name!r})"
+
+        # True when the sets are tied one set before the end.
+        def deciding_set(self, sets):
+                return sets[0] == sets[1] == self.sets_to_win - 1
+
+        # Points to win the tiebreak of a state.
+        def tiebreak_target(self, state):
+                '''
+                Description:
+                The super tiebreak replaces the deciding set, so it is the
+                only tiebreak played at 0-0 in games.
+
+                Input:
+                state (MatchState): A state in a tiebreak.
+
+                Output:
+                points (int): Points needed with 2 of difference.
+                '''
+                if state.games == (0, 0):
+                    return self.super_tiebreak_points
+                return self.tiebreak_points
+
+
+# The rule sets that can be chosen.
+RULE_SETS = collections.OrderedDict((rules.name, rules) for rules in (
+    Rules("advantage"),
+    Rules("golden_point", golden_point=True),
+    Rules("super_tiebreak", golden_point=True, final_set="super_tiebreak"),
+    Rules("advantage_super_tiebreak", final_set="super_tiebreak"),
+    Rules("best_of_5", sets_to_win=3),
+    Rules("best_of_5_advantage_final", sets_to_win=3, final_set="advantage"),
+    Rules("pro_set", games_per_set=8, sets_to_win=1),
+))
+
+
+# A point with the given rules, computed from the rules (the reference).
+def step(rules, state, side):
+    '''
+    Description:
+    Scores a point like match_state_lanh.point, for any rule set. The
+    compiled tables are filled from it.
+
+    Input:
+    rules (Rules): Rules of the match.
+    state (MatchState): Current state.
+    side (int): Side that won the point, 0 or 1.
+
+    Output:
+    state (MatchState): The new state.
+    '''
+    if state.winner is not None:
+        return state
+    if state.tiebreak:
+        points = msl._add_one(state.points, side)
+        if points[side] >= rules.tiebreak_target(state) and points[side] - points[1 - side] >= 2:
+            return _set_won(rules, state, side)
+        return msl.MatchState(points, state.games, state.sets, tiebreak=True)
+
+    points = state.points[side]
+    opponent = state.points[1 - side]
+    if rules.golden_point:
+        # 40-40 is decided by the next point.
+        if points == 3:
+            return _game_won(rules, state, side)
+    else:
+        # Opponent had advantage, back to deuce.
+        if opponent == 4:
+            return msl.MatchState((3, 3), state.games, state.sets)
+        if points == 4 or (points == 3 and opponent < 3):
+            return _game_won(rules, state, side)
+    return msl.MatchState(msl._add_one(state.points, side), state.games, state.sets)
+
+
+def _game_won(rules, state, side):
+    games = msl._add_one(state.games, side)
+    won = games[side]
+    lost = games[1 - side]
+    if won >= rules.games_per_set and won - lost >= 2:
+        return _set_won(rules, state, side)
+    if (won == lost == rules.games_per_set
+            and not (rules.final_set == "advantage" and rules.deciding_set(state.sets))):
+        return msl.MatchState((0, 0), games, state.sets, tiebreak=True)
+    return msl.MatchState((0, 0), games, state.sets)
+
+
+def _set_won(rules, state, side):
+    sets = msl._add_one(state.sets, side)
+    if sets[side] >= rules.sets_to_win:
+        return msl.MatchState((0, 0), (0, 0), sets, winner=side)
+    if rules.final_set == "super_tiebreak" and rules.deciding_set(sets):
+        return msl.MatchState((0, 0), (0, 0), sets, tiebreak=True)
+    return msl.MatchState((0, 0), (0, 0), sets)
+
+
+# True if a state is kept in the tables.
+def _in_table(rules, state):
+    if state.tiebreak:
+        return max(state.points) <= rules.tiebreak_target(state) + OVERTIME_LIMIT
+    return max(state.games) <= rules.games_per_set + OVERTIME_LIMIT
+
+
+# Transition tables of a rule set.
+class CompiledRules:
+        def __init__(self, rules):
+                '''
+                Description:
+                Walks every state reachable from a new match with step() and
+                numbers them in indices. The next state of state i when side
+                s wins the point is states[transitions[2 * i + s]], so a
+                point is two lookups instead of the rules. The states are
+                shared and never modified. A very long tiebreak (or final
+                set without tiebreak) leaves the tables and is scored by
+                step() until it is over, -1 marks those transitions.
+
+                Inputs:
+                rules (Rules): Rules to compile.
+
+                Output:
+                A compiled rules class
+                '''
+                self.rules = rules
+                begin = time.perf_counter()
+                start = msl.MatchState()
+                self.states = [start]
+                self.indices = {start: 0}
+                self.transitions = []
+                self.overflow = 0
+
+                # Breadth first, the index of a state is its order of discovery.
+                index = 0
+                while index < len(self.states):
+                    state = self.states[index]
+                    for side in (0, 1):
+                        after = step(rules, state, side)
+                        if after == state:
+                            self.transitions.append(index)
+                            continue
+                        if not _in_table(rules, after):
+                            self.transitions.append(-1)
+                            self.overflow += 1
+                            continue
+                        target = self.indices.get(after)
+                        if target is None:
+                            target = self.indices[after] = len(self.states)
+                            self.states.append(after)
+                        self.transitions.append(target)
+                    index += 1
+                self.compile_seconds = time.perf_counter() - begin
+
+        # A point is won by a side.
+        def point(self, state, side):
+                '''
+                Description:
+                Same as step(), from the tables. The state is found by its
+                value, the states of the tables are found by identity
+                without comparing the scores.
+
+                Input:
+                state (MatchState): Current state.
+                side (int): Side that won the point, 0 or 1.
+
+                Output:
+                state (MatchState): The new state.
+                '''
+                index = self.indices.get(state)
+                if index is None:
+                    return self._step(state, side)
+                target = self.transitions[2 * index + side]
+                if target < 0:
+                    return self._step(state, side)
+                return self.states[target]
+
+        # Point out of the tables, back into them as soon as possible.
+        def _step(self, state, side):
+                after = step(self.rules, state, side)
+                index = self.indices.get(after)
+                return after if index is None else self.states[index]
+
+        # Counts of the state space.
+        def explore(self):
+                '''
+                Description:
+                Describes the reachable states: how many in each phase, the
+                transitions and the shortest match in points.
+
+                Input:
+                None
+
+                Output:
+                report (dict): The counts.
+                '''
+                phases = collections.Counter()
+                for state in self.states:
+                    if state.winner is not None:
+                        phases["finished"] += 1
+                    elif state.tiebreak and state.games == (0, 0):
+                        phases["super_tiebreak"] += 1
+                    elif state.tiebreak:
+                        phases["tiebreak"] += 1
+                    else:
+                        phases["games"] += 1
+
+                # Points of the shortest match, by breadth first depth.
+                depth = [None] * len(self.states)
+                depth[0] = 0
+                shortest = None
+                queue = collections.deque([0])
+                while queue:
+                    index = queue.popleft()
+                    if self.states[index].winner is not None:
+                        shortest = depth[index]
+                        break
+                    for side in (0, 1):
+                        target = self.transitions[2 * index + side]
+                        if target >= 0 and depth[target] is None:
+                            depth[target] = depth[index] + 1
+                            queue.append(target)
+
+                return {
+                    "rules": self.rules.name,
+                    "states": len(self.states),
+                    "transitions": len(self.transitions),
+                    "overflow_transitions": self.overflow,
+                    "phases": dict(phases),
+                    "shortest_match_points": shortest,
+                    "compile_ms": round(self.compile_seconds * 1000, 1),
+                }
+
+        # Checks every table entry against the rules.
+        def verify(self):
+                '''
+                Description:
+                Compares each transition of the tables with step().
+
+                Input:
+                None
+
+                Output:
+                mismatches (int): Transitions that differ, 0 if the tables are right.
+                '''
+                mismatches = 0
+                for index, state in enumerate(self.states):
+                    for side in (0, 1):
+                        if self.point(state, side) != step(self.rules, state, side):
+                            mismatches += 1
+                return mismatches
+
+
+# Compiled rule sets, each one compiled on first use.
+_compiled = {}
+
+
+# Gets the compiled tables of a rule set by name.
+def compiled(name):
+    '''
+    Description:
+    Compiles the rule set the first time it is asked for.
+
+    Input:
+    name (str): Name in RULE_SETS.
+
+    Output:
+    rules (CompiledRules): The tables, those of "advantage" if the name
+                           is unknown.
+    '''
+    if name not in RULE_SETS:
+        print(f"Unknown scoring rules {name!r}, using advantage")
+        name = "advantage"
+    if name not in _compiled:
+        _compiled[name] = CompiledRules(RULE_SETS[name])
+    return _compiled[name]
+
+
+# Measures the points per second of the tables and of the rules.
+def benchmark(tables, total_points=1_000_000, seed=1):
+    '''
+    Description:
+    Replays the same random points with the tables and with step(),
+    starting a new match when one is won.
+
+    Input:
+    tables (CompiledRules): Tables to measure.
+    total_points (int): Amount of points to replay.
+    seed (int): Seed of the random points.
+
+    Output:
+    results (dict): Points per second of each.
+    '''
+    import random
+    sides = random.Random(seed).choices((0, 1), k=total_points)
+    results = {}
+    for label, point in (("table", tables.point), ("rules", lambda state, side: step(tables.rules, state, side))):
+        state = new = msl.MatchState()
+        begin = time.perf_counter()
+        for side in sides:
+            state = point(state, side)
+            if state.winner is not None:
+                state = new
+        results[f"{label}_points_per_second"] = round(total_points / (time.perf_counter() - begin))
+    return results
+
+
+if __name__ == '__main__':
+    import json
+    import sys
+    names = sys.argv[1:] or list(RULE_SETS)
+
+    # The advantage tables must score like match_state_lanh.point.
+    advantage = compiled("advantage")
+    differences = sum(advantage.point(state, side) != msl.point(state, side)
+                      for state in advantage.states for side in (0, 1))
+    print(f"advantage tables vs match_state_lanh.point: {differences} differences")
+
+    for name in names:
+        tables = compiled(name)
+        report = tables.explore()
+        report["mismatches"] = tables.verify()
+        report.update(benchmark(tables, 300_000))
+        print(json.dumps(report))
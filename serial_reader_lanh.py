@@ -0,0 +1,242 @@
+import os
+import selectors
+import threading
+import time
+import pygame
+import serial
+import controller_protocol_lanh as protocol
+
+
+# Key pressed by each command of the controllers.
+COMMAND_KEYS = {
+    "ENTER": pygame.K_RETURN,
+    "SPACE": pygame.K_SPACE,
+    "RIGHT": pygame.K_RIGHT,
+    "LEFT": pygame.K_LEFT,
+}
+
+
+# Posts the key of a command as a pygame key press.
+def post_key(key, port, t_read):
+    '''
+    Description:
+    Posts a KEYDOWN event, the same one the keyboard would send, stamped
+    with the time it was read and posted to measure the input latency.
+    The event is marked as debounced, the reader already dropped the
+    repeated inputs of its controller.
+
+    Input:
+    key (int): The pygame key.
+    port (str): Port the command came from.
+    t_read (float): time.perf_counter() when the bytes were read.
+
+    Output:
+    None
+    '''
+    event = pygame.event.Event(
+                pygame.KEYDOWN,
+                {'key': key, 'port': port, 'debounced': True,
+                 't_read': t_read, 't_post': time.perf_counter()}
+                )
+    pygame.event.post(event)
+
+
+# One reader for all the serial ports.
+class SerialReader:
+        def __init__(self, baudrate=9600, post=post_key, on_disconnect=None, debouncer=None):
+                '''
+                Description:
+                Reads every connected controller from a single thread that
+                sleeps until bytes arrive on any port (selectors over the
+                serial file descriptors). On Windows, where serial ports
+                can't be selected, each port gets a thread that blocks on
+                read instead. Ports can speak the binary frame protocol or
+                the text one, each input is debounced per controller.
+
+                Inputs:
+                baudrate (int): Speed of the serial connections.
+                post (function): Called with (key, port, t_read) for each command.
+                on_disconnect (function): Called with the port when it fails.
+                debouncer (Debouncer): Drops repeated inputs, a default one if None.
+
+                Output:
+                A serial reader class
+                '''
+                self.baudrate = baudrate
+                self.post = post
+                self.on_disconnect = on_disconnect
+                self.debouncer = debouncer or protocol.Debouncer()
+                self.stats = {}
+                self._ports = {}
+                self._decoders = {}
+                self._lock = threading.Lock()
+                self._use_select = os.name != "nt"
+                if self._use_select:
+                    self._selector = selectors.DefaultSelector()
+
+                    # Pipe that wakes the selector when ports are added.
+                    self._wake_r, self._wake_w = os.pipe()
+                    self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        # Ports that are being read.
+        def ports(self):
+                with self._lock:
+                    return set(self._ports)
+
+        # Starts reading a port.
+        def add_port(self, port):
+                '''
+                Description:
+                Opens the port and adds it to the reader.
+
+                Input:
+                port (str): Device of the port, e.g. /dev/ttyUSB0 or COM3.
+
+                Output:
+                added (bool): False if the port could not be opened.
+                '''
+                with self._lock:
+                    if port in self._ports:
+                        return True
+                try:
+                    ser = serial.Serial(port, self.baudrate, timeout=0 if self._use_select else None)
+                except serial.SerialException as e:
+                    print(f"[{port}] Serial error: {e}")
+                    return False
+
+                with self._lock:
+                    self._ports[port] = ser
+                    self._decoders[port] = protocol.FrameDecoder()
+                    self.stats[port] = {"reads": 0, "bytes": 0, "frames": 0, "lines": 0,
+                                        "events": 0, "duplicates": 0, "errors": 0, "bad_frames": 0}
+
+                if self._use_select:
+                    self._selector.register(ser.fileno(), selectors.EVENT_READ, port)
+                    os.write(self._wake_w, b"\0")
+                else:
+                    threading.Thread(target=self._read_blocking, args=(port, ser), daemon=True).start()
+                return True
+
+        # Stops reading a port.
+        def remove_port(self, port):
+                '''
+                Description:
+                Closes the port and tells on_disconnect.
+
+                Input:
+                port (str): Device of the port.
+
+                Output:
+                None
+                '''
+                with self._lock:
+                    ser = self._ports.pop(port, None)
+                    self._decoders.pop(port, None)
+                if ser is None:
+                    return
+                if self._use_select:
+                    try:
+                        self._selector.unregister(ser.fileno())
+                    except (KeyError, ValueError):
+                        pass
+                ser.close()
+                if self.on_disconnect:
+                    self.on_disconnect(port)
+
+        # Reads all the ports, blocking until bytes arrive.
+        def run(self):
+                '''
+                Description:
+                Main loop of the reader thread on systems with select. It
+                never polls, the thread sleeps in select() until a port has
+                data or a port is added.
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                while True:
+                    for key, _ in self._selector.select():
+                        port = key.data
+                        if port is None:
+                            os.read(self._wake_r, 512)
+                            continue
+                        try:
+                            data = os.read(key.fd, 4096)
+                        except OSError as e:
+                            data = None
+                            print(f"[{port}] Serial error: {e}")
+                        if not data:
+                            # Readable but empty: the device was unplugged.
+                            self.stats[port]["errors"] += 1
+                            self.remove_port(port)
+                            continue
+                        self._feed(port, data)
+
+        # Starts the reader in a background thread.
+        def start(self):
+                '''
+                Description:
+                Runs the reader in a daemon thread (nothing to run on Windows,
+                each port has its own thread).
+
+                Input:
+                None
+
+                Output:
+                None
+                '''
+                if self._use_select:
+                    threading.Thread(target=self.run, daemon=True).start()
+
+        # Reads one port with blocking reads (Windows).
+        def _read_blocking(self, port, ser):
+                try:
+                    while True:
+                        data = ser.read(1)
+                        data += ser.read(ser.in_waiting)
+                        self._feed(port, data)
+                except serial.SerialException as e:
+                    print(f"[{port}] Serial error: {e}")
+                    self.stats[port]["errors"] += 1
+                    self.remove_port(port)
+
+        # Decodes the bytes and posts the accepted commands.
+        def _feed(self, port, data):
+                t_read = time.perf_counter()
+                now = time.monotonic()
+                stats = self.stats[port]
+                stats["reads"] += 1
+                stats["bytes"] += len(data)
+
+                decoder = self._decoders.get(port)
+                if decoder is None:
+                    return
+                for item in decoder.feed(data):
+                    if item[0] == "frame":
+                        _, source_id, sequence, number = item
+                        stats["frames"] += 1
+                        command = protocol.FRAME_COMMANDS.get(number)
+                        source = (port, source_id)
+                    else:
+                        stats["lines"] += 1
+                        sequence = None
+                        source = port
+
+                        #Checks every entry of the option.
+                        command = None
+                        for name in protocol.TEXT_COMMANDS:
+                            if name in item[1]:
+                                command = name
+                                break
+
+                    if command is None:
+                        continue
+                    if not self.debouncer.accept(source, command, sequence, now):
+                        stats["duplicates"] += 1
+                        continue
+                    stats["events"] += 1
+                    self.post(COMMAND_KEYS[command], port, t_read)
+                stats["bad_frames"] = decoder.bad_frames
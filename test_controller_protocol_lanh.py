@@ -0,0 +1,27 @@
+import controller_protocol_lanh as protocol
+
+
+# The text protocol only debounces the score keys, like the old lockout.
+def test_text_debounce_only_locks_the_score_keys():
+    debouncer = protocol.Debouncer()
+    assert debouncer.accept("port", "LEFT", now=0.0)
+    assert not debouncer.accept("port", "LEFT", now=1.0)
+    assert debouncer.accept("port", "RIGHT", now=1.0)
+    assert debouncer.accept("port", "ENTER", now=1.0)
+    assert debouncer.accept("port", "ENTER", now=1.1)
+    assert debouncer.accept("port", "SPACE", now=1.2)
+    assert debouncer.accept("port", "SPACE", now=1.3)
+    assert debouncer.accept("port", "LEFT", now=3.5)
+    assert debouncer.duplicates == 1
+    assert debouncer.locked_out == 1
+
+
+# Frames drop retransmissions and bounces of every command.
+def test_frames_drop_retransmissions():
+    debouncer = protocol.Debouncer()
+    source = ("port", 1)
+    assert debouncer.accept(source, "ENTER", 1, now=0.0)
+    assert not debouncer.accept(source, "ENTER", 1, now=0.01)
+    assert not debouncer.accept(source, "ENTER", 2, now=0.05)
+    assert debouncer.accept(source, "ENTER", 3, now=0.3)
+    assert debouncer.locked_out == 0
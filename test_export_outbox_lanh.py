@@ -0,0 +1,104 @@
+import http.server
+import json
+import threading
+import pytest
+import export_outbox_lanh as exo
+
+
+# Local stand-in for the export endpoint, fails the first requests if asked to.
+class StubServer(http.server.HTTPServer):
+        def __init__(self, failures=0):
+                super().__init__(("127.0.0.1", 0), StubHandler)
+                self.failures = failures
+                self.received = []
+                self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+                self.thread.start()
+
+        @property
+        def url(self):
+                return f"http://127.0.0.1:{self.server_address[1]}/results"
+
+        def stop(self):
+                self.shutdown()
+                self.server_close()
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.server.failures:
+                    self.server.failures -= 1
+                    self.send_response(503)
+                else:
+                    self.server.received.extend(json.loads(body)["results"])
+                    self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        def log_message(self, *args):
+                pass
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    yield stub
+    stub.stop()
+
+
+def put(outbox, elapsed_time, started=1000.0):
+    return outbox.put(0, "1-2-3", "0-1-0", elapsed_time, "LICENSE", "1.0", court="Court 1", started=started)
+
+
+# Enter then ESC exports the same score of the same match a few seconds apart.
+def test_same_score_of_a_match_is_sent_once(tmp_path, server):
+    outbox = exo.ExportOutbox(str(tmp_path / "outbox.jsonl"), exo.http_sender(server.url, timeout=2))
+    assert put(outbox, "00:10:00")
+    assert not put(outbox, "00:10:03")
+    assert put(outbox, "00:10:03", started=2000.0)
+    outbox.close()
+
+    assert [record["started"] for record in server.received] == [1000.0, 2000.0]
+    assert outbox.stats()["duplicates"] == 1
+    assert (tmp_path / "outbox.jsonl").read_text() == ""
+
+
+# The worker retries with backoff until the server accepts the results.
+def test_results_are_retried_until_sent(tmp_path, server):
+    server.failures = 2
+    outbox = exo.ExportOutbox(str(tmp_path / "outbox.jsonl"), exo.http_sender(server.url, timeout=2),
+                              base_delay=0.05, max_delay=0.1)
+    put(outbox, "00:10:00")
+    for _ in range(100):
+        if outbox.stats()["sent"]:
+            break
+        threading.Event().wait(0.05)
+    outbox.close()
+
+    assert len(server.received) == 1
+    assert outbox.stats()["failures"] == 2
+
+
+# Results that could not be sent on close are in the file for the next start.
+def test_unsent_results_are_sent_on_the_next_start(tmp_path, server):
+    path = str(tmp_path / "outbox.jsonl")
+    server.failures = 100
+    outbox = exo.ExportOutbox(path, exo.http_sender(server.url, timeout=2), base_delay=60)
+    put(outbox, "00:10:00")
+    outbox.close(timeout=2)
+    assert server.received == []
+
+    server.failures = 0
+    outbox = exo.ExportOutbox(path, exo.http_sender(server.url, timeout=2))
+    outbox.close()
+    assert len(server.received) == 1
+    assert outbox.stats()["pending"] == 0
+
+
+# Lines of the file that are not results are skipped on start.
+def test_lines_without_an_id_are_skipped(tmp_path, server):
+    path = tmp_path / "outbox.jsonl"
+    path.write_text('{"winner": null}\n[1, 2]\n{"id": "abc", "winner": 0}\n{"id": "ab')
+    outbox = exo.ExportOutbox(str(path), exo.http_sender(server.url, timeout=2))
+    outbox.close()
+    assert [record["id"] for record in server.received] == ["abc"]
@@ -0,0 +1,38 @@
+import match_journal_lanh as mjl
+import match_state_lanh as msl
+
+
+# A crash in the middle of a write leaves part of a record at the end.
+def test_torn_tail_is_dropped_before_appending(tmp_path):
+    path = str(tmp_path / "journal.bin")
+    with open(path, "wb") as f:
+        f.write(mjl.RECORD.pack(mjl.START, 0, 1000.0))
+        f.write(mjl.RECORD.pack(mjl.POINT, 0, 1001.0))
+        f.write(mjl.RECORD.pack(mjl.POINT, 1, 1002.0)[:4])
+
+    journal = mjl.MatchJournal(path, fsync_interval=0)
+    journal.point(1)
+    journal.point(1)
+    journal.close()
+
+    events = mjl.read_events(path)
+    assert [(kind, arg) for kind, arg, _ in events] == [(mjl.START, 0), (mjl.POINT, 0), (mjl.POINT, 1), (mjl.POINT, 1)]
+
+    state, started_at, swapped = mjl.recover(path)
+    assert state == msl.MatchState((1, 2))
+    assert started_at == 1000.0
+    assert not swapped
+
+
+# Records that are not events (e.g. written misaligned) are skipped.
+def test_recover_skips_invalid_records(tmp_path):
+    path = str(tmp_path / "journal.bin")
+    with open(path, "wb") as f:
+        f.write(mjl.RECORD.pack(mjl.START, 0, 1000.0))
+        f.write(mjl.RECORD.pack(181, 7, 4.2e58))
+        f.write(mjl.RECORD.pack(mjl.POINT, 9, 1001.0))
+        f.write(mjl.RECORD.pack(mjl.POINT, 0, 1002.0))
+
+    state, started_at, _ = mjl.recover(path)
+    assert state == msl.MatchState((1, 0))
+    assert started_at == 1000.0
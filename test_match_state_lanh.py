@@ -0,0 +1,51 @@
+import match_state_lanh as msl
+
+
+# Scores the points in order.
+def play(sides, state=None, point=msl.point):
+    state = state or msl.MatchState()
+    for side in sides:
+        state = point(state, side)
+    return state
+
+
+# 40-40 goes to advantage, losing it goes back to deuce.
+def test_deuce_and_advantage():
+    deuce = play([0, 0, 0, 1, 1, 1])
+    assert deuce == msl.MatchState((3, 3))
+    advantage = msl.point(deuce, 0)
+    assert advantage.display_points(0) == 'AD'
+    assert advantage.display_points(1) == 40
+    assert msl.point(advantage, 1) == deuce
+    assert msl.point(advantage, 0) == msl.MatchState((0, 0), (1, 0))
+
+
+# A game to love, the score as it is exported.
+def test_game_and_exported_score():
+    state = play([1, 1])
+    assert state.score(0) == "0-0-0"
+    assert state.score(1) == "0-0-30"
+    state = play([1, 1], state)
+    assert state == msl.MatchState((0, 0), (0, 1))
+
+
+# 6-5 is not a set, 7-5 is, and 6-6 goes to a tiebreak to 7.
+def test_set_and_tiebreak_at_six_all():
+    five_all = msl.MatchState(games=(5, 5))
+    assert play([0] * 4, five_all) == msl.MatchState((0, 0), (6, 5))
+    assert play([0] * 8, five_all) == msl.MatchState((0, 0), (0, 0), (1, 0))
+
+    tiebreak = play([0] * 4 + [1] * 4, five_all)
+    assert tiebreak == msl.MatchState((0, 0), (6, 6), tiebreak=True)
+    assert play([0, 0, 0, 0, 0, 0, 1], tiebreak).display_points(0) == 6
+    assert play([0] * 6 + [1] * 6, tiebreak) == msl.MatchState((6, 6), (6, 6), tiebreak=True)
+    assert play([0] * 6 + [1] * 6 + [1, 1], tiebreak) == msl.MatchState((0, 0), (0, 0), (0, 1))
+
+
+# Two sets win the match, a finished match ignores new points.
+def test_match_won_in_two_sets():
+    state = play([0] * 4 * 6 * 2)
+    assert state.winner == 0
+    assert state.sets == (2, 0)
+    assert msl.point(state, 1) is state
+    assert msl.replay([0] * 4 * 6 * 2 + [1]) == msl.MatchState((0, 1))
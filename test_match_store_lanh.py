@@ -0,0 +1,37 @@
+import match_journal_lanh as mjl
+import match_store_lanh as mstore
+
+
+# Enter then ESC saves the same score of the match a few seconds apart.
+def test_same_score_of_a_match_is_kept_once(tmp_path):
+    path = str(tmp_path / "store.db")
+    store = mstore.MatchStore(path, batch_interval=0.01)
+    store.add_match(None, "0-3-2", "0-1-1", 600, "LICENSE", "1.0", court=1, started=1000.0)
+    store.add_match(None, "0-3-2", "0-1-1", 603, "LICENSE", "1.0", court=1, started=1000.0)
+    store.add_match(None, "0-3-2", "0-1-1", 603, "LICENSE", "1.0", court=1, started=2000.0)
+    store.close()
+
+    matches = mstore.query_matches(path)
+    assert sorted((match["started"], match["elapsed"]) for match in matches) == [(1000.0, 600), (2000.0, 603)]
+
+
+# Each event carries the start of its match, sent upstream with it.
+def test_events_carry_the_start_of_their_match(tmp_path):
+    path = str(tmp_path / "store.db")
+    store = mstore.MatchStore(path, batch_interval=0.01)
+    started = [None]
+    listener = store.journal_listener(2, lambda: started[0])
+    started[0] = 1000.0
+    listener(mjl.START, 0, 1000.0)
+    listener(mjl.POINT, 1, 1010.0)
+    listener(mjl.RESET, 0, 1020.0)
+    started[0] = None
+    listener(mjl.SWITCH, 0, 1030.0)
+    store.close()
+
+    connection = mstore.connect(path)
+    events = connection.execute(f"SELECT {', '.join(mstore.EVENT_COLUMNS)} FROM events ORDER BY id").fetchall()
+    connection.close()
+    assert [(event["kind"], event["court"], event["started"]) for event in events] == [
+        (mjl.START, 2, 1000.0), (mjl.POINT, 2, 1000.0), (mjl.RESET, 2, 1000.0), (mjl.SWITCH, 2, None)]
+
@@ -0,0 +1,85 @@
+import pytest
+import match_state_lanh as msl
+import scoring_rules_lanh as srl
+
+
+# Scores the points in order with the tables of a rule set.
+def play(name, sides, state=None):
+    tables = srl.compiled(name)
+    state = state or msl.MatchState()
+    for side in sides:
+        state = tables.point(state, side)
+    return state
+
+
+# Every transition of the tables is the one of the rules.
+@pytest.mark.parametrize("name", list(srl.RULE_SETS))
+def test_tables_match_the_rules(name):
+    assert srl.compiled(name).verify() == 0
+
+
+# The advantage tables score like match_state_lanh.point.
+def test_advantage_tables_match_point():
+    tables = srl.compiled("advantage")
+    for state in tables.states:
+        for side in (0, 1):
+            assert tables.point(state, side) == msl.point(state, side)
+
+
+# Deuce goes to advantage, or the next point wins with a golden point.
+def test_deuce_with_advantage_and_golden_point():
+    deuce = msl.MatchState((3, 3))
+    assert play("advantage", [0], deuce) == msl.MatchState((4, 3))
+    assert play("advantage", [0, 1], deuce) == deuce
+    assert play("golden_point", [1], deuce) == msl.MatchState((0, 0), (0, 1))
+
+
+# 6-6 goes to a tiebreak to 7 with 2 of difference.
+def test_tiebreak_at_six_all():
+    tiebreak = play("advantage", [0] * 4 + [1] * 4, msl.MatchState(games=(5, 5)))
+    assert tiebreak == msl.MatchState((0, 0), (6, 6), tiebreak=True)
+    assert play("advantage", [1] * 7, tiebreak) == msl.MatchState((0, 0), (0, 0), (0, 1))
+    assert play("advantage", [0] * 6 + [1] * 6 + [0, 0], tiebreak) == msl.MatchState((0, 0), (0, 0), (1, 0))
+
+
+# At one set all a super tiebreak to 10 replaces the final set.
+def test_super_tiebreak():
+    one_set_all = msl.MatchState(sets=(1, 0))
+    state = play("super_tiebreak", [1] * 24, one_set_all)
+    assert state == msl.MatchState((0, 0), (0, 0), (1, 1), tiebreak=True)
+    assert play("super_tiebreak", [0] * 9, state).winner is None
+    assert play("super_tiebreak", [0] * 9 + [1] * 9 + [0, 0], state).winner == 0
+    assert play("advantage_super_tiebreak", [1] * 10, state) == msl.MatchState((0, 0), (0, 0), (1, 2), winner=1)
+
+
+# Best of 5, the fifth set has no tiebreak and needs 2 games of difference.
+def test_best_of_five_with_advantage_final_set():
+    assert play("best_of_5", [0] * 4 * 6 * 2).winner is None
+    assert play("best_of_5", [0] * 4 * 6 * 3).winner == 0
+
+    final_set = msl.MatchState(games=(6, 5), sets=(2, 2))
+    state = play("best_of_5_advantage_final", [1] * 4, final_set)
+    assert state == msl.MatchState((0, 0), (6, 6), (2, 2))
+    state = play("best_of_5_advantage_final", [0] * 4 + [1] * 4 + [1] * 4, state)
+    assert state == msl.MatchState((0, 0), (7, 8), (2, 2))
+    assert play("best_of_5_advantage_final", [1] * 4, state).winner == 1
+
+
+# A single set to 8 games, with a tiebreak at 8-8.
+def test_pro_set():
+    assert play("pro_set", [0] * 4 * 6).winner is None
+    assert play("pro_set", [0] * 4 * 8).winner == 0
+    tiebreak = play("pro_set", [1] * 4, msl.MatchState(games=(8, 7)))
+    assert tiebreak == msl.MatchState((0, 0), (8, 8), tiebreak=True)
+    assert play("pro_set", [0] * 7, tiebreak).winner == 0
+
+
+# A tiebreak longer than the tables is scored by the rules and comes back.
+def test_long_tiebreak_leaves_and_returns_to_the_tables():
+    tables = srl.compiled("advantage")
+    state = play("advantage", [0] * 4 + [1] * 4, msl.MatchState(games=(5, 5)))
+    state = play("advantage", [0, 1] * (srl.OVERTIME_LIMIT + 10), state)
+    assert state.points == (srl.OVERTIME_LIMIT + 10, srl.OVERTIME_LIMIT + 10)
+    state = play("advantage", [1, 1], state)
+    assert state == msl.MatchState((0, 0), (0, 0), (0, 1))
+    assert tables.states[tables.indices[state]] is state